@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Budgeted Agent - 턴 토큰 예산을 적용하는 공통 에이전트 기반 클래스
+고객/직원 페르소나 에이전트가 공유하는 모델 컨텍스트 설정과 턴 기록
+"""
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import TextMessage
+from autogen_core.model_context import TokenLimitedChatCompletionContext
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from typing import Dict, Optional, Sequence
+
+from rag.prompt_budget import PromptBudget
+from rag.rag_manager import safe_print
+
+class BudgetedAssistantAgent(AssistantAgent):
+    """턴 토큰 예산(이력 + 현재 메시지 + 근거) 안에서 응답하는 AssistantAgent"""
+
+    def __init__(
+        self,
+        name: str,
+        model_client: OpenAIChatCompletionClient,
+        system_message: str,
+        prompt_budget: Optional[PromptBudget] = None,
+        **kwargs
+    ):
+        """
+        Args:
+            name: 에이전트 이름 (Python identifier)
+            model_client: OpenAI 모델 클라이언트
+            system_message: 시스템 프롬프트
+            prompt_budget: 턴 토큰 예산 배분기 (None이면 기본 설정)
+        """
+        self._system_prompt = system_message
+        self.prompt_budget = prompt_budget or PromptBudget()
+        self._history_tokens = 0  # 에이전트 내부 대화 이력 누적 토큰 (추정치)
+
+        # 모델 컨텍스트(이력 + 현재 메시지 + 근거)를 턴 예산 안으로 제한 → 넘치면 이전 메시지부터 제외
+        kwargs.setdefault('model_context', TokenLimitedChatCompletionContext(
+            model_client, token_limit=self.prompt_budget.context_token_limit(self._system_prompt)
+        ))
+
+        super().__init__(
+            name=name,
+            model_client=model_client,
+            system_message=system_message,
+            **kwargs
+        )
+
+    def _start_turn(self, message_content: str) -> Dict:
+        """이번 턴 예산 시작 (이력은 모델 컨텍스트가 잘라내므로 근거 예산을 먼저 확보)"""
+        return self.prompt_budget.start_turn(self._system_prompt, message_content)
+
+    async def _respond(self, messages: Sequence[TextMessage], cancellation_token, turn: Dict):
+        """턴 토큰 내역을 기록하고 원본 on_messages 호출"""
+        # 이번 턴에 새로 들어온 다른 발언자 메시지까지 이력으로 집계 (모델 컨텍스트가 이력 예산 안으로 잘라냄)
+        earlier_tokens = sum(
+            self.prompt_budget.count_message(getattr(message, 'content', str(message)))
+            for message in messages[:-1]
+        )
+        turn['history'] = min(self._history_tokens + earlier_tokens, turn['history_budget'])
+        safe_print(self.prompt_budget.describe(turn, self.name))
+        response = await super().on_messages(messages, cancellation_token)
+
+        reply = getattr(getattr(response, 'chat_message', None), 'content', "")
+        self._history_tokens = (
+            turn['history'] + turn['message'] + turn['evidence']
+            + self.prompt_budget.count_message(reply if isinstance(reply, str) else str(reply))
+        )
+        return response
@@ -5,13 +5,16 @@ Customer Agents - 고객 페르소나 에이전트들
 AutoGen 0.7.x + RAG 통합 구현
 """
 
-from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from typing import Dict, List, Optional, Sequence
 import os
 
-class CustomerAgent(AssistantAgent):
+from agents.budgeted_agent import BudgetedAssistantAgent
+from rag.prompt_budget import PromptBudget
+from rag.rag_manager import safe_print
+
+class CustomerAgent(BudgetedAssistantAgent):
     """RAG 통합 고객 에이전트 (AutoGen 0.7.x)"""
     
     def __init__(
@@ -19,6 +22,7 @@ class CustomerAgent(AssistantAgent):
         transition_type: str, 
         rag_manager, 
         model_client: OpenAIChatCompletionClient,
+        prompt_budget: Optional[PromptBudget] = None,
         **kwargs
     ):
         """
@@ -28,6 +32,7 @@ class CustomerAgent(AssistantAgent):
             transition_type: 전환 유형 (iphone_to_galaxy, galaxy_loyalist 등)
             rag_manager: RAG 시스템 매니저
             model_client: OpenAI 모델 클라이언트
+            prompt_budget: 턴 토큰 예산 배분기 (None이면 기본 설정)
         """
         self.transition_type = transition_type
         self.rag_manager = rag_manager
@@ -127,6 +132,7 @@ class CustomerAgent(AssistantAgent):
             name=persona["name"],
             model_client=model_client,
             system_message=system_message,
+            prompt_budget=prompt_budget,
             **kwargs
         )
     
@@ -138,44 +144,45 @@ class CustomerAgent(AssistantAgent):
         """
         RAG 컨텍스트를 포함한 메시지 처리 (AutoGen 0.7.x)
         
-        Override하여 RAG 검색 결과를 포함
+        Override하여 RAG 검색 결과를 포함 (턴 토큰 예산 안에서만 근거 추가)
         """
-        # 마지막 메시지 추출
-        if messages:
-            last_message = messages[-1]
-            message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        if not messages:
+            return await super().on_messages(messages, cancellation_token)
+        
+        last_message = messages[-1]
+        message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        
+        # 이력은 모델 컨텍스트가 예산에 맞춰 잘라내므로 근거 예산을 먼저 확보
+        turn = self._start_turn(message_content)
+        
+        # RAG에서 관련 컨텍스트 검색
+        try:
+            contexts = await self.rag_manager.aget_context(
+                self.persona_key,
+                message_content,
+                k=3  # Top 3 관련 문서
+            )
             
-            # RAG에서 관련 컨텍스트 검색 (토큰 제한 고려)
-            try:
-                contexts = self.rag_manager.get_context(
-                    self.persona_key,
-                    message_content,
-                    k=3  # Top 3 관련 문서 (토큰 제한 고려)
-                )
+            header = "\n\n[실제 사용자 의견 (다양한 사례)]\n"
+            evidence = self.prompt_budget.fit_evidence(turn, contexts, header=header) if contexts else []
+            
+            if evidence:
+                enhanced_content = message_content + header + "\n---\n".join(evidence)
+                
+                enhanced_messages = list(messages[:-1]) + [
+                    TextMessage(
+                        content=enhanced_content,
+                        source=last_message.source if hasattr(last_message, 'source') else "user"
+                    )
+                ]
                 
-                if contexts:
-                    # 컨텍스트를 메시지에 추가 (토큰 제한 고려)
-                    rag_context = "\n\n[실제 사용자 의견 (다양한 사례)]\n" + "\n---\n".join(contexts[:400] for contexts in contexts)
-                    
-                    # 메시지에 컨텍스트 추가
-                    enhanced_content = message_content + rag_context
-                    
-                    # 새 메시지 생성
-                    enhanced_messages = list(messages[:-1]) + [
-                        TextMessage(
-                            content=enhanced_content,
-                            source=last_message.source if hasattr(last_message, 'source') else "user"
-                        )
-                    ]
-                    
-                    # 원본 on_messages 호출
-                    return await super().on_messages(enhanced_messages, cancellation_token)
-                    
-            except Exception as e:
-                print(f"⚠️ RAG 검색 실패: {e}")
+                return await self._respond(enhanced_messages, cancellation_token, turn)
+                
+        except Exception as e:
+            safe_print(f"⚠️ RAG 검색 실패: {e}")
+            turn['evidence'] = 0
         
-        # RAG 실패 시 기본 처리
-        return await super().on_messages(messages, cancellation_token)
+        return await self._respond(messages, cancellation_token, turn)
 
 
 class CustomerAgents:
@@ -192,9 +199,13 @@ class CustomerAgents:
         self.rag_manager = rag_manager
         self.temperature = temperature
         
+        # 모델별 컨텍스트 윈도우에 맞춘 턴 토큰 예산 (모든 에이전트 공유)
+        self.model = "gpt-4"
+        self.prompt_budget = PromptBudget(model=self.model)
+        
         # OpenAI Model Client 생성 (사용자 지정 temperature)
         self.model_client = OpenAIChatCompletionClient(
-            model="gpt-4",
+            model=self.model,
             api_key=os.getenv("OPENAI_API_KEY"),
             temperature=temperature,
         )
@@ -212,6 +223,7 @@ class CustomerAgents:
             transition_type="iphone_to_galaxy",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         # 2. Galaxy 충성 고객
@@ -219,6 +231,7 @@ class CustomerAgents:
             transition_type="galaxy_loyalist",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         # 3. 기술 애호가
@@ -226,6 +239,7 @@ class CustomerAgents:
             transition_type="tech_enthusiast",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         # 4. 가격 민감 고객
@@ -233,6 +247,7 @@ class CustomerAgents:
             transition_type="price_conscious",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         return agents
@@ -5,13 +5,16 @@ Customer Agents V2 - 세분화된 실제 데이터 기반 페르소나
 7개의 상세한 고객 유형
 """
 
-from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from typing import Dict, List, Optional, Sequence
 import os
 
-class CustomerAgent(AssistantAgent):
+from agents.budgeted_agent import BudgetedAssistantAgent
+from rag.prompt_budget import PromptBudget
+from rag.rag_manager import safe_print
+
+class CustomerAgent(BudgetedAssistantAgent):
     """RAG 통합 고객 에이전트 (AutoGen 0.7.x)"""
     
     def __init__(
@@ -19,6 +22,7 @@ class CustomerAgent(AssistantAgent):
         persona_type: str, 
         rag_manager, 
         model_client: OpenAIChatCompletionClient,
+        prompt_budget: Optional[PromptBudget] = None,
         **kwargs
     ):
         """
@@ -28,6 +32,7 @@ class CustomerAgent(AssistantAgent):
             persona_type: 페르소나 유형
             rag_manager: RAG 시스템 매니저
             model_client: OpenAI 모델 클라이언트
+            prompt_budget: 턴 토큰 예산 배분기 (None이면 기본 설정)
         """
         self.persona_type = persona_type
         self.rag_manager = rag_manager
@@ -135,6 +140,7 @@ class CustomerAgent(AssistantAgent):
             name=persona["name"],
             model_client=model_client,
             system_message=system_message,
+            prompt_budget=prompt_budget,
             **kwargs
         )
     
@@ -144,41 +150,47 @@ class CustomerAgent(AssistantAgent):
         cancellation_token
     ):
         """
-        RAG 컨텍스트를 포함한 메시지 처리
+        RAG 컨텍스트를 포함한 메시지 처리 (턴 토큰 예산 안에서만 근거 추가)
         """
-        if messages:
-            last_message = messages[-1]
-            message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        if not messages:
+            return await super().on_messages(messages, cancellation_token)
+        
+        last_message = messages[-1]
+        message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        
+        # 이력은 모델 컨텍스트가 예산에 맞춰 잘라내므로 근거 예산을 먼저 확보
+        turn = self._start_turn(message_content)
+        
+        # RAG에서 관련 컨텍스트 검색
+        try:
+            contexts = await self.rag_manager.aget_context(
+                self.persona_key,
+                message_content,
+                k=3  # Top 3 관련 문서
+            )
             
-            # RAG에서 관련 컨텍스트 검색 (토큰 제한 고려)
-            try:
-                contexts = self.rag_manager.get_context(
-                    self.persona_key,
-                    message_content,
-                    k=3  # Top 3 관련 문서 (토큰 제한 고려)
-                )
+            # 브랜드 성향 지침 추가
+            brand_stance = self.persona.get("brand_stance", "중립")
+            header = f"\n\n[🎯 반드시 기억: 나의 브랜드 성향]\n{brand_stance}\n→ 이 관점에서 아래 의견들을 해석하고 답변하세요.\n\n[실제 사용자 의견 (다양한 사례)]\n"
+            evidence = self.prompt_budget.fit_evidence(turn, contexts, header=header) if contexts else []
+            
+            if evidence:
+                enhanced_content = message_content + header + "\n---\n".join(evidence)
+                
+                enhanced_messages = list(messages[:-1]) + [
+                    TextMessage(
+                        content=enhanced_content,
+                        source=last_message.source if hasattr(last_message, 'source') else "user"
+                    )
+                ]
                 
-                if contexts:
-                    # 브랜드 성향 지침 추가
-                    brand_stance = self.persona.get("brand_stance", "중립")
-                    stance_reminder = f"\n\n[🎯 반드시 기억: 나의 브랜드 성향]\n{brand_stance}\n→ 이 관점에서 아래 의견들을 해석하고 답변하세요.\n"
-                    
-                    rag_context = stance_reminder + "\n[실제 사용자 의견 (다양한 사례)]\n" + "\n---\n".join(contexts[:400] for contexts in contexts)
-                    enhanced_content = message_content + rag_context
-                    
-                    enhanced_messages = list(messages[:-1]) + [
-                        TextMessage(
-                            content=enhanced_content,
-                            source=last_message.source if hasattr(last_message, 'source') else "user"
-                        )
-                    ]
-                    
-                    return await super().on_messages(enhanced_messages, cancellation_token)
-                    
-            except Exception as e:
-                print(f"⚠️ RAG 검색 실패: {e}")
+                return await self._respond(enhanced_messages, cancellation_token, turn)
+                
+        except Exception as e:
+            safe_print(f"⚠️ RAG 검색 실패: {e}")
+            turn['evidence'] = 0
         
-        return await super().on_messages(messages, cancellation_token)
+        return await self._respond(messages, cancellation_token, turn)
 
 
 class CustomerAgentsV2:
@@ -195,9 +207,13 @@ class CustomerAgentsV2:
         self.rag_manager = rag_manager
         self.temperature = temperature
         
+        # 모델별 컨텍스트 윈도우에 맞춘 턴 토큰 예산 (모든 에이전트 공유)
+        self.model = "gpt-4"
+        self.prompt_budget = PromptBudget(model=self.model)
+        
         # OpenAI Model Client (더 높은 temperature로 다양성 극대화)
         self.model_client = OpenAIChatCompletionClient(
-            model="gpt-4",
+            model=self.model,
             api_key=os.getenv("OPENAI_API_KEY"),
             temperature=min(temperature + 0.3, 1.5)  # 기본보다 0.3 높여서 다양성 극대화
         )
@@ -215,24 +231,28 @@ class CustomerAgentsV2:
             persona_type="foldable_enthusiast",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['ecosystem_dilemma'] = CustomerAgent(
             persona_type="ecosystem_dilemma",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['foldable_critical'] = CustomerAgent(
             persona_type="foldable_critical",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['upgrade_cycler'] = CustomerAgent(
             persona_type="upgrade_cycler",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         # iPhone 페르소나 (3개)
@@ -240,18 +260,21 @@ class CustomerAgentsV2:
             persona_type="value_seeker",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['apple_ecosystem_loyal'] = CustomerAgent(
             persona_type="apple_ecosystem_loyal",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['design_fatigue'] = CustomerAgent(
             persona_type="design_fatigue",
             rag_manager=self.rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         return agents
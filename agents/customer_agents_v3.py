@@ -5,13 +5,16 @@ Customer Agents V3 - 실제 리뷰 데이터 기반 페르소나
 실제 사용자 리뷰를 RAG로 사용하여 더 진정성 있는 토론 구현
 """
 
-from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from typing import Dict, List, Optional, Sequence
 import os
 
-class RealReviewCustomerAgent(AssistantAgent):
+from agents.budgeted_agent import BudgetedAssistantAgent
+from rag.prompt_budget import PromptBudget
+from rag.real_review_rag_manager import safe_print
+
+class RealReviewCustomerAgent(BudgetedAssistantAgent):
     """실제 리뷰 데이터 기반 고객 에이전트"""
     
     def __init__(
@@ -19,6 +22,7 @@ class RealReviewCustomerAgent(AssistantAgent):
         persona_type: str, 
         real_review_rag_manager, 
         model_client: OpenAIChatCompletionClient,
+        prompt_budget: Optional[PromptBudget] = None,
         **kwargs
     ):
         """
@@ -28,6 +32,7 @@ class RealReviewCustomerAgent(AssistantAgent):
             persona_type: 페르소나 유형
             real_review_rag_manager: 실제 리뷰 RAG 시스템 매니저
             model_client: OpenAI 모델 클라이언트
+            prompt_budget: 턴 토큰 예산 배분기 (None이면 기본 설정)
         """
         self.persona_type = persona_type
         self.real_review_rag_manager = real_review_rag_manager
@@ -118,6 +123,7 @@ class RealReviewCustomerAgent(AssistantAgent):
             name=self.persona['name'],
             model_client=model_client,
             system_message=system_prompt,
+            prompt_budget=prompt_budget,
             **kwargs
         )
     
@@ -127,41 +133,47 @@ class RealReviewCustomerAgent(AssistantAgent):
         cancellation_token
     ):
         """
-        실제 리뷰 데이터를 포함한 메시지 처리
+        실제 리뷰 데이터를 포함한 메시지 처리 (턴 토큰 예산 안에서만 근거 추가)
         """
-        if messages:
-            last_message = messages[-1]
-            message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        if not messages:
+            return await super().on_messages(messages, cancellation_token)
+        
+        last_message = messages[-1]
+        message_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        
+        # 이력은 모델 컨텍스트가 예산에 맞춰 잘라내므로 근거 예산을 먼저 확보
+        turn = self._start_turn(message_content)
+        
+        # 실제 리뷰에서 관련 컨텍스트 검색
+        try:
+            contexts = await self.real_review_rag_manager.aget_context(
+                self.persona_type,
+                message_content,
+                k=3  # Top 3 관련 리뷰
+            )
             
-            # 실제 리뷰에서 관련 컨텍스트 검색
-            try:
-                contexts = self.real_review_rag_manager.get_context(
-                    self.persona_type,
-                    message_content,
-                    k=3  # Top 3 관련 리뷰
-                )
+            # 브랜드 성향 지침 추가
+            brand_stance = self.persona.get("brand_stance", "중립")
+            header = f"\n\n[🎯 나의 브랜드 성향]\n{brand_stance}\n→ 이 관점에서 아래 실제 사용자 의견들을 참고하여 답변하세요.\n\n[실제 사용자 리뷰 참고자료]\n"
+            evidence = self.prompt_budget.fit_evidence(turn, contexts, header=header) if contexts else []
+            
+            if evidence:
+                enhanced_content = message_content + header + "\n---\n".join(evidence)
+                
+                enhanced_messages = list(messages[:-1]) + [
+                    TextMessage(
+                        content=enhanced_content,
+                        source=last_message.source if hasattr(last_message, 'source') else "user"
+                    )
+                ]
                 
-                if contexts:
-                    # 브랜드 성향 지침 추가
-                    brand_stance = self.persona.get("brand_stance", "중립")
-                    stance_reminder = f"\n\n[🎯 나의 브랜드 성향]\n{brand_stance}\n→ 이 관점에서 아래 실제 사용자 의견들을 참고하여 답변하세요.\n"
-                    
-                    rag_context = stance_reminder + "\n[실제 사용자 리뷰 참고자료]\n" + "\n---\n".join(contexts)
-                    enhanced_content = message_content + rag_context
-                    
-                    enhanced_messages = list(messages[:-1]) + [
-                        TextMessage(
-                            content=enhanced_content,
-                            source=last_message.source if hasattr(last_message, 'source') else "user"
-                        )
-                    ]
-                    
-                    return await super().on_messages(enhanced_messages, cancellation_token)
-                    
-            except Exception as e:
-                print(f"⚠️ Real review search failed: {e}")
+                return await self._respond(enhanced_messages, cancellation_token, turn)
+                
+        except Exception as e:
+            safe_print(f"⚠️ Real review search failed: {e}")
+            turn['evidence'] = 0
         
-        return await super().on_messages(messages, cancellation_token)
+        return await self._respond(messages, cancellation_token, turn)
 
 
 class RealReviewCustomerAgentsV3:
@@ -177,9 +189,13 @@ class RealReviewCustomerAgentsV3:
         """
         self.real_review_rag_manager = real_review_rag_manager
         
+        # 모델별 컨텍스트 윈도우에 맞춘 턴 토큰 예산 (모든 에이전트 공유)
+        self.model = "gpt-4"
+        self.prompt_budget = PromptBudget(model=self.model)
+        
         # OpenAI 모델 클라이언트 설정
         self.model_client = OpenAIChatCompletionClient(
-            model="gpt-4",
+            model=self.model,
             api_key=os.getenv("OPENAI_API_KEY"),
             temperature=temperature
         )
@@ -197,24 +213,28 @@ class RealReviewCustomerAgentsV3:
             persona_type="foldable_enthusiast",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['ecosystem_dilemma'] = RealReviewCustomerAgent(
             persona_type="ecosystem_dilemma",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['foldable_critical'] = RealReviewCustomerAgent(
             persona_type="foldable_critical",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['upgrade_cycler'] = RealReviewCustomerAgent(
             persona_type="upgrade_cycler",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         # iPhone 페르소나 (3개)
@@ -222,18 +242,21 @@ class RealReviewCustomerAgentsV3:
             persona_type="value_seeker",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['apple_ecosystem_loyal'] = RealReviewCustomerAgent(
             persona_type="apple_ecosystem_loyal",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         agents['design_fatigue'] = RealReviewCustomerAgent(
             persona_type="design_fatigue",
             real_review_rag_manager=self.real_review_rag_manager,
             model_client=self.model_client,
+            prompt_budget=self.prompt_budget,
         )
         
         return agents
@@ -9,10 +9,123 @@
 - Rating 점수화
 """
 
+import argparse
+import functools
+import hashlib
+import itertools
 import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from collections import defaultdict, Counter
+from pathlib import Path
+
+# 저장소 루트의 공용 스트리밍 유틸 사용 (analysis 디렉토리에서 직접 실행되는 경우 대비)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from rag.streaming import (
+    DEFAULT_SHARD_SIZE, STRUCTURED_PLATFORMS, JsonlShardWriter, batched,
+    ijson_available, iter_json_arrays, ordered_map, write_shard_metadata
+)
+
+# 플랫폼 표시 이름
+PLATFORM_LABELS = {'iphone': 'iPhone', 'galaxy': 'Galaxy'}
+
+# 프로세스 풀에 한 번에 넘기는 댓글 수 / 이보다 적으면 풀 없이 현재 프로세스에서 처리
+BATCH_SIZE = 2000
+
+# "X에서 Y로" 전환 패턴
+TRANSITION_PATTERNS = [
+    r'(\w+)\s*에서\s*(\w+)\s*(?:로|으로)',
+    r'from\s+(\w+.*?)\s+to\s+(\w+)',
+    r'(\w+)\s*쓰다가\s*(\w+)',
+]
+
+
+def stable_review_id(comment):
+    """
+    입력 순서와 무관한 리뷰 ID (증분 색인에서 같은 댓글을 같은 리뷰로 인식하기 위함)
+    
+    댓글 자체 ID가 있으면 그대로 쓰고, 없으면 작성자/작성 시각/본문 해시로 만든다.
+    """
+    comment_id = comment.get('comment_id') or comment.get('id')
+    if comment_id:
+        return str(comment_id)
+    payload = '\x1f'.join(str(comment.get(key, '')) for key in ('author', 'published_at', 'text'))
+    return 'c_' + hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class FirstMatchTable:
+    """
+    (정규식 → 값) 규칙표를 이름 있는 그룹의 단일 교대 패턴으로 컴파일
+    
+    규칙을 위에서부터 하나씩 re.search 하던 것과 같은 결과(텍스트 어디서든 일치하는 규칙 중
+    가장 먼저 정의된 규칙)를 찾는다. 위치마다 전방 탐색으로 교대 패턴을 시도하면 그 위치에서
+    일치하는 규칙 중 가장 앞선 규칙이 보고되므로, 보고된 규칙 번호의 최솟값이 답이다.
+    """
+    
+    def __init__(self, rules, flags=0):
+        self.values = list(rules.values())
+        alternatives = '|'.join(f'(?P<r{index}>{pattern})' for index, pattern in enumerate(rules))
+        self.pattern = re.compile(f'(?=(?:{alternatives}))', flags)
+    
+    def first(self, text):
+        """가장 먼저 정의된 일치 규칙의 값 (없으면 None)"""
+        best = None
+        for match in self.pattern.finditer(text):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return None if best is None else self.values[best]
+
+
+class KeywordSetTable:
+    """카테고리별 키워드 정규식 목록을 카테고리당 하나의 교대 패턴으로 컴파일"""
+    
+    def __init__(self, keyword_map, flags=0):
+        alternatives = {
+            category: '|'.join(f'(?:{keyword})' for keyword in keywords)
+            for category, keywords in keyword_map.items() if keywords
+        }
+        self.patterns = [(category, re.compile(pattern, flags)) for category, pattern in alternatives.items()]
+        # 전체 키워드 중 하나도 일치하지 않으면 카테고리별 검색 생략
+        self.any_pattern = re.compile('|'.join(f'(?:{pattern})' for pattern in alternatives.values()) or '(?!)', flags)
+    
+    def matches(self, text):
+        """키워드가 하나라도 일치하는 카테고리 (정의 순서, 중복 없음)"""
+        if not self.any_pattern.search(text):
+            return []
+        found = []
+        for category, pattern in self.patterns:
+            if category not in found and pattern.search(text):
+                found.append(category)
+        return found
+
+
+# 워커 프로세스별 변환기 (배치마다 규칙을 다시 컴파일하지 않도록)
+_worker_converter = None
+
+
+def _init_worker(rules):
+    global _worker_converter
+    _worker_converter = StructuredReviewConverter()
+    _worker_converter.set_rules(**rules)
+
+
+def _convert_batch(batch):
+    return _convert_with(_worker_converter, batch)
+
+
+def _convert_with(converter, batch):
+    start_idx, comments = batch
+    return [converter.convert_comment(comment, idx) for idx, comment in enumerate(comments, start_idx)]
+
 
 class StructuredReviewConverter:
     def __init__(self):
@@ -90,16 +203,37 @@ class StructuredReviewConverter:
             '데이터이전': ['이전', '옮기기', '백업'],
             '가격': ['가격', '비용', '할인'],
         }
+        
+        self.compile_rules()
+        self.last_throughput = None
+
+    def rules(self):
+        """규칙표 (워커 프로세스에 전달)"""
+        return {
+            'device_normalization': self.device_normalization,
+            'pain_keywords': self.pain_keywords,
+            'satisfaction_keywords': self.satisfaction_keywords,
+            'categories': self.categories,
+        }
+
+    def set_rules(self, **rules):
+        """규칙표 교체 후 다시 컴파일"""
+        for name, table in rules.items():
+            setattr(self, name, table)
+        self.compile_rules()
+
+    def compile_rules(self):
+        """규칙표를 한 번만 컴파일 (규칙을 직접 수정했다면 다시 호출)"""
+        # normalize_device_name은 IGNORECASE, 단일 모델명 추출은 플래그 없이 검색하던 동작 유지
+        self._device_table = FirstMatchTable(self.device_normalization, re.IGNORECASE)
+        self._device_table_exact = FirstMatchTable(self.device_normalization)
+        self._transition_patterns = [re.compile(pattern) for pattern in TRANSITION_PATTERNS]
+        self._pain_table = KeywordSetTable(self.pain_keywords, re.IGNORECASE)
+        self._satisfaction_table = KeywordSetTable(self.satisfaction_keywords, re.IGNORECASE)
 
     def normalize_device_name(self, text):
         """기기 이름 정규화"""
-        text_lower = text.lower()
-        
-        for pattern, normalized in self.device_normalization.items():
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return normalized
-        
-        return None
+        return self._device_table.first(text.lower())
 
     def extract_device_models(self, text, conversion_direction):
         """전/후 기기 모델 추출"""
@@ -124,14 +258,8 @@ class StructuredReviewConverter:
         text_lower = text.lower()
         
         # "X에서 Y로" 패턴
-        transition_patterns = [
-            r'(\w+)\s*에서\s*(\w+)\s*(?:로|으로)',
-            r'from\s+(\w+.*?)\s+to\s+(\w+)',
-            r'(\w+)\s*쓰다가\s*(\w+)',
-        ]
-        
-        for pattern in transition_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in self._transition_patterns:
+            match = pattern.search(text_lower)
             if match:
                 prev_candidate = self.normalize_device_name(match.group(1))
                 new_candidate = self.normalize_device_name(match.group(2))
@@ -140,16 +268,15 @@ class StructuredReviewConverter:
                 if new_candidate:
                     new_device = new_candidate
         
-        # 단일 모델명 추출 (새 기기)
-        for pattern, normalized in self.device_normalization.items():
-            if re.search(pattern, text_lower):
-                if conversion_direction in ['iPhone_to_iPhone', 'Galaxy_to_iPhone']:
-                    if 'iPhone' in normalized:
-                        new_device = normalized
-                elif conversion_direction in ['Galaxy_to_Galaxy', 'iPhone_to_Galaxy']:
-                    if 'Galaxy' in normalized:
-                        new_device = normalized
-                break
+        # 단일 모델명 추출 (새 기기, 가장 먼저 정의된 일치 규칙만 사용)
+        normalized = self._device_table_exact.first(text_lower)
+        if normalized is not None:
+            if conversion_direction in ['iPhone_to_iPhone', 'Galaxy_to_iPhone']:
+                if 'iPhone' in normalized:
+                    new_device = normalized
+            elif conversion_direction in ['Galaxy_to_Galaxy', 'iPhone_to_Galaxy']:
+                if 'Galaxy' in normalized:
+                    new_device = normalized
         
         return prev_device, new_device
 
@@ -158,34 +285,14 @@ class StructuredReviewConverter:
         if sentiment == 'positive':
             return []
         
-        text_lower = text.lower()
-        pain_points = []
-        
-        for category, keywords in self.pain_keywords.items():
-            for keyword in keywords:
-                if re.search(keyword, text_lower, re.IGNORECASE):
-                    if category not in pain_points:
-                        pain_points.append(category)
-                    break
-        
-        return pain_points
+        return self._pain_table.matches(text.lower())
 
     def extract_satisfaction(self, text, sentiment):
         """Satisfaction 추출"""
         if sentiment == 'negative':
             return []
         
-        text_lower = text.lower()
-        satisfactions = []
-        
-        for category, keywords in self.satisfaction_keywords.items():
-            for keyword in keywords:
-                if re.search(keyword, text_lower, re.IGNORECASE):
-                    if category not in satisfactions:
-                        satisfactions.append(category)
-                    break
-        
-        return satisfactions
+        return self._satisfaction_table.matches(text.lower())
 
     def classify_category(self, text):
         """카테고리 분류"""
@@ -246,6 +353,7 @@ class StructuredReviewConverter:
         
         structured_review = {
             'id': f"review_{idx:06d}",
+            'review_id': stable_review_id(comment),
             'date': date,
             'rating': rating,
             'prev_device': prev_device,
@@ -266,23 +374,157 @@ class StructuredReviewConverter:
         
         return structured_review
 
-    def convert_dataset(self, comments):
-        """전체 데이터셋 변환"""
-        structured_reviews = []
-        
-        for idx, comment in enumerate(comments, 1):
-            structured = self.convert_comment(comment, idx)
-            structured_reviews.append(structured)
+    def convert_stream(self, comments, start_idx=1, max_workers=None, batch_size=BATCH_SIZE):
+        """
+        댓글 이터러블을 배치 단위로 변환해 구조화 리뷰를 입력 순서대로 하나씩 반환
+        
+        입력을 미리 다 읽지 않고 프로세스 풀에 최대 (프로세스 수 x 2)개 배치만 제출하므로
+        메모리 사용량이 코퍼스 크기와 무관하고, 다음 단계가 첫 배치부터 바로 처리할 수 있다.
+        프로세스 풀을 만들 수 없거나 도중에 깨지면 아직 결과를 받지 못한 배치부터 현재 프로세스에서
+        이어서 변환한다 (입력을 다시 읽지 않으므로 제너레이터 입력에서도 결과가 빠지거나 중복되지 않음).
+        끝까지 소비하면 처리량(다음 단계 처리 시간 포함)을 self.last_throughput에 기록한다.
+        
+        Args:
+            comments: 댓글 이터러블 (리스트 또는 제너레이터)
+            start_idx: 첫 댓글의 리뷰 ID 번호
+            max_workers: 최대 프로세스 수 (None이면 CPU 수)
+            batch_size: 프로세스에 넘기는 댓글 수
+        """
+        started = time.perf_counter()
+        workers = max_workers or os.cpu_count() or 1
+        counts = {'comments': 0, 'batches': 0}
+        
+        def numbered():
+            idx = start_idx
+            for batch in batched(comments, batch_size):
+                counts['comments'] += len(batch)
+                counts['batches'] += 1
+                yield idx, batch
+                idx += len(batch)
+        
+        batches = numbered()
+        # 배치가 하나뿐이면 프로세스 생성 비용이 더 크므로 현재 프로세스에서 처리
+        head = list(itertools.islice(batches, 2))
+        batches = itertools.chain(head, batches)
+        if workers <= 1 or len(head) < 2:
+            workers = 1
+            for batch in batches:
+                yield from _convert_with(self, batch)
+        else:
+            def convert_here(batch):
+                # 풀을 쓸 수 없게 되면 남은 배치는 현재 프로세스에서 변환
+                counts['fallback'] = True
+                return _convert_with(self, batch)
+            
+            make_executor = functools.partial(
+                ProcessPoolExecutor, max_workers=workers, initializer=_init_worker, initargs=(self.rules(),)
+            )
+            for converted in ordered_map(make_executor, _convert_batch, batches, workers * 2, fallback=convert_here):
+                yield from converted
+            if counts.get('fallback'):
+                workers = 1
+        
+        elapsed = time.perf_counter() - started
+        self.last_throughput = {
+            'comments': counts['comments'],
+            'seconds': round(elapsed, 3),
+            'comments_per_second': round(counts['comments'] / elapsed, 1) if elapsed > 0 else None,
+            'workers': workers,
+            'batches': counts['batches']
+        }
+
+    def convert_dataset(self, comments, max_workers=None, batch_size=BATCH_SIZE):
+        """
+        전체 데이터셋 변환 (댓글 배치를 프로세스 풀에서 처리, 입력 순서와 ID 유지)
         
-        return structured_reviews
+        처리량은 self.last_throughput에 기록
+        """
+        return list(self.convert_stream(comments, max_workers=max_workers, batch_size=batch_size))
+
+    def format_throughput(self):
+        """마지막 convert_dataset 처리량 한 줄 요약"""
+        report = self.last_throughput
+        if not report:
+            return ""
+        return (f"⚡ 처리량: {report['comments']:,}개 / {report['seconds']:.2f}초 "
+                f"({report['comments_per_second'] or 0:,.0f}개/초, 프로세스 {report['workers']}개)")
+
+def _tally(reviews, ratings, categories):
+    """스트림을 그대로 넘기면서 Rating / 카테고리 분포 집계"""
+    for review in reviews:
+        ratings[review['rating']] += 1
+        categories[review['category']] += 1
+        yield review
+
+
+def _print_distribution(label, ratings, categories):
+    total = sum(ratings.values())
+    if not total:
+        return
+    print(f"\n📱 {label} Rating 분포:")
+    for rating in sorted(ratings.keys(), reverse=True):
+        print(f"   {rating}점: {ratings[rating]}개 ({ratings[rating] / total * 100:.1f}%)")
+    print(f"\n📱 {label} 카테고리 분포:")
+    for category, count in categories.most_common(5):
+        print(f"   {category}: {count}개 ({count / total * 100:.1f}%)")
+
+
+def main_stream(input_file, output_dir=None, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    스트리밍 변환: 댓글을 항목 단위로 읽어 변환하고 플랫폼별 JSONL 샤드로 저장
+    
+    출력 디렉토리(data/structured_reviews_<시각>/)는 '<platform>_reviews-NNNNN.jsonl' 샤드와
+    마지막에 쓰는 metadata.json으로 구성되며, 다운스트림 로더는 metadata.json이 있는 디렉토리만 읽는다.
+    """
+    print("🚀 구조화된 리뷰 스트리밍 변환 시작...")
+    if not ijson_available() and not str(input_file).endswith('.jsonl'):
+        print("   (ijson 미설치: 입력 JSON 전체를 읽은 뒤 항목 단위로 처리합니다)")
+    
+    output_dir = Path(output_dir or f"data/structured_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    converter = StructuredReviewConverter()
+    counts = {}
+    
+    # ijson이 없으면 입력 JSON은 한 번만 파싱해 두 플랫폼에 사용
+    platform_comments = iter_json_arrays(
+        input_file, {platform: f"{platform}.conversion_comments" for platform in STRUCTURED_PLATFORMS}
+    )
+    for platform, comments in platform_comments:
+        print(f"📱 {PLATFORM_LABELS[platform]} 댓글 변환 중...")
+        ratings, categories = Counter(), Counter()
+        with JsonlShardWriter(output_dir, f"{platform}_reviews", shard_size) as writer:
+            writer.write_all(_tally(converter.convert_stream(comments), ratings, categories))
+        counts[platform] = writer.count
+        print(f"   변환 완료: {writer.count}개 ({len(writer.shards)}개 샤드)")
+        print(f"   {converter.format_throughput()}")
+        _print_distribution(PLATFORM_LABELS[platform], ratings, categories)
+    
+    write_shard_metadata(output_dir, {
+        'conversion_method': 'automated_structure_extraction',
+        'source': Path(input_file).name,
+        'total_reviews': sum(counts.values()),
+        **{f'{platform}_reviews': count for platform, count in counts.items()}
+    })
+    print(f"\n💾 저장 완료: {output_dir}")
+
 
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="댓글 데이터를 구조화된 리뷰 형식으로 변환")
+    parser.add_argument("--input", default="data/precise_conversion_scores_20251020_220539.json")
+    parser.add_argument("--stream", action="store_true", help="항목 단위로 읽고 JSONL 샤드 디렉토리로 저장")
+    parser.add_argument("--output-dir", default=None, help="스트리밍 모드 출력 디렉토리")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    args = parser.parse_args()
+    
+    if args.stream:
+        main_stream(args.input, args.output_dir, args.shard_size)
+        return
+    
     print("🚀 구조화된 리뷰 형식으로 변환 시작...")
     
     # 데이터 로드
     print("📂 데이터 로드 중...")
-    with open("data/precise_conversion_scores_20251020_220539.json", 'r', encoding='utf-8') as f:
+    with open(args.input, 'r', encoding='utf-8') as f:
         conversion_data = json.load(f)
     
     converter = StructuredReviewConverter()
@@ -292,12 +534,14 @@ def main():
     iphone_comments = conversion_data['iphone']['conversion_comments']
     iphone_reviews = converter.convert_dataset(iphone_comments)
     print(f"   변환 완료: {len(iphone_reviews)}개")
+    print(f"   {converter.format_throughput()}")
     
     # Galaxy 데이터 변환
     print("📱 Galaxy 댓글 변환 중...")
     galaxy_comments = conversion_data['galaxy']['conversion_comments']
     galaxy_reviews = converter.convert_dataset(galaxy_comments)
     print(f"   변환 완료: {len(galaxy_reviews)}개")
+    print(f"   {converter.format_throughput()}")
     
     # 결과 저장
     output = {
@@ -260,13 +260,13 @@ def init_system(api_key, temperature):
         # API 키 설정
         os.environ["OPENAI_API_KEY"] = api_key
         
-        # 기존 RAG 초기화 (하위 호환성)
+        # 기존 RAG 초기화 (하위 호환성) - 페르소나 인덱스는 백그라운드에서 로드
         rag_manager = RAGManager()
-        rag_manager.load_all_personas()
+        rag_manager.start_background_loading()
         
-        # 실제 리뷰 데이터 RAG 초기화
+        # 실제 리뷰 데이터 RAG 초기화 (백그라운드 로드)
         real_review_rag_manager = RealReviewRAGManager()
-        real_review_rag_manager.load_all_personas_real_reviews()
+        real_review_rag_manager.start_background_loading()
         
         # 에이전트 초기화 (temperature 적용)
         customer_agents = CustomerAgentsV2(rag_manager, temperature=temperature)
@@ -294,14 +294,117 @@ def init_system(api_key, temperature):
         
         initialized = True
         logger.info(f"System initialized | Temperature: {temperature}")
-        logger.info(f"RAG loaded: 14 personas, 98 chunks")
-        logger.info(f"Real Review RAG loaded: {len(real_review_rag_manager.retrievers)} personas")
-        return f"✅ 시스템 초기화 완료! (Temperature: {temperature} - {'높은 다양성' if temperature >= 0.8 else '중간 다양성' if temperature >= 0.5 else '낮은 다양성'}) | 실제 리뷰 데이터 사용"
+        logger.info(f"RAG warm-up started: {len(rag_manager.personas)} personas")
+        logger.info(f"Real Review RAG warm-up started: {len(real_review_rag_manager.persona_mapping)} personas")
+        return f"✅ 시스템 초기화 완료! (Temperature: {temperature} - {'높은 다양성' if temperature >= 0.8 else '중간 다양성' if temperature >= 0.5 else '낮은 다양성'}) | 실제 리뷰 데이터 사용 | 페르소나 인덱스 백그라운드 로딩 중"
     
     except Exception as e:
         logger.error(f"System initialization failed: {str(e)}")
         return f"❌ 초기화 실패: {e}"
 
+# 인덱스 준비 대기 시간 제한 (초)
+INDEX_WAIT_TIMEOUT = 300
+
+# 에이전트 이름 → 페르소나 ID (토론 이벤트 / 심층토론 참가자 선택 값)
+AGENT_PERSONA_IDS = {
+    'Foldable_Enthusiast': 'foldable_enthusiast',
+    'Ecosystem_Dilemma': 'ecosystem_dilemma',
+    'Foldable_Critic': 'foldable_critical',
+    'Upgrade_Cycler': 'upgrade_cycler',
+    'Value_Seeker': 'value_seeker',
+    'Apple_Ecosystem_Loyal': 'apple_ecosystem_loyal',
+    'Design_Fatigue': 'design_fatigue',
+    'Marketer': 'marketer',
+    'Developer': 'developer',
+    'Designer': 'designer'
+}
+
+# 심층토론 기본 참가자 (선택이 없을 때 DeepDebateSystem이 사용)
+DEEP_DEBATE_DEFAULT_AGENTS = ["Marketer", "Designer", "Developer"]
+
+def get_required_indexes(selected_personas):
+    """선택된 페르소나가 사용하는 인덱스 → (RAGManager 페르소나, 실제 리뷰 페르소나)"""
+    rag_names, real_review_names = [], []
+    for persona_id in selected_personas:
+        if persona_id in ['marketer', 'developer', 'designer']:
+            rag_names.append(f"employee_{persona_id}")
+        else:
+            rag_names.append(f"customer_{persona_id}")
+            real_review_names.append(persona_id)
+    return rag_names, real_review_names
+
+def wait_for_persona_indexes(selected_personas):
+    """선택된 페르소나의 인덱스만 준비될 때까지 대기 → 준비되지 못한 인덱스 목록"""
+    rag_names, real_review_names = get_required_indexes(selected_personas)
+    not_ready = []
+    for manager, names in ((rag_manager, rag_names), (real_review_rag_manager, real_review_names)):
+        if manager is None:
+            continue
+        states = manager.wait_for_personas(names, timeout=INDEX_WAIT_TIMEOUT)
+        not_ready.extend(name for name, state in states.items() if state != 'ready')
+    return not_ready
+
+def get_pending_indexes(selected_personas):
+    """선택된 페르소나 중 아직 로드 중인 인덱스 목록"""
+    rag_names, real_review_names = get_required_indexes(selected_personas)
+    pending = []
+    for manager, names in ((rag_manager, rag_names), (real_review_rag_manager, real_review_names)):
+        if manager is not None and manager.loader is not None:
+            pending.extend(manager.loader.pending(names))
+    return pending
+
+def get_index_readiness():
+    """페르소나 인덱스 준비 상태 (UI 표시용)"""
+    if rag_manager is None or rag_manager.loader is None:
+        return "⏸️ 초기화 전"
+    
+    state_icons = {'pending': '⏳', 'loading': '🔄', 'ready': '✅', 'failed': '❌'}
+    lines = []
+    for label, manager in (("RAG", rag_manager), ("실제 리뷰", real_review_rag_manager)):
+        if manager is None or manager.loader is None:
+            continue
+        summary = manager.loader.summary()
+        lines.append(f"**{label}:** 준비 {summary['ready']}/{len(manager.loader.persona_names)}"
+                     + (f" (실패 {summary['failed']})" if summary['failed'] else ""))
+        
+        # 실제 리뷰 페르소나는 UI 페르소나 이름으로 표시
+        if manager is real_review_rag_manager:
+            for name, info in manager.loader.status().items():
+                short_name = PERSONAS.get(name, {}).get('short_name', name)
+                seconds = f" {info['seconds']}초" if info['seconds'] is not None else ""
+                lines.append(f"- {state_icons[info['state']]} {short_name}{seconds}")
+    return "\n".join(lines)
+
+def get_persona_size(pid):
+    """페르소나 규모 (색인된 리뷰 통계가 있으면 실제 수치, 없으면 기본값)"""
+    if real_review_rag_manager is not None:
+        stats = real_review_rag_manager.get_persona_stats(pid)
+        if stats:
+            return f"{stats['total_reviews']:,}명"
+    return PERSONAS[pid]['size']
+
+def get_data_statistics():
+    """데이터 통계 패널 (초기화 후에는 색인 시 집계된 실제 리뷰 통계 사용)"""
+    all_stats = real_review_rag_manager.get_all_persona_stats() if real_review_rag_manager is not None else {}
+    if not all_stats:
+        return """
+- **총 댓글:** 40,377개
+- **전환 의도:** 2,621개
+- **전환 완료:** 52.2%
+- **페르소나:** 10개
+"""
+    
+    total_reviews = sum(stats['total_reviews'] for stats in all_stats.values())
+    lines = [f"- **분류된 리뷰:** {total_reviews:,}개 (페르소나 중복 포함)"]
+    for pid, stats in all_stats.items():
+        name = PERSONAS.get(pid, {}).get('short_name', pid)
+        sentiments = stats.get('sentiment_distribution', {})
+        lines.append(
+            f"- **{name}:** {stats['total_reviews']:,}명 | 평균 좋아요 {stats['engagement']['mean']} | "
+            f"긍정 {sentiments.get('positive', 0)} · 중립 {sentiments.get('neutral', 0)} · 부정 {sentiments.get('negative', 0)}"
+        )
+    return "\n".join(lines)
+
 def get_persona_cards():
     """페르소나 카드 HTML 생성"""
     cards = []
@@ -315,7 +418,7 @@ def get_persona_cards():
                         border-radius: 10px; border-left: 4px solid {info['color']};'>
                 <div style='font-size: 1.5rem;'>{info['icon']}</div>
                 <div style='font-weight: bold; color: #1565c0;'>{info['name']}</div>
-                <div style='font-size: 0.9rem; color: #666;'>👥 {info['size']}</div>
+                <div style='font-size: 0.9rem; color: #666;'>👥 {get_persona_size(pid)}</div>
             </div>
             """)
     
@@ -328,7 +431,7 @@ def get_persona_cards():
                         border-radius: 10px; border-left: 4px solid {info['color']};'>
                 <div style='font-size: 1.5rem;'>{info['icon']}</div>
                 <div style='font-weight: bold; color: #ad1457;'>{info['name']}</div>
-                <div style='font-size: 0.9rem; color: #666;'>👥 {info['size']}</div>
+                <div style='font-size: 0.9rem; color: #666;'>👥 {get_persona_size(pid)}</div>
             </div>
             """)
     
@@ -404,6 +507,14 @@ def run_debate_simple(topic_mode, topic_dropdown, custom_topic, selected_persona
         full_topic = f"{topic_info['title']}\n\n{topic_info['desc']}" if topic_info.get('desc') else topic_info['title']
         topic_display = topic_info['title']
     
+    # 선택된 페르소나의 인덱스만 기다림 (나머지는 백그라운드에서 계속 로드)
+    pending_indexes = get_pending_indexes(selected_personas)
+    if pending_indexes:
+        yield [("System", f"⏳ 참가자 인덱스 준비 중... ({len(pending_indexes)}개)")], "⏳ 인덱스 로딩", None, 0, "인덱스 로딩 중"
+    not_ready = wait_for_persona_indexes(selected_personas)
+    if not_ready:
+        logger.warning(f"⚠️ Persona indexes not ready: {', '.join(not_ready)}")
+    
     # 참가자 에이전트 가져오기
     participants = []
     for persona_id in selected_personas:
@@ -428,18 +539,7 @@ def run_debate_simple(topic_mode, topic_dropdown, custom_topic, selected_persona
         speakers = set()
         
         # 페르소나 매핑
-        persona_mapping = {
-            'Foldable_Enthusiast': 'foldable_enthusiast',
-            'Ecosystem_Dilemma': 'ecosystem_dilemma',
-            'Foldable_Critic': 'foldable_critical',
-            'Upgrade_Cycler': 'upgrade_cycler',
-            'Value_Seeker': 'value_seeker',
-            'Apple_Ecosystem_Loyal': 'apple_ecosystem_loyal',
-            'Design_Fatigue': 'design_fatigue',
-            'Marketer': 'marketer',
-            'Developer': 'developer',
-            'Designer': 'designer'
-        }
+        persona_mapping = AGENT_PERSONA_IDS
         
         # 비동기 제너레이터를 동기적으로 소비
         async def consume_debate_stream():
@@ -1307,6 +1407,18 @@ async def run_deep_debate_streaming(topic_key, selected_agents):
     current_phase = 0
     current_round = 0
     
+    # 참가자 에이전트가 검색하는 인덱스만 기다림 (준비 전이면 리뷰 근거 없이 토론하게 됨)
+    selected_personas = [
+        AGENT_PERSONA_IDS.get(agent, agent.lower()) for agent in (selected_agents or DEEP_DEBATE_DEFAULT_AGENTS)
+    ]
+    pending_indexes = get_pending_indexes(selected_personas)
+    if pending_indexes:
+        yield [("System", f"⏳ 참가자 인덱스 준비 중... ({len(pending_indexes)}개)")], "⏳ 인덱스 로딩", None, 0, "인덱스 로딩 중"
+    # 대기하는 동안 이벤트 루프를 막지 않도록 스레드에서 기다림
+    not_ready = await asyncio.to_thread(wait_for_persona_indexes, selected_personas)
+    if not_ready:
+        logger.warning(f"⚠️ Persona indexes not ready: {', '.join(not_ready)}")
+    
     try:
         # 심층토론 시작
         yield chat_history, "🎬 심층토론 시작!", None, 0, "심층토론 시작"
@@ -1577,13 +1689,17 @@ with gr.Blocks(
                         info="I=iPhone, G=Galaxy | I→G=전환완료, I→G?=고려중"
                     )
                     
+                    gr.Markdown("### 🗂️ 인덱스 준비 상태")
+                    gr.Markdown(
+                        value=get_index_readiness,
+                        every=3  # 백그라운드 로딩 진행 상황 갱신
+                    )
+                    
                     gr.Markdown("### 📊 데이터 통계")
-                    gr.Markdown("""
-                    - **총 댓글:** 40,377개
-                    - **전환 의도:** 2,621개
-                    - **전환 완료:** 52.2%
-                    - **페르소나:** 10개
-                    """)
+                    gr.Markdown(
+                        value=get_data_statistics,
+                        every=30  # 초기화 후 실제 통계로 갱신
+                    )
                 
                 # 중앙: 토론 채팅
                 with gr.Column(scale=3):
@@ -1696,7 +1812,7 @@ with gr.Blocks(
             # 모니터링 정보 표시
             def get_monitoring_info():
                 stats = get_usage_stats()
-                return f"""
+                info = f"""
 **API 사용량:**
 - 총 호출: {stats['total_calls']}회
 - 활성 세션: {stats['active_sessions']}개
@@ -1706,6 +1822,22 @@ with gr.Blocks(
 - 타임아웃: {SESSION_TIMEOUT}분
 - 자동 정리: 활성화
 """
+                # 검색 캐시 통계 (캐시 크기 조정용)
+                for label, manager in (("RAG", rag_manager), ("실제 리뷰 RAG", real_review_rag_manager)):
+                    if manager is None:
+                        continue
+                    cache_stats = manager.get_cache_stats()
+                    query_stats = cache_stats['query_embeddings']
+                    result_stats = cache_stats['results']
+                    info += f"""
+**{label} 검색 캐시:**
+- 질의 임베딩: 적중률 {query_stats['hit_rate']:.0%} ({query_stats['entries']}/{query_stats['max_entries']}), 절약 {query_stats['saved_seconds']:.1f}초
+- 검색 결과: 적중률 {result_stats['hit_rate']:.0%} ({result_stats['entries']}/{result_stats['max_entries']}), 절약 {result_stats['saved_seconds']:.1f}초
+- 검색 방식 ({manager.retrieval_mode}): {', '.join(f"{mode} {count}회" for mode, count in cache_stats['retrieval_modes'].items()) or '없음'}
+- 중복 제거: {cache_stats['context_selection'].get('duplicates_removed', 0)}개 문서, {cache_stats['context_selection'].get('tokens_saved', 0)} 토큰 절약
+- 비동기 검색: {cache_stats['async_retrieval']['calls']}회, 최대 동시 {cache_stats['async_retrieval']['max_in_flight']}/{cache_stats['async_retrieval']['max_workers']}, 대기 {cache_stats['async_retrieval']['queue_wait_seconds']:.1f}초
+"""
+                return info
             
             monitoring_display = gr.Markdown(
                 value=get_monitoring_info(),
@@ -2151,9 +2283,9 @@ with gr.Blocks(
 - **속도:** 평균 0.2초/쿼리
 
 **2. 벡터 데이터베이스**
-- **DB:** ChromaDB
-- **저장:** 로컬 파일시스템 (SQLite)
-- **인덱스:** HNSW (Hierarchical Navigable Small World)
+- **DB:** 통합 벡터 인덱스 (메모리 맵 컬럼형 저장소)
+- **저장:** 로컬 파일시스템 (memmap 행렬 + ID/오프셋 테이블 + 컬럼형 메타데이터)
+- **검색:** 메모리 맵 행렬에 NumPy 내적 (float16/int8 압축 벡터 선택, 페르소나/메타데이터 필터)
 - **총 벡터:** 14개 페르소나 × 평균 7 chunks = 98개
 
 **3. 청킹 전략**
@@ -2168,7 +2300,7 @@ with gr.Blocks(
     ↓
 질문 임베딩 생성 (OpenAI API)
     ↓
-벡터 유사도 검색 (ChromaDB)
+벡터 유사도 검색 (NumPy 내적, 페르소나 필터)
     ↓
 상위 k=3개 청크 선택
     ↓
@@ -2310,10 +2442,10 @@ consensus = (weighted_score / 5.0) * 100
 - **LLM:** OpenAI GPT-4o-mini
 - **Embeddings:** text-embedding-ada-002
 - **프레임워크:** AutoGen 0.4+
-- **벡터 DB:** ChromaDB
+- **벡터 DB:** 메모리 맵 통합 벡터 인덱스 (NumPy 검색)
 
 **데이터 저장:**
-- **RAG 벡터:** SQLite (ChromaDB)
+- **RAG 벡터:** memmap 행렬 + 컬럼형 메타데이터
 - **페르소나 데이터:** TXT 파일
 - **캐시:** 메모리 (딕셔너리)
 
@@ -2330,7 +2462,7 @@ PersonaBot/
 ├── rag/
 │   ├── rag_manager.py     # RAG 관리자
 │   ├── data/              # 페르소나 TXT
-│   └── vector_stores_new/ # 벡터 DB
+│   └── vector_index/      # 벡터 인덱스
 └── requirements.txt       # 의존성
 ```
 
@@ -2558,7 +2690,7 @@ api_key = os.getenv("OPENAI_API_KEY")
     3. **시작:** 토론 시작 버튼 클릭
     4. **확인:** 실시간으로 대화, 요약, 투표 결과 확인
     
-    **기술 스택:** 40K+ YouTube 댓글 | AutoGen 0.4+ | RAG (ChromaDB) | 가중 투표 | GPT-4o-mini
+    **기술 스택:** 40K+ YouTube 댓글 | AutoGen 0.4+ | RAG (메모리 맵 벡터 인덱스) | 가중 투표 | GPT-4o-mini
     """)
 
 if __name__ == "__main__":
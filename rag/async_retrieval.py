@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Retrieval - 비동기 에이전트용 RAG 검색 실행기
+동기 검색(질의 임베딩 HTTP 호출 + 벡터 검색)을 전용 스레드 풀에서 실행해
+AutoGen 이벤트 루프를 막지 않는다. 풀 크기를 제한해 동시 토론이 많아도 검색 스레드가 폭증하지 않는다.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+DEFAULT_RETRIEVAL_WORKERS = 8
+
+
+class RetrievalExecutor:
+    """동기 검색 함수를 제한된 전용 스레드 풀에서 실행하고 await 가능하게 만드는 실행기"""
+
+    def __init__(self, max_workers: Optional[int] = None, thread_name_prefix: str = "rag-retrieval"):
+        """
+        Args:
+            max_workers: 동시 검색 스레드 수 (None이면 RAG_RETRIEVAL_WORKERS 환경변수 또는 기본값)
+            thread_name_prefix: 스레드 이름 접두사
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv("RAG_RETRIEVAL_WORKERS", DEFAULT_RETRIEVAL_WORKERS))
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'in_flight': 0, 'max_in_flight': 0, 'queue_wait_seconds': 0.0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+                )
+            return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """fn(*args, **kwargs)를 검색 스레드 풀에서 실행하고 결과를 기다림"""
+        submitted = time.perf_counter()
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['in_flight'] += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+
+        def timed():
+            # 풀이 가득 차 대기한 시간 기록
+            with self._lock:
+                self._stats['queue_wait_seconds'] += time.perf_counter() - submitted
+            return fn(*args, **kwargs)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._stats['in_flight'] -= 1
+
+    def stats(self) -> Dict:
+        """호출 수 / 동시 실행 수 / 누적 대기 시간"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max_workers'] = self.max_workers
+        stats['queue_wait_seconds'] = round(stats['queue_wait_seconds'], 3)
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """스레드 풀 종료 (다음 호출 시 다시 생성)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Context Selection - 중복을 고려한 컨텍스트 선택 (MMR + 근접 중복 제거)
+유튜브 댓글은 거의 같은 내용이 반복되므로 상위 k개를 그대로 쓰지 않고
+서로 다른 내용을 담은 문서를 골라 프롬프트 토큰을 줄인다.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.token_counter import count_tokens
+
+
+def select_contexts(
+    candidates: Sequence[Tuple[Document, float]],
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.95
+) -> Tuple[List[Document], Dict]:
+    """
+    관련도 순 후보에서 k개를 MMR로 선택 (근접 중복은 제외)
+
+    Args:
+        candidates: [(문서, 관련도 점수)] (관련도 내림차순, 점수 척도는 무관)
+        vectors: 후보 순서대로의 L2 정규화 문서 임베딩 (len(candidates) x dim)
+        k: 선택할 문서 수
+        lambda_mult: 관련도 가중치 (1이면 관련도만, 0이면 다양성만)
+        duplicate_threshold: 이미 선택된 문서와의 코사인 유사도가 이 값 이상이면 중복으로 제외
+
+    Returns:
+        (선택된 문서, 보고서 {'candidates', 'selected', 'duplicates_removed',
+                             'naive_tokens', 'selected_tokens', 'tokens_saved'})
+        tokens_saved는 상위 k개를 그대로 썼다면 프롬프트에 들어갔을 중복 문서의 토큰 수
+    """
+    if not candidates:
+        return [], {
+            'candidates': 0, 'selected': 0, 'duplicates_removed': 0,
+            'naive_tokens': 0, 'selected_tokens': 0, 'tokens_saved': 0
+        }
+
+    scores = np.asarray([score for _, score in candidates], dtype=np.float32)
+    # 점수 척도(코사인/BM25/RRF)와 무관하도록 [0, 1]로 정규화
+    spread = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    similarity = vectors @ vectors.T
+    selected: List[int] = []
+    remaining = list(range(len(candidates)))
+    duplicate_indices = set()
+
+    while remaining and len(selected) < k:
+        if selected:
+            max_similarity = similarity[np.ix_(remaining, selected)].max(axis=1)
+            # 이미 고른 문서와 거의 같은 내용은 후보에서 제거
+            keep = max_similarity < duplicate_threshold
+            duplicate_indices.update(index for index, kept in zip(remaining, keep) if not kept)
+            remaining = [index for index, kept in zip(remaining, keep) if kept]
+            if not remaining:
+                break
+            max_similarity = max_similarity[keep]
+            mmr = lambda_mult * relevance[remaining] - (1 - lambda_mult) * max_similarity
+        else:
+            mmr = relevance[remaining]
+
+        best = remaining[int(np.argmax(mmr))]
+        selected.append(best)
+        remaining.remove(best)
+
+    documents = [candidates[index][0] for index in selected]
+    naive_tokens = sum(count_tokens(doc.page_content) for doc, _ in candidates[:k])
+    selected_tokens = sum(count_tokens(doc.page_content) for doc in documents)
+    redundant_tokens = sum(
+        count_tokens(candidates[index][0].page_content) for index in range(min(k, len(candidates)))
+        if index in duplicate_indices
+    )
+
+    return documents, {
+        'candidates': len(candidates),
+        'selected': len(documents),
+        'duplicates_removed': len(duplicate_indices),
+        'naive_tokens': naive_tokens,
+        'selected_tokens': selected_tokens,
+        'tokens_saved': redundant_tokens
+    }
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding Backends - RAG 매니저용 임베딩 백엔드 선택
+- openai: text-embedding-ada-002 (네트워크 호출)
+- sentence_transformers: 로컬 CPU 다국어 모델 (최초 1회 모델 다운로드 후 오프라인)
+- hashing: 문자 n-gram 해싱 투영 (의존성/네트워크 없음, 오프라인 테스트용)
+
+환경변수 RAG_EMBEDDING_BACKEND로 매니저 생성 인자보다 우선하여 지정할 수 있다.
+"""
+
+import math
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_BACKENDS = ("openai", "sentence_transformers", "hashing")
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+DEFAULT_LOCAL_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class HashingEmbeddings(Embeddings):
+    """문자 n-gram을 고정 차원으로 해싱하는 로컬 임베딩 (학습/네트워크 불필요)"""
+
+    def __init__(self, dimensions: int = 512, ngram_range: Tuple[int, int] = (2, 3)):
+        """
+        Args:
+            dimensions: 벡터 차원
+            ngram_range: 사용할 문자 n-gram 길이 범위 (한국어는 2~3글자가 효과적)
+        """
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        normalized = " ".join(text.lower().split())
+        min_n, max_n = self.ngram_range
+
+        for n in range(min_n, max_n + 1):
+            for start in range(len(normalized) - n + 1):
+                hashed = zlib.crc32(normalized[start:start + n].encode("utf-8"))
+                # 부호 해싱으로 충돌 편향 상쇄
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                vector[hashed % self.dimensions] += sign
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def resolve_backend(use_openai_embeddings: bool = True) -> str:
+    """환경변수 → 생성 인자 순으로 사용할 백엔드 결정"""
+    backend = os.getenv("RAG_EMBEDDING_BACKEND")
+    if backend:
+        backend = backend.strip().lower()
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"지원하지 않는 임베딩 백엔드: {backend} (가능: {', '.join(EMBEDDING_BACKENDS)})"
+            )
+        return backend
+    return "openai" if use_openai_embeddings else "sentence_transformers"
+
+
+def create_embeddings(backend: str, api_key: Optional[str] = None) -> Tuple[Embeddings, str]:
+    """
+    백엔드별 임베딩 함수 생성
+
+    Args:
+        backend: EMBEDDING_BACKENDS 중 하나
+        api_key: OpenAI API 키 (openai 백엔드에서만 사용)
+
+    Returns:
+        (임베딩 함수, 캐시/매니페스트에 기록할 모델 식별자)
+    """
+    if backend == "openai":
+        if not (api_key or os.getenv("OPENAI_API_KEY")):
+            raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다!")
+
+        from langchain_openai import OpenAIEmbeddings
+
+        kwargs = {"model": OPENAI_EMBEDDING_MODEL}
+        if api_key:
+            kwargs["api_key"] = api_key
+        return OpenAIEmbeddings(**kwargs), OPENAI_EMBEDDING_MODEL
+
+    if backend == "sentence_transformers":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        model_name = os.getenv("RAG_LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True}
+        )
+        return embeddings, f"sentence_transformers:{model_name}"
+
+    if backend == "hashing":
+        embeddings = HashingEmbeddings()
+        return embeddings, f"hashing:char{embeddings.ngram_range[0]}-{embeddings.ngram_range[1]}-{embeddings.dimensions}"
+
+    raise ValueError(f"지원하지 않는 임베딩 백엔드: {backend}")
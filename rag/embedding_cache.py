@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding Cache - (임베딩 모델, 청크 텍스트 해시) 기준 영구 임베딩 캐시
+벡터 스토어 재생성 시 변경되지 않은 청크는 임베딩 API를 다시 호출하지 않음
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / "embedding_cache.sqlite3"
+
+
+class CachedEmbeddings(Embeddings):
+    """SQLite 기반 content-addressed 임베딩 캐시 (LangChain Embeddings 래퍼)"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_path: Optional[Path] = None):
+        """
+        임베딩 캐시 초기화
+
+        Args:
+            embeddings: 실제 임베딩 함수 (예: OpenAIEmbeddings)
+            model_name: 캐시 키에 포함될 임베딩 모델 식별자
+            cache_path: SQLite 파일 경로 (기본: rag/embedding_cache.sqlite3)
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_path = Path(cache_path) if cache_path else DEFAULT_CACHE_PATH
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        """(모델, 텍스트) → 캐시 키"""
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """캐시에 저장된 벡터 일괄 조회"""
+        found = {}
+        # SQLite 바인딩 변수 제한을 피하기 위해 나눠서 조회
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩 (캐시 미스인 청크만 실제 임베딩 호출)"""
+        vectors, _ = self.embed_documents_with_stats(texts)
+        return vectors
+
+    def embed_documents_with_stats(self, texts: List[str]) -> Tuple[List[List[float]], Dict]:
+        """
+        문서 임베딩 + 이번 호출의 캐시 적중/미스 수
+
+        stats()는 프로세스 누적값이고 여러 페르소나가 동시에 색인할 수 있으므로
+        빌드 단위 통계는 호출별 값을 더해서 구한다.
+
+        Returns:
+            (벡터 목록, {'hits', 'misses'})
+        """
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(list(set(keys)))
+
+        # 캐시에 없는 고유 텍스트만 한 번에 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_rows = []
+            for key, vector in zip(missing.keys(), vectors):
+                cached[key] = vector
+                new_rows.append((key, self.model_name, array("f", vector).tobytes()))
+
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    new_rows
+                )
+                self._conn.commit()
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        return [cached[key] for key in keys], {'hits': len(texts) - len(missing), 'misses': len(missing)}
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩 (질의는 매번 달라지므로 그대로 전달)"""
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """여러 질의를 한 번의 배치 요청으로 임베딩 (캐시에 저장하지 않음)"""
+        if not texts:
+            return []
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self) -> Dict:
+        """캐시 적중/미스 통계 (프로세스 시작 후 누적)"""
+        total = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
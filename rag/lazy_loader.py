@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy Persona Loader - 페르소나 인덱스 백그라운드 워밍업
+시스템 초기화는 즉시 반환하고, 각 페르소나는 인덱스가 준비되는 대로 사용 가능.
+토론 시작 시에는 선택된 페르소나만 기다린다.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 페르소나 상태
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class BackgroundPersonaLoader:
+    """페르소나별 로드 함수를 백그라운드 스레드에서 실행하고 준비 상태를 추적"""
+
+    def __init__(
+        self,
+        load_fn: Callable[[str], object],
+        persona_names: Iterable[str],
+        max_workers: int = 4,
+        on_complete: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            load_fn: 페르소나 이름을 받아 인덱스를 로드하는 함수 (None 반환 시 실패로 간주)
+            persona_names: 워밍업할 페르소나 목록 (이 순서대로 로드 시작)
+            max_workers: 동시 로드 스레드 수
+            on_complete: 모든 페르소나 로드가 끝난 뒤 한 번 호출 (예: 미뤄둔 인덱스 저장)
+        """
+        self.load_fn = load_fn
+        self.persona_names = list(persona_names)
+        self.max_workers = max_workers
+        self.on_complete = on_complete
+        self._remaining = len(self.persona_names)
+
+        self._status: Dict[str, Dict] = {
+            name: {'state': PENDING, 'seconds': None, 'error': None} for name in self.persona_names
+        }
+        self._events = {name: threading.Event() for name in self.persona_names}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> "BackgroundPersonaLoader":
+        """워밍업 시작 (즉시 반환)"""
+        with self._lock:
+            if self._executor is None:
+                if not self.persona_names:
+                    self._complete()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="persona-warmup")
+                for name in self.persona_names:
+                    self._executor.submit(self._load, name)
+                # 작업이 끝나면 스레드 정리 (대기하지 않음)
+                self._executor.shutdown(wait=False)
+        return self
+
+    def _load(self, name: str):
+        self._set(name, state=LOADING)
+        started = time.perf_counter()
+        try:
+            result = self.load_fn(name)
+            state = READY if result is not None else FAILED
+            self._set(name, state=state, seconds=round(time.perf_counter() - started, 2),
+                      error=None if result is not None else "인덱스를 만들 데이터가 없습니다")
+        except Exception as e:
+            self._set(name, state=FAILED, seconds=round(time.perf_counter() - started, 2), error=str(e))
+        finally:
+            self._events[name].set()
+            with self._lock:
+                self._remaining -= 1
+                done = self._remaining == 0
+            if done:
+                self._complete()
+
+    def _complete(self):
+        if self.on_complete is None:
+            return
+        try:
+            self.on_complete()
+        except Exception as e:
+            print(f"[!] 워밍업 완료 처리 실패: {e}")
+
+    def _set(self, name: str, **values):
+        with self._lock:
+            self._status[name].update(values)
+
+    def is_ready(self, name: str) -> bool:
+        """페르소나 사용 가능 여부"""
+        with self._lock:
+            return name in self._status and self._status[name]['state'] == READY
+
+    def wait_for(self, names: Iterable[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        지정한 페르소나의 로드가 끝날 때까지 대기 (다른 페르소나는 기다리지 않음)
+
+        Args:
+            names: 기다릴 페르소나 목록 (로더가 모르는 이름은 무시)
+            timeout: 전체 대기 시간 제한 (초, None이면 무제한)
+
+        Returns:
+            {페르소나 이름: 상태}
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names:
+            event = self._events.get(name)
+            if event is None:
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            event.wait(remaining)
+
+        with self._lock:
+            return {name: self._status[name]['state'] for name in names if name in self._status}
+
+    def pending(self, names: Iterable[str]) -> List[str]:
+        """아직 로드가 끝나지 않은 페르소나 목록"""
+        return [name for name in names if name in self._events and not self._events[name].is_set()]
+
+    def status(self) -> Dict[str, Dict]:
+        """페르소나별 상태 {이름: {'state', 'seconds', 'error'}}"""
+        with self._lock:
+            return {name: dict(info) for name, info in self._status.items()}
+
+    def summary(self) -> Dict[str, int]:
+        """상태별 페르소나 수"""
+        counts = {PENDING: 0, LOADING: 0, READY: 0, FAILED: 0}
+        for info in self.status().values():
+            counts[info['state']] += 1
+        return counts
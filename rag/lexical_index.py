@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lexical Index - 문자 n-gram BM25 역색인
+"폴드7", "S펜", "주름" 같은 정확한 제품 용어를 임베딩 없이 찾기 위한 로컬 인덱스.
+하이브리드 검색에서 후보를 먼저 좁히는 데 사용한다.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r'[0-9a-zA-Z가-힣]+')
+
+
+def tokenize(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> List[str]:
+    """
+    단어 내부 문자 n-gram 토큰화 (단어 경계를 넘지 않음)
+
+    n-gram보다 짧은 단어는 단어 자체를 토큰으로 사용하므로 "S펜", "폰" 같은 짧은 용어도 검색된다.
+    """
+    min_n, max_n = ngram_range
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) <= min_n:
+            tokens.append(word)
+            continue
+        for n in range(min_n, min(max_n, len(word)) + 1):
+            tokens.extend(word[start:start + n] for start in range(len(word) - n + 1))
+    return tokens
+
+
+class LexicalIndex:
+    """행 번호 기준 BM25 역색인 (PersonaVectorIndex 행과 1:1 대응)"""
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            texts: 행 순서대로의 문서 본문
+            k1: BM25 단어 빈도 포화 계수
+            b: BM25 문서 길이 정규화 계수
+        """
+        self.k1 = k1
+        self.size = len(texts)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        avg_length = float(lengths.mean()) if self.size else 0.0
+        # 문서 길이 정규화 항은 행마다 고정이므로 미리 계산
+        self._length_norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.full(self.size, k1, dtype=np.float32)
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, entries in postings.items():
+            rows = np.fromiter((row for row, _ in entries), dtype=np.int64, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5))
+            self._postings[term] = (rows, tfs, idf)
+
+    def search(self, query: str, k: int, rows: Optional[np.ndarray] = None) -> Tuple[List[Tuple[int, float]], float]:
+        """
+        BM25 상위 k개 행 검색
+
+        Args:
+            query: 검색 질의
+            k: 반환할 행 수
+            rows: 검색 대상 행 (None이면 전체)
+
+        Returns:
+            ([(행 번호, BM25 점수)], 1위 문서의 질의 토큰 포함 비율)
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.size:
+            return [], 0.0
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        matched = np.zeros(self.size, dtype=np.int32)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            term_rows, tfs, idf = posting
+            scores[term_rows] += idf * tfs * (self.k1 + 1) / (tfs + self._length_norm[term_rows])
+            matched[term_rows] += 1
+
+        candidates = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if not len(candidates):
+            return [], 0.0
+
+        k = min(k, len(candidates))
+        candidate_scores = scores[candidates]
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+        hits = [(int(candidates[i]), float(candidate_scores[i])) for i in top]
+
+        coverage = matched[hits[0][0]] / len(terms)
+        return hits, float(coverage)
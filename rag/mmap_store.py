@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mapped Store - numpy.memmap으로 여는 벡터 인덱스 디스크 포맷
+JSON 레코드를 통째로 파싱하고 행렬을 복사하는 대신, 고정 포맷 파일을 메모리 맵으로 열어
+시작 시간을 줄이고 같은 인덱스를 여는 여러 프로세스가 OS 페이지 캐시를 공유하도록 한다.
+
+디렉토리 구성 (index_dir/CURRENT가 가리키는 버전 디렉토리):
+    header.json        포맷 버전, 임베딩 모델, 행 수/차원, 문서 ID, 메타데이터 컬럼 정의, 페르소나 목록
+    vectors.f32        (행 수 x 차원) float32 연속 행렬
+    texts.bin          UTF-8 본문을 이어 붙인 바이트열
+    texts.i64          본문 오프셋 (행 수 + 1)
+    persona_rows.i64   페르소나별 행 번호를 이어 붙인 배열 (구간은 header의 persona_offsets)
+    meta_<n>.i32       범주형 메타데이터 컬럼 코드 (-1 = 값 없음, 값 목록은 header)
+    meta_<n>.bin/.i64  그 밖의 메타데이터 컬럼 (행마다 JSON 인코딩, 길이 0 = 값 없음)
+    compact.*          (선택) 검색용 압축 벡터 - 코드 행렬, int8 행별 스케일, PCA 투영 행렬
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from rag.quantization import QuantizedMatrix
+
+FORMAT_VERSION = 2
+CURRENT_FILE = "CURRENT"
+
+# 압축 코드 파일 확장자
+_COMPACT_SUFFIXES = {"float32": ".f32", "float16": ".f16", "int8": ".i8"}
+_COMPACT_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# 고유값이 이 개수 이하이거나 행 수의 절반 이하이면 범주형 코드로 저장
+MAX_CATEGORY_VALUES = 256
+
+
+def _map(path: Path, dtype, shape) -> np.ndarray:
+    """읽기 전용 메모리 맵 (빈 배열은 파일을 열 수 없으므로 일반 배열 반환)"""
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+
+def _write_strings(path_prefix: Path, values: Sequence[bytes]):
+    """바이트열 목록을 .bin + .i64 오프셋 파일로 저장"""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    with open(path_prefix.with_suffix('.bin'), 'wb') as f:
+        for value in values:
+            f.write(value)
+    offsets.tofile(path_prefix.with_suffix('.i64'))
+
+
+class StringColumn:
+    """오프셋 테이블로 접근하는 메모리 맵 문자열 컬럼 (행 단위 지연 디코딩)"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    @classmethod
+    def open(cls, path_prefix: Path, count: int) -> "StringColumn":
+        offsets = _map(path_prefix.with_suffix('.i64'), np.int64, (count + 1,))
+        size = int(offsets[-1]) if count else 0
+        return cls(_map(path_prefix.with_suffix('.bin'), np.uint8, (size,)), offsets)
+
+    def raw(self, row: int) -> bytes:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._data[start:end].tobytes()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.raw(row).decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+
+
+class ColumnarMetadata:
+    """컬럼 단위로 저장된 메타데이터 (행 조회 시 dict로 조립, 범주형 컬럼은 벡터화 필터)"""
+
+    def __init__(self, columns: Dict[str, Dict], count: int):
+        """
+        Args:
+            columns: {필드: {'kind': 'category', 'codes', 'values'} 또는 {'kind': 'json', 'column'}}
+            count: 행 수
+        """
+        self._columns = columns
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _value(self, column: Dict, row: int):
+        """(값 존재 여부, 값)"""
+        if column['kind'] == 'category':
+            code = int(column['codes'][row])
+            return (code >= 0, column['values'][code] if code >= 0 else None)
+        raw = column['column'].raw(row)
+        return (bool(raw), json.loads(raw) if raw else None)
+
+    def __getitem__(self, row: int) -> Dict:
+        metadata = {}
+        for field, column in self._columns.items():
+            present, value = self._value(column, row)
+            if present:
+                metadata[field] = value
+        return metadata
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(self._count):
+            yield self[row]
+
+    def match(self, where: Dict[str, Any], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        메타데이터 필터에 맞는 행 번호 (get_documents/search의 where와 같은 의미)
+
+        Args:
+            where: {필드: 값 또는 값 목록}
+            rows: 검사할 행 (None이면 전체)
+        """
+        rows = np.arange(self._count, dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        for field, expected in where.items():
+            if not len(rows):
+                break
+            accepted = list(expected) if isinstance(expected, (list, tuple, set)) else [expected]
+            column = self._columns.get(field)
+            if column is None:
+                # 없는 필드는 None과만 일치
+                rows = rows if None in accepted else rows[:0]
+            elif column['kind'] == 'category':
+                codes = [code for code, value in enumerate(column['values']) if value in accepted]
+                if None in accepted:
+                    codes.append(-1)
+                rows = rows[np.isin(column['codes'][rows], codes)]
+            else:
+                rows = rows[[self._value(column, int(row))[1] in accepted for row in rows]]
+        return rows
+
+
+class MappedStore:
+    """읽기 전용으로 연 인덱스 버전 디렉토리"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / "header.json", 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 인덱스 포맷: {header.get('format_version')}")
+
+        self.embedding_model: str = header['embedding_model']
+        self.count: int = header['count']
+        self.dim: int = header['dim']
+        self.ids: List[str] = header['ids']
+
+        self.vectors = _map(self.directory / "vectors.f32", np.float32, (self.count, self.dim))
+        self.texts = StringColumn.open(self.directory / "texts", self.count)
+
+        columns = {}
+        for position, spec in enumerate(header['metadata_columns']):
+            prefix = self.directory / f"meta_{position}"
+            if spec['kind'] == 'category':
+                columns[spec['field']] = {
+                    'kind': 'category',
+                    'values': spec['values'],
+                    'codes': _map(prefix.with_suffix('.i32'), np.int32, (self.count,))
+                }
+            else:
+                columns[spec['field']] = {'kind': 'json', 'column': StringColumn.open(prefix, self.count)}
+        self.metadatas = ColumnarMetadata(columns, self.count)
+
+        offsets = header['persona_offsets']
+        all_rows = _map(self.directory / "persona_rows.i64", np.int64, (offsets[-1] if offsets else 0,))
+        self.persona_rows: Dict[str, np.ndarray] = {
+            persona: all_rows[offsets[position]:offsets[position + 1]]
+            for position, persona in enumerate(header['personas'])
+        }
+
+        # 검색용 압축 벡터 (원본 행렬은 수정/정밀 비교 시에만 읽음)
+        self.compact_settings: Optional[Dict] = header.get('compact')
+        self.compact: Optional[QuantizedMatrix] = None
+        if self.compact_settings is not None:
+            compression = self.compact_settings['compression']
+            dim = self.compact_settings['dim']
+            pca_dim = self.compact_settings['pca_dim']
+            self.compact = QuantizedMatrix(
+                _map(self.directory / f"compact{_COMPACT_SUFFIXES[compression]}", _COMPACT_DTYPES[compression], (self.count, dim)),
+                _map(self.directory / "compact_scales.f32", np.float32, (self.count,)) if compression == "int8" else None,
+                _map(self.directory / "compact_components.f32", np.float32, (self.dim, pca_dim)) if pca_dim else None
+            )
+
+    def row_personas(self) -> List[List[str]]:
+        """행별 소속 페르소나 목록 (인덱스를 수정하기 위해 메모리로 옮길 때 사용)"""
+        personas = [[] for _ in range(self.count)]
+        for persona in sorted(self.persona_rows):
+            for row in self.persona_rows[persona]:
+                personas[int(row)].append(persona)
+        return personas
+
+
+def current_store(index_dir: Path) -> Optional[Path]:
+    """CURRENT가 가리키는 버전 디렉토리 (없으면 None)"""
+    pointer = Path(index_dir) / CURRENT_FILE
+    if not pointer.exists():
+        return None
+    directory = Path(index_dir) / pointer.read_text(encoding='utf-8').strip()
+    return directory if (directory / "header.json").exists() else None
+
+
+def _metadata_spec(field: str, values: List[Any], count: int) -> Dict:
+    """필드 값 분포에 따라 범주형 또는 JSON 컬럼 선택"""
+    present = [value for value in values if value is not None]
+    scalar = all(isinstance(value, (str, int, float, bool)) for value in present)
+    if scalar:
+        unique = list(dict.fromkeys(present))
+        if len(unique) <= MAX_CATEGORY_VALUES or len(unique) * 2 <= count:
+            return {'field': field, 'kind': 'category', 'values': unique}
+    return {'field': field, 'kind': 'json'}
+
+
+def write_store(
+    index_dir: Path,
+    embedding_model: str,
+    ids: Sequence[str],
+    texts: Sequence[str],
+    metadatas: Sequence[Dict],
+    personas: Sequence[Sequence[str]],
+    vectors: np.ndarray,
+    compact: Optional[QuantizedMatrix] = None
+) -> Path:
+    """
+    새 버전 디렉토리에 인덱스를 쓰고 CURRENT를 원자적으로 교체
+
+    이전 버전 파일을 메모리 맵으로 열고 있는 프로세스가 있을 수 있으므로 기존 파일은 덮어쓰지 않는다.
+    교체 후 이전 버전은 삭제를 시도한다 (열려 있어 지울 수 없으면 다음 저장 때 다시 시도).
+    compact가 있으면 검색용 압축 벡터를 함께 저장한다 (원본 float32 행렬은 항상 저장).
+
+    Returns:
+        새 버전 디렉토리
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    count = len(ids)
+    dim = int(vectors.shape[1]) if count else 0
+
+    previous = current_store(index_dir)
+    version = int(previous.name.split('-')[-1]) + 1 if previous is not None else 1
+    directory = index_dir / f"store-{version:06d}"
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir()
+
+    np.ascontiguousarray(vectors, dtype=np.float32).tofile(directory / "vectors.f32")
+    _write_strings(directory / "texts", [text.encode('utf-8') for text in texts])
+
+    fields = list(dict.fromkeys(field for metadata in metadatas for field in metadata))
+    specs = []
+    for position, field in enumerate(fields):
+        prefix = directory / f"meta_{position}"
+        values = [metadata.get(field) for metadata in metadatas]
+        spec = _metadata_spec(field, values, count)
+        if spec['kind'] == 'category':
+            code_of = {value: code for code, value in enumerate(spec['values'])}
+            codes = np.asarray(
+                [code_of[metadata[field]] if metadata.get(field) is not None else -1 for metadata in metadatas],
+                dtype=np.int32
+            )
+            codes.tofile(prefix.with_suffix('.i32'))
+        else:
+            _write_strings(prefix, [
+                json.dumps(metadata[field], ensure_ascii=False).encode('utf-8') if field in metadata else b''
+                for metadata in metadatas
+            ])
+        specs.append(spec)
+
+    persona_rows: Dict[str, List[int]] = {}
+    for row, persona_list in enumerate(personas):
+        for persona in persona_list:
+            persona_rows.setdefault(persona, []).append(row)
+    persona_names = sorted(persona_rows)
+    persona_offsets = [0]
+    for persona in persona_names:
+        persona_offsets.append(persona_offsets[-1] + len(persona_rows[persona]))
+    np.asarray(
+        [row for persona in persona_names for row in persona_rows[persona]], dtype=np.int64
+    ).tofile(directory / "persona_rows.i64")
+
+    compact_settings = None
+    if compact is not None:
+        compact.codes.tofile(directory / f"compact{_COMPACT_SUFFIXES[compact.compression]}")
+        if compact.scales is not None:
+            compact.scales.tofile(directory / "compact_scales.f32")
+        if compact.components is not None:
+            compact.components.tofile(directory / "compact_components.f32")
+        compact_settings = {
+            'compression': compact.compression,
+            'dim': compact.dim if count else 0,
+            'pca_dim': int(compact.components.shape[1]) if compact.components is not None else None
+        }
+
+    with open(directory / "header.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'embedding_model': embedding_model,
+            'count': count,
+            'dim': dim,
+            'ids': list(ids),
+            'metadata_columns': specs,
+            'personas': persona_names,
+            'persona_offsets': persona_offsets,
+            'compact': compact_settings
+        }, f, ensure_ascii=False)
+
+    tmp_pointer = index_dir / f"{CURRENT_FILE}.tmp"
+    tmp_pointer.write_text(directory.name, encoding='utf-8')
+    os.replace(tmp_pointer, index_dir / CURRENT_FILE)
+
+    # 이전 버전 정리 (Windows에서 다른 프로세스가 열고 있으면 실패할 수 있음)
+    for stale in index_dir.glob("store-*"):
+        if stale != directory:
+            shutil.rmtree(stale, ignore_errors=True)
+    return directory
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prompt Budget - 턴 단위 토큰 예산 배분
+모델 컨텍스트 윈도우 안에서 시스템 프롬프트, 대화 이력, RAG 근거에 토큰을 나누고
+문자 수가 아닌 토큰 경계에서 잘라 컨텍스트 초과를 막는다.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rag.token_counter import DEFAULT_MODEL, count_tokens, truncate_to_tokens
+
+# 모델별 컨텍스트 윈도우 (입력 + 출력 토큰)
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# 컨텍스트 윈도우가 커도 턴당 입력 토큰을 이 값으로 제한해 응답 지연을 일정하게 유지
+DEFAULT_TURN_BUDGET = 6000
+
+# 채팅 메시지 1개당 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TRUNCATION_MARK = "…"
+
+
+class PromptBudget:
+    """턴마다 시스템 프롬프트 / 대화 이력 / RAG 근거에 입력 토큰 예산을 배분"""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        turn_budget: Optional[int] = None,
+        reply_tokens: int = 500,
+        max_evidence_tokens: int = 600,
+        per_context_tokens: int = 200,
+        min_context_tokens: int = 24
+    ):
+        """
+        Args:
+            model: 토큰화 및 컨텍스트 윈도우 기준 모델
+            turn_budget: 턴당 입력 토큰 예산 (None이면 RAG_TURN_TOKEN_BUDGET 환경변수 또는 기본값)
+            reply_tokens: 응답용으로 남겨둘 토큰 수
+            max_evidence_tokens: 턴당 RAG 근거 최대 토큰 수
+            per_context_tokens: 근거 문서 1개당 최대 토큰 수
+            min_context_tokens: 이보다 적게 남으면 근거 문서를 잘라 넣지 않고 제외
+        """
+        self.model = model
+        self.context_window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        if turn_budget is None:
+            turn_budget = int(os.getenv("RAG_TURN_TOKEN_BUDGET", DEFAULT_TURN_BUDGET))
+        # 응답 토큰을 뺀 나머지가 입력으로 쓸 수 있는 최대치
+        self.turn_budget = max(0, min(turn_budget, self.context_window - reply_tokens))
+        self.reply_tokens = reply_tokens
+        self.max_evidence_tokens = max_evidence_tokens
+        self.per_context_tokens = per_context_tokens
+        self.min_context_tokens = min_context_tokens
+
+    def count(self, text: str) -> int:
+        """텍스트 토큰 수"""
+        return count_tokens(text or "", self.model)
+
+    def count_message(self, text: str) -> int:
+        """채팅 메시지 1개의 토큰 수 (역할/구분자 포함)"""
+        return self.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """토큰 경계에서 자르고 잘렸으면 말줄임표 추가"""
+        if self.count(text) <= max_tokens:
+            return text
+        mark_tokens = self.count(TRUNCATION_MARK)
+        return truncate_to_tokens(text, max_tokens - mark_tokens, self.model) + TRUNCATION_MARK
+
+    def start_turn(self, system_prompt: str, message: str, history_tokens: int = 0) -> Dict:
+        """
+        턴 예산 계산
+
+        시스템 프롬프트와 현재 메시지는 그대로 두고, 남은 예산을 근거(최대 max_evidence_tokens)와
+        이력에 나눈다. 이력을 줄일 수 없는 경우 history_tokens로 넘기면 그만큼 근거 예산이 줄어든다.
+        (AutoGen 에이전트는 context_token_limit으로 모델 컨텍스트를 제한하므로 이력을 넘기지 않음)
+
+        Args:
+            system_prompt: 시스템 프롬프트 (근거를 넣기 전)
+            message: 현재 턴 메시지
+            history_tokens: 줄일 수 없는 대화 이력 토큰 수
+
+        Returns:
+            턴 내역 {'budget', 'system', 'message', 'history', 'history_budget',
+                     'evidence', 'evidence_budget', 'truncated', 'dropped'}
+        """
+        system = self.count_message(system_prompt)
+        message_tokens = self.count_message(message)
+        available = max(0, self.turn_budget - system - message_tokens)
+        evidence_budget = max(0, min(self.max_evidence_tokens, available - history_tokens))
+
+        return {
+            'budget': self.turn_budget,
+            'system': system,
+            'message': message_tokens,
+            'history': history_tokens,
+            'history_budget': available - evidence_budget,
+            'evidence': 0,
+            'evidence_budget': evidence_budget,
+            'truncated': 0,
+            'dropped': 0
+        }
+
+    def context_token_limit(self, system_prompt: str) -> int:
+        """
+        에이전트 모델 컨텍스트(이력 + 현재 메시지 + 근거) 토큰 상한
+
+        시스템 프롬프트를 뺀 턴 예산 - AutoGen 에이전트의 TokenLimitedChatCompletionContext에 넘겨
+        누적 이력이 이 값을 넘으면 이전 메시지부터 제외되도록 한다.
+        """
+        return max(0, self.turn_budget - self.count_message(system_prompt))
+
+    def fit_contexts(
+        self,
+        contexts: Sequence[str],
+        max_tokens: int,
+        separator: str = "\n---\n",
+        header: str = ""
+    ) -> Tuple[List[str], Dict]:
+        """
+        토큰 예산 안에 들어가도록 컨텍스트 선택 (순서 유지, 문서당 per_context_tokens 제한)
+
+        예산을 넘는 문서는 토큰 경계에서 자르고, 남은 예산이 min_context_tokens보다 작으면 제외한다.
+
+        Args:
+            contexts: 관련도 순 컨텍스트 문자열
+            max_tokens: 전체 토큰 예산 (머리말과 구분자 포함)
+            separator: 컨텍스트 사이 구분자
+            header: 컨텍스트 앞에 붙일 머리말 (컨텍스트가 하나라도 들어갈 때만 사용)
+
+        Returns:
+            (선택된 컨텍스트, {'tokens', 'truncated', 'dropped'})
+        """
+        separator_tokens = self.count(separator)
+        remaining = max_tokens - self.count(header)
+        fitted = []
+        truncated = 0
+        dropped = 0
+
+        for index, context in enumerate(contexts):
+            overhead = separator_tokens if fitted else 0
+            allowance = min(self.per_context_tokens, remaining - overhead)
+            if allowance < self.min_context_tokens:
+                dropped = len(contexts) - index
+                break
+            fitted_context = self.truncate(context, allowance)
+            if fitted_context is not context:
+                truncated += 1
+            remaining -= self.count(fitted_context) + overhead
+            fitted.append(fitted_context)
+
+        used = max_tokens - remaining if fitted else 0
+        return fitted, {'tokens': used, 'truncated': truncated, 'dropped': dropped}
+
+    def fit_evidence(
+        self,
+        turn: Dict,
+        contexts: Sequence[str],
+        separator: str = "\n---\n",
+        header: str = ""
+    ) -> List[str]:
+        """턴의 근거 예산에 맞게 컨텍스트 선택 (쓰지 못한 근거 예산은 이력 예산으로 돌림)"""
+        fitted, report = self.fit_contexts(contexts, turn['evidence_budget'], separator, header)
+        turn['evidence'] += report['tokens']
+        turn['truncated'] += report['truncated']
+        turn['dropped'] += report['dropped']
+        turn['history_budget'] += turn['evidence_budget'] - report['tokens']
+        return fitted
+
+    def fit_history(self, turn: Dict, history: Sequence[Dict]) -> List[Dict]:
+        """
+        이력 예산 안에 들어가는 최근 메시지만 유지 ({'role', 'content'} 목록, 오래된 것부터 제외)
+        """
+        remaining = turn['history_budget'] - turn['history']
+        kept = []
+        for message in reversed(history):
+            tokens = self.count_message(message.get('content', ''))
+            if tokens > remaining:
+                break
+            kept.append(message)
+            remaining -= tokens
+            turn['history'] += tokens
+        kept.reverse()
+        return kept
+
+    def describe(self, turn: Dict, label: str) -> str:
+        """턴 토큰 내역 로그 문자열"""
+        total = turn['system'] + turn['history'] + turn['message'] + turn['evidence']
+        line = (
+            f"[토큰] {label}: system {turn['system']:,} + history {turn['history']:,}"
+            f" + message {turn['message']:,} + evidence {turn['evidence']:,}/{turn['evidence_budget']:,}"
+            f" = {total:,}/{turn['budget']:,}"
+        )
+        if turn['truncated'] or turn['dropped']:
+            line += f" (근거 잘림 {turn['truncated']}, 제외 {turn['dropped']})"
+        if total > turn['budget']:
+            line += " ⚠️ 예산 초과"
+        return line
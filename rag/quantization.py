@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vector Quantization - 리뷰 인덱스용 압축 벡터 (float16 / int8 + 행별 스케일, 선택적 PCA 차원 축소)
+검색은 압축 행렬을 블록 단위로 float32로 올려 NumPy 행렬곱으로 점수를 계산하므로
+워커가 건드리는 메모리는 압축 행렬 크기로 줄어든다.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+VECTOR_COMPRESSIONS = ("float32", "float16", "int8")
+
+# 점수 계산 시 한 번에 float32로 올리는 행 수 (변환 버퍼가 CPU 캐시에 머무는 크기)
+SCORE_BLOCK_ROWS = 512
+
+
+def resolve_vector_compression(compression: Optional[str] = None, pca_dim: Optional[int] = None):
+    """환경변수 RAG_VECTOR_COMPRESSION / RAG_VECTOR_PCA_DIM → 생성 인자 → (float32, 축소 없음) 순으로 결정"""
+    compression = (os.getenv("RAG_VECTOR_COMPRESSION") or compression or "float32").strip().lower()
+    if compression not in VECTOR_COMPRESSIONS:
+        raise ValueError(f"지원하지 않는 벡터 압축 방식: {compression} (가능: {', '.join(VECTOR_COMPRESSIONS)})")
+    env_dim = os.getenv("RAG_VECTOR_PCA_DIM")
+    pca_dim = int(env_dim) if env_dim else pca_dim
+    return compression, (pca_dim or None)
+
+
+def fit_pca(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """
+    PCA 투영 행렬 (원본 차원 x dim)
+
+    정규화된 벡터의 내적(코사인)을 근사하기 위해 평균을 빼지 않은 공분산의 주성분을 사용한다.
+    """
+    dim = min(dim, vectors.shape[1])
+    # 행 수가 많아도 공분산(원본 차원 x 원본 차원)만 계산
+    covariance = vectors.T.astype(np.float64) @ vectors.astype(np.float64)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1][:dim]
+    return np.ascontiguousarray(eigenvectors[:, order], dtype=np.float32)
+
+
+def quantize(vectors: np.ndarray, compression: str):
+    """
+    벡터 압축
+
+    Returns:
+        (코드 행렬, 행별 스케일 또는 None)
+        int8은 행마다 최대 절댓값을 127로 맞추는 대칭 양자화 (값 = 코드 * 스케일)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if compression == "float32":
+        return vectors, None
+    if compression == "float16":
+        return vectors.astype(np.float16), None
+    if compression == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+        scales = scales.astype(np.float32)
+        safe_scales = np.where(scales > 0, scales, 1.0)[:, None]
+        codes = np.clip(np.rint(vectors / safe_scales), -127, 127).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"지원하지 않는 벡터 압축 방식: {compression} (가능: {', '.join(VECTOR_COMPRESSIONS)})")
+
+
+class QuantizedMatrix:
+    """압축된 문서 벡터 행렬 (메모리 맵 가능) - 질의 점수 계산 전용"""
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None):
+        """
+        Args:
+            codes: (행 수 x 차원) float16/int8/float32 코드
+            scales: int8 행별 스케일
+            components: PCA 투영 행렬 (원본 차원 x 축소 차원, 없으면 투영 안 함)
+        """
+        self.codes = codes
+        self.scales = scales
+        self.components = components
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        compression: str,
+        pca_dim: Optional[int] = None,
+        components: Optional[np.ndarray] = None
+    ) -> "QuantizedMatrix":
+        """L2 정규화된 float32 벡터로부터 압축 행렬 생성 (PCA 축소 후 다시 정규화)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if components is None and pca_dim and len(vectors) and pca_dim < vectors.shape[1]:
+            components = fit_pca(vectors, pca_dim)
+        if components is not None:
+            vectors = _normalize(vectors @ components)
+        codes, scales = quantize(vectors, compression)
+        return cls(codes, scales, components)
+
+    @property
+    def compression(self) -> str:
+        return {np.dtype(np.float16): "float16", np.dtype(np.int8): "int8"}.get(self.codes.dtype, "float32")
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1] if self.codes.ndim == 2 else 0
+
+    def nbytes(self) -> int:
+        """압축 벡터가 차지하는 바이트 수 (스케일 포함, 투영 행렬 제외)"""
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def project_query(self, query: np.ndarray) -> np.ndarray:
+        """질의 벡터를 압축 공간으로 투영 (정규화된 1차원 float32)"""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if self.components is not None:
+            query = _normalize(query.reshape(1, -1) @ self.components)[0]
+        return query
+
+    def score(self, query: np.ndarray, rows: Optional[np.ndarray] = None, block_rows: int = SCORE_BLOCK_ROWS) -> np.ndarray:
+        """
+        질의와 각 행의 근사 코사인 유사도
+
+        Args:
+            query: 정규화된 원본 차원 질의 벡터
+            rows: 점수를 계산할 행 (None이면 전체, 반환 순서도 rows 순서)
+        """
+        projected = self.project_query(query)
+        if self.codes.dtype == np.float32:
+            return (self.codes if rows is None else self.codes[rows]) @ projected
+
+        total = self.codes.shape[0] if rows is None else len(rows)
+        scores = np.empty(total, dtype=np.float32)
+        buffer = np.empty((min(block_rows, total), self.dim), dtype=np.float32)
+        for start in range(0, total, block_rows):
+            end = min(start + block_rows, total)
+            block = buffer[:end - start]
+            # 작은 버퍼에 float32로 올린 뒤 BLAS 행렬곱 (전체 행렬을 한꺼번에 변환하지 않음)
+            block[...] = self.codes[start:end] if rows is None else self.codes[rows[start:end]]
+            scores[start:end] = block @ projected
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall_report(
+    vectors: np.ndarray,
+    compact: QuantizedMatrix,
+    queries: Optional[np.ndarray] = None,
+    k: int = 10,
+    sample_size: int = 200,
+    seed: int = 0
+) -> Dict:
+    """
+    원본 float32 대비 압축 검색 recall@k, 메모리, 검색 시간 비교
+
+    Args:
+        vectors: 원본 L2 정규화 float32 행렬
+        compact: 같은 행 순서의 압축 행렬
+        queries: 질의 벡터 (None이면 저장된 벡터 중 sample_size개를 질의로 사용)
+        k: recall 계산 기준 상위 개수
+
+    Returns:
+        {'compression', 'dim', 'queries', 'k', f'recall@{k}', 'full_bytes', 'compact_bytes',
+         'memory_ratio', 'full_ms_per_query', 'compact_ms_per_query', 'speedup'}
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)
+        queries = vectors[picks]
+    queries = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+
+    hits = 0
+    full_seconds = 0.0
+    compact_seconds = 0.0
+    for query in queries:
+        started = time.perf_counter()
+        expected = _top_k(vectors @ query, k)
+        full_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        found = _top_k(compact.score(query), k)
+        compact_seconds += time.perf_counter() - started
+
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+
+    count = max(len(queries), 1)
+    full_bytes = int(vectors.nbytes)
+    compact_bytes = compact.nbytes()
+    return {
+        'compression': compact.compression,
+        'dim': compact.dim,
+        'queries': len(queries),
+        'k': k,
+        f'recall@{k}': round(hits / (count * min(k, len(vectors))), 4) if len(vectors) else 1.0,
+        'full_bytes': full_bytes,
+        'compact_bytes': compact_bytes,
+        'memory_ratio': round(full_bytes / compact_bytes, 2) if compact_bytes else None,
+        'full_ms_per_query': round(full_seconds * 1000 / count, 3),
+        'compact_ms_per_query': round(compact_seconds * 1000 / count, 3),
+        'speedup': round(full_seconds / compact_seconds, 2) if compact_seconds else None
+    }
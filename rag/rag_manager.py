@@ -2,19 +2,30 @@
 # -*- coding: utf-8 -*-
 """
 RAG Manager - LangChain 기반 페르소나 지식 관리
-각 페르소나별 독립적인 벡터스토어와 retriever 생성
+하나의 통합 벡터 인덱스에서 페르소나별 뷰와 retriever 생성
 """
 
 import os
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Optional
+import threading
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+from langchain_core.documents import Document
 from langchain_community.document_loaders import TextLoader, DirectoryLoader
+from rag.embedding_cache import CachedEmbeddings
+from rag.embedding_backends import resolve_backend, create_embeddings
+from rag.store_manifest import StoreManifest, file_sha256, chunk_ids
+from rag.retrieval_cache import RetrievalCache, resolve_cache_settings
+from rag.vector_index import PersonaVectorIndex, PersonaStoreView, faiss_available, resolve_retrieval_mode
+from rag.lazy_loader import BackgroundPersonaLoader
+from rag.context_selection import select_contexts
+from rag.async_retrieval import RetrievalExecutor
 
 def safe_print(msg):
     """Windows 인코딩 오류 방지용 안전한 print"""
@@ -29,50 +40,82 @@ def safe_print(msg):
 class RAGManager:
     """페르소나별 RAG 시스템 관리자"""
     
-    def __init__(self, use_openai_embeddings=True):
+    def __init__(self, use_openai_embeddings=True, retrieval_mode=None):
         """
         RAG 관리자 초기화
         
         Args:
-            use_openai_embeddings: True면 OpenAI (요구사항), False면 HuggingFace
+            use_openai_embeddings: True면 OpenAI (요구사항), False면 로컬 sentence-transformers
+                (RAG_EMBEDDING_BACKEND=openai|sentence_transformers|hashing 환경변수가 우선)
+            retrieval_mode: 'dense' (기본) 또는 'hybrid' (BM25 후보 + dense 재정렬)
+                (RAG_RETRIEVAL_MODE 환경변수가 우선)
         """
         self.data_dir = Path(__file__).parent / "data"
-        # Use new vector stores with updated content
-        self.vector_store_dir = Path(__file__).parent / "vector_stores_new"
-        self.vector_store_dir.mkdir(exist_ok=True)
-        
-        # OpenAI API 키 확인
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다!")
-        
-        # OpenAI Embeddings 사용 (요구사항)
+        # 모든 페르소나 청크를 담는 통합 벡터 인덱스 디렉토리
+        self.vector_store_dir = Path(__file__).parent / "vector_index" / "knowledge"
+        self.vector_store_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 페르소나별 빌드 정보 (원본 해시, 분할 설정, 임베딩 모델, 청크 ID)
+        self.manifest = StoreManifest(self.vector_store_dir / "manifest.json")
+        # 일괄 로드 중 인덱스 저장이 미뤄진 페르소나의 매니페스트 항목 (인덱스를 저장한 뒤 기록)
+        self._pending_manifest: Dict[str, Dict] = {}
+        self._index_lock = threading.Lock()
+        
+        # 임베딩 백엔드 선택 (RAG_EMBEDDING_BACKEND 환경변수 > use_openai_embeddings)
+        self.embedding_backend = resolve_backend(use_openai_embeddings)
         try:
-            print("[*] OpenAI Embeddings initializing...")
+            print(f"[*] Embeddings initializing ({self.embedding_backend})...")
         except:
             pass
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-ada-002"
-        )
+        base_embeddings, embedding_model = create_embeddings(self.embedding_backend)
         
-        # LLM (OpenAI GPT-4)
-        self.llm = ChatOpenAI(
-            model_name="gpt-4",
-            temperature=0.7,
-            max_tokens=500
-        )
+        # 청크 임베딩은 영구 캐시를 거쳐 변경된 청크만 다시 계산
+        self.embeddings = CachedEmbeddings(base_embeddings, model_name=embedding_model)
+        
+        # 통합 벡터 인덱스 (다른 임베딩 모델로 만든 인덱스는 버리고 새로 생성)
+        self.index = PersonaVectorIndex(self.vector_store_dir, embedding_model)
+        self.index.load()
+        
+        # LLM (OpenAI GPT-4) - query_persona 최초 호출 시 생성 (오프라인 임베딩만 쓸 때는 API 키 불필요)
+        self._llm = None
         
         # Text Splitter (요구사항: chunk_size=500, overlap=50)
+        self.chunk_size = 500
+        self.chunk_overlap = 50
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", ".", " ", ""]
         )
         
-        # 페르소나별 Vector Store & Retriever (LangChain 1.0 - qa_chains 제거)
+        # 페르소나별 인덱스 뷰 & Retriever (LangChain 1.0 - qa_chains 제거)
         self.vector_stores = {}
         self.retrievers = {}
         
+        # 페르소나별 질의응답 LCEL 체인 (최초 질의 시 1회 컴파일, 스토어 재로딩 시 폐기)
+        self.qa_chains = {}
+        self._chain_lock = threading.Lock()
+        
+        # 질의 임베딩 / 검색 결과 메모이제이션 (스토어 재로딩 시 페르소나 단위 무효화)
+        self.retrieval_cache = RetrievalCache(**resolve_cache_settings())
+        
+        # 검색 방식 (hybrid: 어휘 신호가 강한 질의는 임베딩 없이 BM25 결과 사용)
+        self.retrieval_mode = resolve_retrieval_mode(retrieval_mode)
+        self.retrieval_mode_counts = Counter()
+        
+        # 중복을 고려한 컨텍스트 선택 (k배수만큼 후보를 가져와 MMR로 k개 선택)
+        self.diversify_contexts = True
+        self.fetch_k_multiplier = 4
+        self.selection_stats = Counter()
+        self._stats_lock = threading.Lock()
+        
+        # 비동기 에이전트용 검색 스레드 풀 (이벤트 루프를 막지 않도록 동기 검색을 위임)
+        self.retrieval_executor = RetrievalExecutor()
+        
+        # 백그라운드 워밍업 로더 (start_background_loading 호출 시 생성)
+        self.loader = None
+        
         # 페르소나 정의 (실제 데이터 기반)
         self.personas = {
             # 고객 페르소나 (실제 데이터 기반)
@@ -95,21 +138,49 @@ class RAGManager:
         
         try:
             print("[OK] RAG Manager initialized")
-            print("   - Embeddings: OpenAI (text-embedding-ada-002)")
+            print(f"   - Embeddings: {self.embedding_backend} ({self.embeddings.model_name})")
             print("   - Chunk Size: 500, Overlap: 50")
-            print("   - Vector Store: ChromaDB")
+            print(f"   - Retrieval: {self.retrieval_mode}")
+            print(f"   - Vector Index: {'FAISS' if faiss_available() else 'NumPy'} ({self.index.count()} vectors)")
         except:
             pass
     
-    def load_persona_knowledge(self, persona_name: str) -> Optional[Chroma]:
+    @property
+    def llm(self) -> ChatOpenAI:
+        """답변 생성용 LLM (OpenAI GPT-4, 지연 생성)"""
+        if self._llm is None:
+            if not os.getenv("OPENAI_API_KEY"):
+                raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다!")
+            self._llm = ChatOpenAI(
+                model_name="gpt-4",
+                temperature=0.7,
+                max_tokens=500
+            )
+        return self._llm
+    
+    def _store_settings(self) -> Dict:
+        """스토어 재사용 여부를 결정하는 빌드 설정 (어떤 백엔드로 만들었는지 포함)"""
+        return {
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'embedding_backend': self.embedding_backend,
+            'embedding_model': self.embeddings.model_name
+        }
+    
+    def load_persona_knowledge(self, persona_name: str, force_rebuild: bool = False) -> Optional[PersonaStoreView]:
         """
         페르소나 지식 로드 및 벡터화
         
+        매니페스트와 비교하여 원본 파일이 바뀌지 않았으면 통합 인덱스의 기존 벡터를 재사용하고,
+        원본만 바뀌었으면 변경된 청크만 추가/삭제하며, 분할 설정이 바뀌었으면
+        해당 페르소나 문서를 전부 다시 생성한다.
+        
         Args:
             persona_name: 페르소나 이름 (예: 'customer_iphone_to_galaxy')
+            force_rebuild: True면 매니페스트와 관계없이 전체 재생성
         
         Returns:
-            Chroma 벡터 스토어 객체
+            페르소나 범위로 제한된 벡터 스토어 뷰
         """
         file_path = self.data_dir / f"{persona_name}.txt"
         
@@ -125,30 +196,54 @@ class RAGManager:
         
         # 텍스트 분할 (요구사항: chunk_size=500, overlap=50)
         chunks = self.text_splitter.split_documents(documents)
+        ids = chunk_ids(persona_name, [chunk.page_content for chunk in chunks])
         
         safe_print(f"    Split into {len(chunks)} chunks (500 chars/chunk, 50 overlap)")
         
-        # Vector Store 생성 (Chroma DB, OpenAI Embeddings)
-        vector_store_path = str(self.vector_store_dir / persona_name)
-        
-        # 기존 벡터 스토어가 있으면 로드, 없으면 생성
-        if (self.vector_store_dir / persona_name).exists():
-            safe_print(f"    Loading existing vector store...")
-            vector_store = Chroma(
-                persist_directory=vector_store_path,
-                embedding_function=self.embeddings
-            )
+        source_hash = file_sha256(file_path)
+        settings = self._store_settings()
+        entry = self.manifest.get(persona_name)
+        reusable = (
+            not force_rebuild
+            and self.index.count(persona_name) > 0
+            and entry is not None
+            and entry.get('settings') == settings
+        )
+        up_to_date = reusable and entry.get('source_sha256') == source_hash
+        
+        if up_to_date:
+            # 원본이 바뀌지 않았으면 인덱스에 있는 벡터를 그대로 사용
+            safe_print(f"    Using indexed vectors (up to date)...")
+        elif reusable:
+            # 원본만 바뀌었으면 변경된 청크만 반영
+            old_ids = set(entry.get('chunk_ids', []))
+            new_ids = set(ids)
+            removed = [chunk_id for chunk_id in entry.get('chunk_ids', []) if chunk_id not in new_ids]
+            added = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in old_ids]
+            
+            self.index.delete(removed)
+            cache_stats = self._index_chunks(persona_name, [chunk_id for chunk_id, _ in added], [chunk for _, chunk in added])
+            safe_print(f"    Source changed: +{len(added)} / -{len(removed)} chunks updated "
+                       f"(embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses)")
         else:
-            safe_print(f"    Creating new vector store...")
-            vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=vector_store_path
-            )
-            safe_print(f"    Vector store saved")
-        
-        # Vector Store 저장
+            # 인덱스에 없거나 설정이 바뀌었으면 페르소나 문서 전체 재생성
+            self.index.remove_persona(persona_name)
+            safe_print(f"    Indexing {len(chunks)} chunks...")
+            cache_stats = self._index_chunks(persona_name, ids, chunks)
+            safe_print(f"    Vectors indexed (embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+        
+        if not up_to_date:
+            self._record_build(persona_name, {
+                'source_file': file_path.name,
+                'source_sha256': source_hash,
+                'settings': settings,
+                'chunk_ids': ids
+            })
+        
+        # 페르소나 뷰 저장 (이전 인덱스 기준으로 캐시된 검색 결과는 폐기)
+        vector_store = self.index.persona_store(persona_name, self.embeddings)
         self.vector_stores[persona_name] = vector_store
+        self.retrieval_cache.invalidate(persona_name)
         
         # Retriever 생성 (별도 저장)
         retriever = vector_store.as_retriever(
@@ -157,25 +252,69 @@ class RAGManager:
         )
         self.retrievers[persona_name] = retriever
         
-        # QA Chain 생성 (LangChain 1.0 LCEL 방식)
-        # RAG Chain을 여기서 생성하지 않고, query_persona에서 생성
+        # 이전 retriever를 참조하는 QA 체인은 폐기 (다음 질의 시 다시 컴파일)
+        with self._chain_lock:
+            self.qa_chains.pop(persona_name, None)
         
-        safe_print(f"[OK] {self.personas[persona_name]} ready")
+        safe_print(f"[OK] {self.personas.get(persona_name, persona_name)} ready")
         safe_print(f"    - Chunks: {len(chunks)}")
         safe_print(f"    - Retriever: similarity search (k=3)")
-        safe_print(f"    - Vector store: {vector_store_path}")
+        safe_print(f"    - Vector index: {self.index.index_dir}")
         
         return vector_store
     
+    def _index_chunks(self, persona_name: str, ids: List[str], chunks: List[Document]) -> Dict:
+        """청크 임베딩 후 통합 인덱스에 추가 (임베딩 캐시 경유), 이번 색인의 캐시 적중/미스 수 반환"""
+        if not chunks:
+            return {'hits': 0, 'misses': 0}
+        texts = [chunk.page_content for chunk in chunks]
+        vectors, cache_stats = self.embeddings.embed_documents_with_stats(texts)
+        self.index.upsert(
+            ids=ids,
+            texts=texts,
+            metadatas=[dict(chunk.metadata, persona=persona_name) for chunk in chunks],
+            vectors=vectors,
+            personas=[[persona_name]] * len(chunks)
+        )
+        return cache_stats
+    
+    def _record_build(self, persona_name: str, entry: Dict):
+        """
+        인덱스 저장 후 매니페스트 기록
+        
+        일괄 로드 중에는 인덱스 저장이 _end_index_batch()까지 미뤄지므로 매니페스트 기록도 함께 미룬다
+        (중간에 종료되어도 매니페스트가 디스크에 없는 청크를 최신이라고 가리키지 않도록).
+        """
+        with self._index_lock:
+            self.index.save()
+            if self.index.batching:
+                self._pending_manifest[persona_name] = entry
+            else:
+                self.manifest.update(persona_name, entry)
+    
+    def _end_index_batch(self):
+        """일괄 로드 종료 - 미뤄둔 인덱스를 한 번 저장하고 매니페스트 기록"""
+        with self._index_lock:
+            if self.index.end_batch():
+                safe_print(f"[*] Vector index saved ({self.index.index_dir})")
+            if not self.index.batching:
+                for persona_name, entry in self._pending_manifest.items():
+                    self.manifest.update(persona_name, entry)
+                self._pending_manifest.clear()
+    
     def load_all_personas(self):
-        """모든 페르소나 지식 로드"""
+        """모든 페르소나 지식 로드 (인덱스는 마지막에 한 번만 저장)"""
         safe_print("\n" + "="*80)
         safe_print("[*] Loading all persona knowledge...")
         safe_print("="*80 + "\n")
         
-        for persona_name in self.personas.keys():
-            self.load_persona_knowledge(persona_name)
-            safe_print("")  # 빈 줄
+        self.index.begin_batch()
+        try:
+            for persona_name in self.personas.keys():
+                self.load_persona_knowledge(persona_name)
+                safe_print("")  # 빈 줄
+        finally:
+            self._end_index_batch()
         
         safe_print("="*80)
         safe_print(f"[OK] Total {len(self.vector_stores)} personas ready")
@@ -183,6 +322,26 @@ class RAGManager:
         safe_print(f"   - Retrievers: {len(self.retrievers)}")
         safe_print("="*80 + "\n")
     
+    def start_background_loading(self, max_workers: int = 4) -> BackgroundPersonaLoader:
+        """
+        모든 페르소나를 백그라운드에서 로드 (즉시 반환, 준비된 페르소나부터 사용 가능)
+        
+        인덱스는 모든 페르소나 로드가 끝난 뒤 한 번만 저장한다.
+        """
+        if self.loader is None:
+            self.index.begin_batch()
+            self.loader = BackgroundPersonaLoader(
+                self.load_persona_knowledge, self.personas.keys(), max_workers=max_workers,
+                on_complete=self._end_index_batch
+            ).start()
+        return self.loader
+    
+    def wait_for_personas(self, persona_names: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """지정한 페르소나의 백그라운드 로드 완료 대기 → {페르소나: 상태}"""
+        if self.loader is None:
+            return {name: 'ready' if name in self.retrievers else 'pending' for name in persona_names}
+        return self.loader.wait_for(persona_names, timeout=timeout)
+    
     def get_context(self, persona_type: str, query: str, k: int = 3) -> List[str]:
         """
         특정 페르소나의 관련 컨텍스트 검색 (요구사항 메서드명)
@@ -199,11 +358,124 @@ class RAGManager:
             safe_print(f"[!] Retriever not found for '{persona_type}'")
             return []
         
-        # Retriever를 사용하여 검색 (LangChain 1.0 - invoke 사용)
-        docs = self.retrievers[persona_type].invoke(query)
+        return self.retrieval_cache.cached_results(
+            persona_type, query, k,
+            lambda: self._retrieve(persona_type, query, k)
+        )
+    
+    async def aget_context(self, persona_type: str, query: str, k: int = 3) -> List[str]:
+        """
+        get_context의 비동기 버전 (에이전트 on_messages용)
         
-        # 상위 k개만 반환
-        return [doc.page_content for doc in docs[:k]]
+        질의 임베딩과 검색을 전용 스레드 풀에서 실행하므로 검색 중에도
+        같은 이벤트 루프의 다른 토론이 계속 진행된다.
+        """
+        return await self.retrieval_executor.run(self.get_context, persona_type, query, k)
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """질의 임베딩 (정규화된 질의 기준 LRU 캐시)"""
+        return self.retrieval_cache.cached_query_vector(
+            query, lambda: self.embeddings.embed_query(query)
+        )
+    
+    def _retrieve(self, persona_type: str, query: str, k: int, query_vector: Optional[List[float]] = None) -> List[str]:
+        """설정된 검색 방식으로 후보를 넉넉히 가져온 뒤 중복을 고려해 k개 선택"""
+        # 중복 제거는 2개 이상 고를 때만 의미가 있으므로 k=1이면 후보를 늘리지 않음
+        fetch_k = k * self.fetch_k_multiplier if self.diversify_contexts and k > 1 else k
+        
+        def get_query_vector():
+            return query_vector if query_vector is not None else self._embed_query(query)
+        
+        if self.retrieval_mode == "hybrid":
+            candidates, mode = self.index.hybrid_search(query, get_query_vector, k=fetch_k, persona=persona_type)
+        else:
+            candidates, mode = self.index.search(get_query_vector(), k=fetch_k, persona=persona_type), "dense"
+        with self._stats_lock:
+            self.retrieval_mode_counts[mode] += 1
+        
+        docs = self._select_contexts(persona_type, candidates, k)
+        return [doc.page_content for doc in docs]
+    
+    def _select_contexts(self, persona_type: str, candidates: List[Tuple[Document, float]], k: int) -> List[Document]:
+        """MMR + 근접 중복 제거로 프롬프트에 넣을 문서 선택 (절약한 토큰 수 보고)"""
+        if not self.diversify_contexts or k <= 1 or len(candidates) <= 1:
+            return [doc for doc, _ in candidates[:k]]
+        
+        try:
+            vectors = self.index.get_vectors([doc.metadata['doc_id'] for doc, _ in candidates])
+        except KeyError:
+            # 검색 후 백그라운드 재색인/증분 동기화로 후보 청크가 삭제됨 → 중복 제거 없이 상위 k개 사용
+            return [doc for doc, _ in candidates[:k]]
+        docs, report = select_contexts(candidates, vectors, k)
+        
+        with self._stats_lock:
+            self.selection_stats['turns'] += 1
+            self.selection_stats['duplicates_removed'] += report['duplicates_removed']
+            self.selection_stats['tokens_saved'] += report['tokens_saved']
+        safe_print(f"[*] '{persona_type}' 컨텍스트 선택: 후보 {report['candidates']}개 → {report['selected']}개 "
+                   f"(중복 {report['duplicates_removed']}개 제거, {report['tokens_saved']} 토큰 절약)")
+        return docs
+    
+    def get_cache_stats(self) -> Dict:
+        """검색 캐시 적중률 / 절약 시간 통계 (+ 검색 방식별 실행 횟수, 중복 제거로 절약한 토큰, 비동기 검색 풀)"""
+        return dict(
+            self.retrieval_cache.stats(),
+            retrieval_modes=dict(self.retrieval_mode_counts),
+            context_selection=dict(self.selection_stats),
+            async_retrieval=self.retrieval_executor.stats()
+        )
+    
+    def get_context_many(self, queries_by_persona: Dict[str, str], k: int = 3) -> Dict[str, List[str]]:
+        """
+        여러 페르소나의 컨텍스트를 한 번에 검색
+        
+        고유한 질의들을 한 번의 배치 요청으로 임베딩한 뒤 각 페르소나 스토어를
+        벡터로 직접 검색하므로, 라운드 전체의 근거 자료를 임베딩 왕복 1회로 가져올 수 있다.
+        
+        Args:
+            queries_by_persona: {페르소나 타입: 검색 질의}
+            k: 페르소나별 반환할 문서 수
+        
+        Returns:
+            {페르소나 타입: 관련 컨텍스트 문자열 리스트}
+        """
+        results = {}
+        pending = {}
+        for persona_type, query in queries_by_persona.items():
+            if persona_type not in self.vector_stores:
+                safe_print(f"[!] Retriever not found for '{persona_type}'")
+                results[persona_type] = []
+                continue
+            
+            hit, cached = self.retrieval_cache.lookup_results(persona_type, query, k)
+            if hit:
+                results[persona_type] = cached
+            else:
+                pending[persona_type] = query
+        
+        if not pending:
+            return results
+        
+        if self.retrieval_mode == "hybrid":
+            # 어휘 신호만으로 끝나는 질의가 있으므로 임베딩은 필요할 때 질의별로 (질의 캐시 공유)
+            for persona_type, query in pending.items():
+                started = time.perf_counter()
+                contexts = self._retrieve(persona_type, query, k)
+                self.retrieval_cache.store_results(persona_type, query, k, contexts, time.perf_counter() - started)
+                results[persona_type] = contexts
+            return results
+        
+        query_vectors = self.retrieval_cache.cached_query_vectors(
+            list(pending.values()), self.embeddings.embed_queries
+        )
+        
+        for persona_type, query in pending.items():
+            started = time.perf_counter()
+            contexts = self._retrieve(persona_type, query, k, query_vector=query_vectors[query])
+            self.retrieval_cache.store_results(persona_type, query, k, contexts, time.perf_counter() - started)
+            results[persona_type] = contexts
+        
+        return results
     
     def get_relevant_context(self, persona_name: str, query: str, k: int = 3) -> List[str]:
         """
@@ -220,33 +492,18 @@ class RAGManager:
         # get_context 호출 (동일 기능)
         return self.get_context(persona_name, query, k)
     
-    def query_persona(self, persona_name: str, question: str) -> Dict:
+    def _get_qa_chain(self, persona_name: str):
         """
-        특정 페르소나에게 질문 (LangChain 1.0 LCEL 방식)
-        
-        Args:
-            persona_name: 페르소나 이름
-            question: 질문
+        페르소나별 LCEL 체인 (최초 호출 시 컴파일 후 재사용)
         
-        Returns:
-            답변 및 출처 문서
+        검색은 체인 안에서 한 번만 수행하고, 검색 문서('docs')와 답변('answer')을 함께 출력
         """
-        if persona_name not in self.retrievers:
-            return {
-                'persona': persona_name,
-                'answer': f"페르소나 '{persona_name}'를 찾을 수 없습니다.",
-                'source_documents': []
-            }
-        
-        # 1. Retriever로 관련 문서 검색 (LangChain 1.0 - invoke 사용)
-        retriever = self.retrievers[persona_name]
-        docs = retriever.invoke(question)
-        
-        # 2. 컨텍스트 조합
-        context = "\n\n".join([doc.page_content for doc in docs])
-        
-        # 3. Prompt 생성 (LangChain 1.0 방식)
-        prompt_template = f"""당신은 {self.personas[persona_name]}입니다.
+        with self._chain_lock:
+            chain = self.qa_chains.get(persona_name)
+            if chain is not None:
+                return chain
+            
+            prompt = ChatPromptTemplate.from_template(f"""당신은 {self.personas[persona_name]}입니다.
 아래 제공된 실제 사용자 데이터를 바탕으로 질문에 답변하세요.
 통계와 실제 발언을 근거로 답변하되, 페르소나의 특성을 반영하세요.
 
@@ -262,27 +519,29 @@ class RAGManager:
 - 실제 사용자 발언 인용
 - 페르소나 톤 유지
 
-답변:"""
-        
-        prompt = ChatPromptTemplate.from_template(prompt_template)
-        
-        # 4. LCEL Chain 구성
-        def format_docs(docs):
-            return "\n\n".join(doc.page_content for doc in docs)
-        
-        rag_chain = (
-            {"context": retriever | format_docs, "question": RunnablePassthrough()}
-            | prompt
-            | self.llm
-            | StrOutputParser()
-        )
-        
-        # 5. Chain 실행
-        answer = rag_chain.invoke(question)
-        
+답변:""")
+            
+            def format_docs(inputs: Dict) -> str:
+                return "\n\n".join(doc.page_content for doc in inputs["docs"])
+            
+            answer_chain = (
+                RunnablePassthrough.assign(context=format_docs)
+                | prompt
+                | self.llm
+                | StrOutputParser()
+            )
+            chain = RunnableParallel(
+                docs=self.retrievers[persona_name],
+                question=RunnablePassthrough()
+            ).assign(answer=answer_chain)
+            
+            self.qa_chains[persona_name] = chain
+            return chain
+    
+    def _format_sources(self, persona_name: str, docs: List[Document]) -> Dict:
+        """출처 문서 요약 (query_persona / astream_persona 공용)"""
         return {
             'persona': self.personas[persona_name],
-            'answer': answer,
             'source_documents': [
                 doc.page_content[:200] + "..." 
                 for doc in docs
@@ -290,6 +549,55 @@ class RAGManager:
             'full_source_documents': docs
         }
     
+    def query_persona(self, persona_name: str, question: str) -> Dict:
+        """
+        특정 페르소나에게 질문 (LangChain 1.0 LCEL 방식)
+        
+        Args:
+            persona_name: 페르소나 이름
+            question: 질문
+        
+        Returns:
+            답변 및 출처 문서
+        """
+        if persona_name not in self.retrievers:
+            return {
+                'persona': persona_name,
+                'answer': f"페르소나 '{persona_name}'를 찾을 수 없습니다.",
+                'source_documents': []
+            }
+        
+        # 캐시된 체인 실행 (검색 1회, 검색 문서는 출처로 재사용)
+        result = self._get_qa_chain(persona_name).invoke(question)
+        
+        response = self._format_sources(persona_name, result['docs'])
+        response['answer'] = result['answer']
+        return response
+    
+    async def astream_persona(self, persona_name: str, question: str) -> AsyncIterator[Dict]:
+        """
+        특정 페르소나에게 질문 (답변 토큰을 생성되는 대로 스트리밍)
+        
+        Args:
+            persona_name: 페르소나 이름
+            question: 질문
+        
+        Yields:
+            {'type': 'sources', 'persona', 'source_documents', 'full_source_documents'} (검색 직후 1회)
+            {'type': 'token', 'content': 답변 토큰} (생성되는 대로)
+        """
+        if persona_name not in self.retrievers:
+            yield {'type': 'token', 'content': f"페르소나 '{persona_name}'를 찾을 수 없습니다."}
+            return
+        
+        async for chunk in self._get_qa_chain(persona_name).astream(question):
+            if 'docs' in chunk:
+                sources = self._format_sources(persona_name, chunk['docs'])
+                sources['type'] = 'sources'
+                yield sources
+            if chunk.get('answer'):
+                yield {'type': 'token', 'content': chunk['answer']}
+    
     def get_retriever(self, persona_name: str):
         """
         특정 페르소나의 retriever 가져오기
@@ -5,13 +5,27 @@ Real Review Data RAG Manager - 실제 리뷰 데이터를 페르소나별로 분
 """
 
 import os
-import json
+import time
+import threading
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
+from rag.embedding_cache import CachedEmbeddings
+from rag.embedding_backends import resolve_backend, create_embeddings
+from rag.store_manifest import StoreManifest
+from rag.retrieval_cache import RetrievalCache, resolve_cache_settings
+from rag.review_ledger import ReviewLedger, review_fingerprint
+from rag.review_store import ReviewStore
+from rag.vector_index import PersonaVectorIndex, PersonaStoreView, faiss_available, resolve_retrieval_mode
+from rag.review_cleaning import CLEANING_VERSION, clean_review_text, strip_html
+from rag.lazy_loader import BackgroundPersonaLoader
+from rag.context_selection import select_contexts
+from rag.async_retrieval import RetrievalExecutor
+from rag.prompt_budget import PromptBudget
+from rag.quantization import resolve_vector_compression
+from rag.streaming import find_structured_reviews, load_structured_reviews
 
 def safe_print(msg):
     """Windows 인코딩 오류 방지용 안전한 print"""
@@ -25,32 +39,54 @@ def safe_print(msg):
 class RealReviewRAGManager:
     """실제 리뷰 데이터 기반 RAG 시스템"""
     
-    def __init__(self, use_openai_embeddings=True):
-        """실제 리뷰 데이터 RAG 관리자 초기화"""
+    def __init__(self, use_openai_embeddings=True, retrieval_mode=None, vector_compression=None, pca_dim=None):
+        """
+        실제 리뷰 데이터 RAG 관리자 초기화
+        
+        Args:
+            use_openai_embeddings: True면 OpenAI, False면 로컬 sentence-transformers (RAG_EMBEDDING_BACKEND 우선)
+            retrieval_mode: 'dense' (기본) 또는 'hybrid' (BM25 후보 + dense 재정렬, RAG_RETRIEVAL_MODE 우선)
+            vector_compression: 검색용 벡터 저장 방식 'float32' (기본) | 'float16' | 'int8' (RAG_VECTOR_COMPRESSION 우선)
+            pca_dim: 검색용 벡터 PCA 축소 차원 (RAG_VECTOR_PCA_DIM 우선, None이면 축소 안 함)
+        """
         self.data_dir = Path(__file__).parent.parent / "data"
-        self.vector_store_dir = Path(__file__).parent / "vector_stores_real_reviews"
-        self.vector_store_dir.mkdir(exist_ok=True)
+        # 모든 페르소나 리뷰 청크를 담는 통합 벡터 인덱스 디렉토리 (리뷰는 한 번만 저장)
+        self.vector_store_dir = Path(__file__).parent / "vector_index" / "real_reviews"
+        self.vector_store_dir.mkdir(parents=True, exist_ok=True)
         
-        # OpenAI API 키 확인
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다!")
+        # 페르소나별 빌드 정보 (어떤 임베딩 백엔드/설정으로 만들었는지)
+        self.manifest = StoreManifest(self.vector_store_dir / "manifest.json")
+        # 인덱스에 반영된 리뷰 기록 (새 코퍼스가 들어오면 추가/변경/삭제된 리뷰만 증분 반영)
+        self.ledger = ReviewLedger(self.vector_store_dir / "reviews.json")
         
-        # OpenAI Embeddings 사용
+        # 임베딩 백엔드 선택 (RAG_EMBEDDING_BACKEND 환경변수 > use_openai_embeddings)
+        self.embedding_backend = resolve_backend(use_openai_embeddings)
         try:
-            safe_print("[*] OpenAI Embeddings initializing...")
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-ada-002",
-                api_key=os.getenv("OPENAI_API_KEY")
+            safe_print(f"[*] Embeddings initializing ({self.embedding_backend})...")
+            base_embeddings, embedding_model = create_embeddings(
+                self.embedding_backend, api_key=os.getenv("OPENAI_API_KEY")
             )
-            safe_print("   - Embeddings: OpenAI text-embedding-ada-002")
+            self.embeddings = CachedEmbeddings(base_embeddings, model_name=embedding_model)
+            safe_print(f"   - Embeddings: {self.embedding_backend} ({embedding_model})")
         except Exception as e:
-            safe_print(f"[!] OpenAI Embeddings 초기화 실패: {e}")
+            safe_print(f"[!] Embeddings 초기화 실패: {e}")
             raise
         
+        # 통합 벡터 인덱스 (다른 임베딩 모델로 만든 인덱스는 버리고 새로 생성)
+        # 압축 모드에서는 검색에 압축 벡터만 사용 (원본 행렬은 수정/recall 비교용으로만 보관)
+        self.vector_compression, self.pca_dim = resolve_vector_compression(vector_compression, pca_dim)
+        self.index = PersonaVectorIndex(
+            self.vector_store_dir, embedding_model,
+            compression=self.vector_compression, pca_dim=self.pca_dim
+        )
+        self.index.load()
+        
         # 텍스트 분할기 설정 (컨텍스트 길이 제한을 위해 매우 작게)
+        self.chunk_size = 200  # 300 → 200으로 더 축소
+        self.chunk_overlap = 20  # 30 → 20으로 축소
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=200,  # 300 → 200으로 더 축소
-            chunk_overlap=20,  # 30 → 20으로 축소
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", ".", "!", "?", " ", ""]
         )
@@ -101,89 +137,157 @@ class RealReviewRAGManager:
             }
         }
         
-        # Retriever 저장소
+        # 페르소나 인덱스 뷰 & Retriever 저장소
+        self.vector_stores = {}
         self.retrievers = {}
         
-        safe_print("   - Vector Store: ChromaDB")
+        # 질의 임베딩 / 검색 결과 메모이제이션 (스토어 재로딩 시 페르소나 단위 무효화)
+        self.retrieval_cache = RetrievalCache(**resolve_cache_settings())
+        
+        # 검색 방식 (hybrid: "폴드7", "S펜" 같은 제품 용어 질의는 임베딩 없이 BM25 결과 사용)
+        self.retrieval_mode = resolve_retrieval_mode(retrieval_mode)
+        self.retrieval_mode_counts = Counter()
+        
+        # 중복을 고려한 컨텍스트 선택 (k배수만큼 후보를 가져와 MMR로 k개 선택)
+        self.diversify_contexts = True
+        self.fetch_k_multiplier = 4
+        self.selection_stats = Counter()
+        self._stats_lock = threading.Lock()
+        
+        # 비동기 에이전트용 검색 스레드 풀 (이벤트 루프를 막지 않도록 동기 검색을 위임)
+        self.retrieval_executor = RetrievalExecutor()
+        
+        # 컨텍스트 길이 제한 (문자 수가 아닌 토큰 기준, 턴 단위 배분은 에이전트가 다시 수행)
+        self.prompt_budget = PromptBudget()
+        self.max_context_tokens = 400
+        
+        # 백그라운드 워밍업 로더 (start_background_loading 호출 시 생성)
+        self.loader = None
+        
+        # 리뷰 코퍼스 캐시 (한 번만 파싱하여 모든 페르소나가 공유)
+        self._review_data = None
+        self._review_source = None
+        self._persona_reviews = None
+        # 코퍼스 컬럼 저장소 (메타데이터 비트맵 인덱스, 코퍼스 로드 후 최초 사용 시 생성)
+        self._review_store = None
+        
+        # 백그라운드 워밍업 시 코퍼스 파싱/공유 청크 색인이 겹치지 않도록 보호
+        self._corpus_lock = threading.RLock()
+        self._index_lock = threading.Lock()
+        
+        # 청크를 페르소나끼리 공유하므로 설정(분할/정리/임베딩)이 바뀌면 인덱스 전체를 다시 생성
+        settings = self._store_settings()
+        if any(entry.get('settings') != settings for entry in self.manifest.entries.values()):
+            safe_print("   - Vector index built with different settings, reindexing all personas...")
+            self.index.clear()
+            for persona_name in list(self.manifest.entries):
+                self.manifest.remove(persona_name)
+        if self.index.count() == 0 and (self.ledger.reviews or self.ledger.source):
+            # 인덱스가 비었으면 기록도 무효 (다음 색인에서 다시 채움)
+            self.ledger.clear()
+            self.ledger.save()
+        
+        safe_print(f"   - Vector Index: {'FAISS' if faiss_available() else 'NumPy'} ({self.index.count()} vectors)")
+        safe_print(f"   - Retrieval: {self.retrieval_mode}")
     
-    def load_real_review_data(self) -> Dict:
-        """실제 리뷰 데이터 로드"""
-        review_files = list(self.data_dir.glob("structured_reviews_*.json"))
-        if not review_files:
-            safe_print("[!] 구조화된 리뷰 파일을 찾을 수 없습니다.")
-            return {}
-        
-        # 가장 최신 파일 사용
-        latest_file = max(review_files, key=lambda x: x.stat().st_mtime)
-        safe_print(f"[*] Loading real review data from {latest_file.name}")
-        
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        safe_print(f"   - iPhone reviews: {len(data.get('iphone_reviews', []))}")
-        safe_print(f"   - Galaxy reviews: {len(data.get('galaxy_reviews', []))}")
-        
-        return data
+    def load_real_review_data(self, force_reload: bool = False) -> Dict:
+        """실제 리뷰 데이터 로드 (최초 1회만 파싱하고 이후에는 메모리 캐시 사용)"""
+        with self._corpus_lock:
+            if self._review_data is not None and not force_reload:
+                return self._review_data
+            
+            # 가장 최신 structured_reviews_*.json 파일 또는 완료된 JSONL 샤드 디렉토리 사용
+            latest_source = find_structured_reviews(self.data_dir)
+            if latest_source is None:
+                safe_print("[!] 구조화된 리뷰 파일을 찾을 수 없습니다.")
+                return {}
+            
+            safe_print(f"[*] Loading real review data from {latest_source.name}")
+            
+            data = load_structured_reviews(latest_source)
+            
+            safe_print(f"   - iPhone reviews: {len(data.get('iphone_reviews', []))}")
+            safe_print(f"   - Galaxy reviews: {len(data.get('galaxy_reviews', []))}")
+            
+            # 리뷰 ID는 플랫폼별로 매겨지므로 플랫폼을 붙여 코퍼스 전체에서 고유한 키 부여
+            # (입력 순서와 무관한 review_id가 있으면 사용 → 새 파일에서도 같은 리뷰는 같은 키)
+            for platform in ('iphone', 'galaxy'):
+                for i, review in enumerate(data.get(f'{platform}_reviews', [])):
+                    review['review_key'] = f"{platform}:{review.get('review_id') or review.get('id', f'review_{i}')}"
+            
+            self._review_data = data
+            self._review_source = latest_source.name
+            # 코퍼스가 바뀌면 컬럼 저장소와 파티션도 다시 생성
+            self._review_store = None
+            self._persona_reviews = None
+            return data
     
     def classify_reviews_by_persona(self, reviews: List[Dict], persona_name: str) -> List[Dict]:
         """리뷰를 페르소나별로 분류"""
         if persona_name not in self.persona_mapping:
             return []
         
-        persona_config = self.persona_mapping[persona_name]
-        classified_reviews = []
-        
-        for review in reviews:
-            # 기본 조건 확인
-            if review.get('conversion_direction') not in persona_config['conversion_direction']:
-                continue
-            
-            if review.get('conversion_level') not in persona_config['conversion_level']:
-                continue
-            
-            # 키워드 매칭 확인
-            review_text = review.get('review', '').lower()
-            if persona_config['keywords']:
-                keyword_match = any(keyword.lower() in review_text for keyword in persona_config['keywords'])
-                if not keyword_match:
-                    continue
-            
-            # 감정 매칭 확인
-            if persona_config['sentiment']:
-                sentiment = review.get('sentiment', 'neutral')
-                if sentiment not in persona_config['sentiment']:
-                    continue
+        store = ReviewStore(reviews)
+        return store.select(store.persona_mask(self.persona_mapping[persona_name]))
+    
+    def partition_reviews_by_persona(self, reviews: List[Dict]) -> Dict[str, List[Dict]]:
+        """컬럼 저장소 비트맵 연산으로 모든 페르소나 파티션 생성"""
+        return ReviewStore(reviews).partition(self.persona_mapping)
+    
+    def get_review_store(self) -> Optional[ReviewStore]:
+        """공유 코퍼스의 컬럼 저장소 (분포 통계 / 임의 조건 조회용, 코퍼스가 없으면 None)"""
+        with self._corpus_lock:
+            if self._review_store is None:
+                review_data = self.load_real_review_data()
+                if not review_data:
+                    return None
+                
+                self._review_store = ReviewStore(
+                    review_data.get('iphone_reviews', []) + review_data.get('galaxy_reviews', [])
+                )
+            return self._review_store
+    
+    def get_persona_reviews(self, persona_name: str) -> List[Dict]:
+        """공유 코퍼스에서 페르소나 파티션 반환 (최초 호출 시 전체 파티션 생성)"""
+        with self._corpus_lock:
+            if self._persona_reviews is None:
+                store = self.get_review_store()
+                if store is None:
+                    return []
+                
+                self._persona_reviews = store.partition(self.persona_mapping)
             
-            classified_reviews.append(review)
-        
-        return classified_reviews
+            return self._persona_reviews.get(persona_name, [])
     
     def create_persona_documents(self, reviews: List[Dict], persona_name: str) -> List[Document]:
-        """페르소나별 문서 생성"""
+        """페르소나별 문서 생성 (정리된 텍스트만 색인하고 원문은 메타데이터에 보관)"""
         documents = []
         
         for i, review in enumerate(reviews):
-            # 리뷰 텍스트 정리
             review_text = review.get('review', '')
             if not review_text:
                 continue
             
-            # HTML 태그 제거
-            import re
-            clean_text = re.sub(r'<[^>]+>', '', review_text)
-            clean_text = re.sub(r'&[^;]+;', '', clean_text)
+            # 리뷰 텍스트 정리 (여러 페르소나가 공유하는 리뷰는 한 번만 정리)
+            if 'clean_review' not in review:
+                review['clean_review'] = clean_review_text(strip_html(review_text))
+            clean_text = review['clean_review']
+            if not clean_text:
+                continue
             
             # 메타데이터 추가
             metadata = {
                 'persona': persona_name,
-                'review_id': review.get('id', f'review_{i}'),
+                'review_id': review.get('review_id') or review.get('id', f'review_{i}'),
+                'review_key': review.get('review_key', f'review_{i}'),
                 'author': review.get('author', ''),
                 'conversion_direction': review.get('conversion_direction', ''),
                 'conversion_level': review.get('conversion_level', ''),
                 'sentiment': review.get('sentiment', 'neutral'),
                 'language': review.get('language', 'ko'),
                 'engagement': review.get('engagement', 0),
-                'video_title': review.get('video_title', '')
+                'video_title': review.get('video_title', ''),
+                'original_review': review_text
             }
             
             # 문서 생성
@@ -195,52 +299,56 @@ class RealReviewRAGManager:
         
         return documents
     
-    def load_persona_real_reviews(self, persona_name: str) -> Optional[Chroma]:
+    def _store_settings(self) -> Dict:
+        """스토어 재사용 여부를 결정하는 빌드 설정 (어떤 백엔드로 만들었는지 포함)"""
+        return {
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'cleaning_version': CLEANING_VERSION,
+            'embedding_backend': self.embedding_backend,
+            'embedding_model': self.embeddings.model_name
+        }
+    
+    def load_persona_real_reviews(self, persona_name: str) -> Optional[PersonaStoreView]:
         """페르소나별 실제 리뷰 데이터 로드 및 벡터화"""
         safe_print(f"[*] Loading real reviews for {persona_name}...")
         
-        # 실제 리뷰 데이터 로드
-        review_data = self.load_real_review_data()
-        if not review_data:
-            return None
-        
-        # 모든 리뷰 수집
-        all_reviews = []
-        all_reviews.extend(review_data.get('iphone_reviews', []))
-        all_reviews.extend(review_data.get('galaxy_reviews', []))
-        
-        # 페르소나별 분류
-        classified_reviews = self.classify_reviews_by_persona(all_reviews, persona_name)
-        safe_print(f"   - Classified {len(classified_reviews)} reviews for {persona_name}")
-        
-        if not classified_reviews:
-            safe_print(f"[!] No reviews found for {persona_name}")
-            return None
-        
-        # 문서 생성
-        documents = self.create_persona_documents(classified_reviews, persona_name)
-        
-        # 텍스트 분할
-        chunks = self.text_splitter.split_documents(documents)
-        safe_print(f"   - Split into {len(chunks)} chunks")
-        
-        # Vector Store 생성
-        vector_store_path = str(self.vector_store_dir / persona_name)
-        
-        if (self.vector_store_dir / persona_name).exists():
-            safe_print(f"   - Loading existing vector store...")
-            vector_store = Chroma(
-                persist_directory=vector_store_path,
-                embedding_function=self.embeddings
-            )
+        # 새 구조화 리뷰 파일이 있으면 색인된 페르소나에 변경분만 먼저 반영
+        self._sync_if_new_data()
+        
+        # 다른 설정으로 만들어졌거나 인덱스에 없는 페르소나만 다시 색인
+        settings = self._store_settings()
+        entry = self.manifest.get(persona_name)
+        if entry is not None and entry.get('settings') == settings and self.index.count(persona_name) > 0:
+            safe_print(f"   - Using indexed vectors ({self.index.count(persona_name)} chunks)")
+            if 'stats' not in entry and self.load_real_review_data():
+                # 통계 도입 이전 매니페스트는 재색인 없이 통계만 보충
+                self.manifest.update(persona_name, dict(
+                    entry, stats=self._compute_persona_stats(persona_name)
+                ))
         else:
-            safe_print(f"   - Creating new vector store...")
-            vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=vector_store_path
-            )
-            safe_print(f"   - Vector store saved")
+            # 공유 코퍼스에서 페르소나별 분류 결과 조회
+            if not self.load_real_review_data():
+                return None
+            
+            classified_reviews = self.get_persona_reviews(persona_name)
+            safe_print(f"   - Classified {len(classified_reviews)} reviews for {persona_name}")
+            
+            if not classified_reviews:
+                safe_print(f"[!] No reviews found for {persona_name}")
+                return None
+            
+            if not self._index_persona_reviews(persona_name, classified_reviews):
+                safe_print(f"[!] No reviews left after cleaning for {persona_name}")
+                return None
+            self.manifest.update(persona_name, {
+                'settings': settings,
+                'stats': self._compute_persona_stats(persona_name)
+            })
+        
+        vector_store = self.index.persona_store(persona_name, self.embeddings)
+        self.vector_stores[persona_name] = vector_store
+        self.retrieval_cache.invalidate(persona_name)
         
         # Retriever 생성
         retriever = vector_store.as_retriever(
@@ -251,70 +359,230 @@ class RealReviewRAGManager:
         
         return vector_store
     
+    def _index_persona_reviews(self, persona_name: str, reviews: List[Dict]) -> int:
+        """
+        페르소나 리뷰를 통합 인덱스에 반영
+        
+        청크 ID는 리뷰 키 기반이므로 다른 페르소나가 이미 색인한 리뷰는
+        소속 페르소나만 추가하고, 처음 보는 청크만 임베딩한다.
+        
+        Returns:
+            페르소나에 색인된 청크 수
+        """
+        documents = self.create_persona_documents(reviews, persona_name)
+        chunks = self.text_splitter.split_documents(documents)
+        safe_print(f"   - Split into {len(chunks)} chunks")
+        
+        ids = []
+        occurrences = {}
+        for chunk in chunks:
+            review_key = chunk.metadata['review_key']
+            occurrence = occurrences.get(review_key, 0)
+            occurrences[review_key] = occurrence + 1
+            ids.append(f"{review_key}:{occurrence}")
+        
+        with self._index_lock:
+            self.index.remove_persona(persona_name)
+            shared = [chunk_id for chunk_id in ids if self.index.contains(chunk_id)]
+            self.index.add_persona(shared, persona_name)
+            new_chunks = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if not self.index.contains(chunk_id)]
+        
+        # 임베딩은 잠금 밖에서 수행 (다른 페르소나 색인을 막지 않도록)
+        texts = [chunk.page_content for _, chunk in new_chunks]
+        vectors, cache_stats = self.embeddings.embed_documents_with_stats(texts)
+        
+        with self._index_lock:
+            # 그 사이 다른 페르소나가 같은 청크를 색인했으면 소속만 추가
+            self.index.add_persona([chunk_id for chunk_id, _ in new_chunks], persona_name)
+            fresh = [i for i, (chunk_id, _) in enumerate(new_chunks) if not self.index.contains(chunk_id)]
+            if fresh:
+                self.index.upsert(
+                    ids=[new_chunks[i][0] for i in fresh],
+                    texts=[texts[i] for i in fresh],
+                    # 여러 페르소나가 공유하는 문서이므로 소속 페르소나는 인덱스가 관리
+                    metadatas=[
+                        {key: value for key, value in new_chunks[i][1].metadata.items() if key != 'persona'}
+                        for i in fresh
+                    ],
+                    vectors=[vectors[i] for i in fresh],
+                    personas=[[persona_name]] * len(fresh)
+                )
+            # 일괄 로드 중이면 인덱스/리뷰 기록 저장은 _end_index_batch()에서 한 번만
+            self.index.save()
+            
+            for review in reviews:
+                if 'review_key' in review:
+                    self.ledger.record(review['review_key'], review_fingerprint(review), occurrences.get(review['review_key'], 0))
+            if not self.index.batching:
+                self.ledger.save()
+        
+        safe_print(f"   - Indexed {len(new_chunks)} new / {len(shared)} shared chunks "
+                   f"(embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+        return len(chunks)
+    
+    def _sync_if_new_data(self):
+        """마지막으로 반영한 코퍼스보다 새로운 구조화 리뷰가 있으면 증분 동기화"""
+        latest_source = find_structured_reviews(self.data_dir)
+        if latest_source is None or latest_source.name == self.ledger.source:
+            return
+        with self._corpus_lock:
+            # 다른 스레드가 먼저 동기화했으면 생략
+            if latest_source.name != self.ledger.source:
+                self.sync_review_data()
+    
+    def sync_review_data(self) -> Dict:
+        """
+        최신 구조화 리뷰를 이미 색인된 페르소나에 증분 반영
+        
+        리뷰 기록(지문)과 비교해 추가/변경된 리뷰만 페르소나 분류 → 분할 → 임베딩하여 upsert하고,
+        코퍼스에서 사라진 리뷰의 청크는 삭제한 뒤 tombstone으로 남긴다.
+        아직 색인되지 않은 페르소나는 건드리지 않는다 (처음 로드할 때 최신 코퍼스로 전체 색인).
+        
+        Returns:
+            {'source', 'added', 'updated', 'removed', 'chunks_upserted', 'chunks_deleted', 'personas'}
+        """
+        with self._corpus_lock:
+            if not self.load_real_review_data(force_reload=True):
+                return {}
+            store = self.get_review_store()
+            
+            fingerprints = {review['review_key']: review_fingerprint(review) for review in store.reviews}
+            added, changed, removed = self.ledger.diff(fingerprints)
+            
+            settings = self._store_settings()
+            built = [
+                persona_name for persona_name in self.persona_mapping
+                if (self.manifest.get(persona_name) or {}).get('settings') == settings
+            ]
+            
+            # 추가/변경된 리뷰만 모아 페르소나 분류 (색인된 페르소나 기준)
+            delta_keys = set(added) | set(changed)
+            delta = ReviewStore([review for review in store.reviews if review['review_key'] in delta_keys])
+            review_personas = defaultdict(list)
+            for persona_name in built:
+                for review in delta.select(delta.persona_mask(self.persona_mapping[persona_name])):
+                    review_personas[review['review_key']].append(persona_name)
+            
+            documents = self.create_persona_documents(
+                [review for review in delta.reviews if review['review_key'] in review_personas], persona_name=''
+            )
+            chunks = self.text_splitter.split_documents(documents)
+            ids, occurrences = [], Counter()
+            for chunk in chunks:
+                review_key = chunk.metadata['review_key']
+                ids.append(f"{review_key}:{occurrences[review_key]}")
+                occurrences[review_key] += 1
+            texts = [chunk.page_content for chunk in chunks]
+            vectors = self.embeddings.embed_documents(texts) if texts else []
+            
+            # 변경/삭제된 리뷰의 이전 청크 (모든 페르소나에서 제거)
+            stale_ids = [chunk_id for review_key in changed + removed for chunk_id in self.ledger.chunk_ids(review_key)]
+            
+            with self._index_lock:
+                deleted = self.index.delete(stale_ids)
+                self.index.upsert(
+                    ids=ids,
+                    texts=texts,
+                    metadatas=[
+                        {key: value for key, value in chunk.metadata.items() if key != 'persona'}
+                        for chunk in chunks
+                    ],
+                    vectors=vectors,
+                    personas=[review_personas[chunk.metadata['review_key']] for chunk in chunks]
+                )
+                # 코퍼스 기준(ledger.source)을 바로 기록하므로 일괄 로드 중이어도 즉시 저장
+                self.index.save(force=True)
+                
+                for review in delta.reviews:
+                    self.ledger.record(review['review_key'], fingerprints[review['review_key']], occurrences[review['review_key']])
+                self.ledger.tombstone(removed)
+                self.ledger.source = self._review_source
+                self.ledger.save()
+            
+            # 영향받은 페르소나 통계/검색 캐시 갱신 (이전 청크를 지웠으면 모든 색인 페르소나가 대상)
+            affected = set(built) if deleted else {name for names in review_personas.values() for name in names}
+            for persona_name in affected:
+                entry = self.manifest.get(persona_name)
+                self.manifest.update(persona_name, dict(entry, stats=self._compute_persona_stats(persona_name)))
+                self.retrieval_cache.invalidate(persona_name)
+            
+            persona_counts = Counter(name for names in review_personas.values() for name in names)
+            summary = {
+                'source': self._review_source,
+                'added': len(added),
+                'updated': len(changed),
+                'removed': len(removed),
+                'chunks_upserted': len(ids),
+                'chunks_deleted': deleted,
+                'personas': dict(persona_counts)
+            }
+            safe_print(f"[*] Synced {summary['source']}: +{len(added)} / ~{len(changed)} / -{len(removed)} reviews "
+                       f"({len(ids)} chunks upserted, {deleted} deleted, {len(affected)} personas updated)")
+            return summary
+    
+    def _end_index_batch(self):
+        """일괄 로드 종료 - 미뤄둔 인덱스와 리뷰 기록을 한 번 저장"""
+        with self._index_lock:
+            if self.index.end_batch():
+                safe_print(f"[*] Vector index saved ({self.index.index_dir})")
+            if not self.index.batching:
+                self.ledger.save()
+    
     def load_all_personas_real_reviews(self):
-        """모든 페르소나의 실제 리뷰 데이터 로드"""
+        """모든 페르소나의 실제 리뷰 데이터 로드 (인덱스는 마지막에 한 번만 저장)"""
         safe_print("[*] Loading real review data for all personas...")
         
-        for persona_name in self.persona_mapping.keys():
-            try:
-                self.load_persona_real_reviews(persona_name)
-            except Exception as e:
-                safe_print(f"[!] Failed to load {persona_name}: {e}")
+        self.index.begin_batch()
+        try:
+            for persona_name in self.persona_mapping.keys():
+                try:
+                    self.load_persona_real_reviews(persona_name)
+                except Exception as e:
+                    safe_print(f"[!] Failed to load {persona_name}: {e}")
+        finally:
+            self._end_index_batch()
         
         safe_print(f"[*] Loaded {len(self.retrievers)} persona retrievers")
     
+    def start_background_loading(self, max_workers: int = 4) -> BackgroundPersonaLoader:
+        """
+        모든 페르소나를 백그라운드에서 로드 (즉시 반환, 준비된 페르소나부터 사용 가능)
+        
+        인덱스와 리뷰 기록은 모든 페르소나 로드가 끝난 뒤 한 번만 저장한다.
+        """
+        if self.loader is None:
+            self.index.begin_batch()
+            self.loader = BackgroundPersonaLoader(
+                self.load_persona_real_reviews, self.persona_mapping.keys(), max_workers=max_workers,
+                on_complete=self._end_index_batch
+            ).start()
+        return self.loader
+    
+    def wait_for_personas(self, persona_names: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """지정한 페르소나의 백그라운드 로드 완료 대기 → {페르소나: 상태}"""
+        if self.loader is None:
+            return {name: 'ready' if name in self.retrievers else 'pending' for name in persona_names}
+        return self.loader.wait_for(persona_names, timeout=timeout)
+    
     def clean_review_text(self, text: str) -> str:
-        """리뷰 텍스트 정리 - 이상한 문자 제거 (극도로 강화된 버전)"""
-        import re
-        
-        # 기본 정리
-        text = text.strip()
-        
-        # 1. 이상한 문자 패턴 제거 (극도로 강력하게)
-        # 모든 특수문자와 이상한 패턴 제거
-        text = re.sub(r'[^\w\s가-힣.,!?()[\]{}"\'-]', '', text)
-        
-        # 2. 연속된 공백 정리
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 3. 의미없는 짧은 텍스트 제거 (20자 미만)
-        if len(text) < 20:
-            return ""
-        
-        # 4. 이상한 패턴 제거 (극도로 강력한 패턴)
-        weird_patterns = [
-            r'[a-zA-Z]+\s+[가-힣]+',  # 영어+한글 혼합
-            r'[가-힣]+\s+[a-zA-Z]+',  # 한글+영어 혼합
-            r'[^\w\s가-힣.,!?()[\]{}"\'-]{1,}',  # 연속된 특수문자
-            r'\b\w{1,2}\b',  # 1-2글자 단어 제거
-            r'[가-힣]{1,2}\s+[가-힣]{1,2}',  # 짧은 한글 조합
-            r'[a-zA-Z]{1,3}',  # 짧은 영어 단어 제거
-            r'[0-9]+',  # 숫자 제거
-            r'[^\w\s가-힣.,!?()[\]{}"\'-]',  # 모든 특수문자 제거
-        ]
-        
-        for pattern in weird_patterns:
-            text = re.sub(pattern, '', text)
-        
-        # 5. 의미있는 문장만 남기기
-        sentences = text.split('.')
-        clean_sentences = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            # 더 엄격한 조건: 15자 이상, 특수문자 없음, 의미있는 내용
-            if (len(sentence) >= 15 and 
-                not re.search(r'[^\w\s가-힣.,!?()[\]{}"\'-]', sentence) and
-                len(sentence.split()) >= 3):  # 최소 3개 단어
-                clean_sentences.append(sentence)
-        
-        # 6. 최종 정리
-        text = '. '.join(clean_sentences).strip()
-        
-        # 7. 최종 검증: 20자 이상이고 의미있는 내용인지 확인
-        if len(text) >= 20 and len(text.split()) >= 5:
-            return text
-        else:
-            return ""
+        """리뷰 텍스트 정리 (색인 시 사용하는 파이프라인과 동일)"""
+        return clean_review_text(text)
+    
+    def _format_contexts(self, persona_name: str, docs: List[Document]) -> List[str]:
+        """검색된 리뷰 문서를 토큰 예산 안의 컨텍스트 문자열로 변환"""
+        contexts = []
+        for doc in docs:
+            # 색인 시 이미 정리된 텍스트이므로 그대로 사용
+            context = f"[실제 사용자 리뷰] {doc.page_content}"
+            if doc.metadata.get('author'):
+                context += f" - {doc.metadata['author']}"
+            contexts.append(context)
+        
+        # 토큰 경계에서 자르고, 의미 있는 길이가 남지 않으면 제외
+        contexts, report = self.prompt_budget.fit_contexts(contexts, self.max_context_tokens)
+        
+        safe_print(f"[*] '{persona_name}' 컨텍스트 로드: {len(contexts)}개 문서, 총 {report['tokens']}토큰")
+        return contexts
     
     def get_context(self, persona_name: str, query: str, k: int = 1) -> List[str]:
         """실제 리뷰에서 관련 컨텍스트 검색 (극도로 제한된 컨텍스트)"""
@@ -323,80 +591,176 @@ class RealReviewRAGManager:
             return []
         
         try:
-            # Retriever를 사용하여 검색 (1개 문서만 가져옴)
-            docs = self.retrievers[persona_name].invoke(query)
-            
-            # 상위 1개만 반환하고 극도로 제한된 길이
-            contexts = []
-            total_length = 0
-            max_context_length = 300  # 최대 컨텍스트 길이를 300자로 극도 제한
-            
-            for doc in docs[:1]:  # 1개만 가져옴
-                context = f"[실제 사용자 리뷰] {doc.page_content}"
-                if doc.metadata.get('author'):
-                    context += f" - {doc.metadata['author']}"
-                
-                # 텍스트 정리 적용
-                cleaned_context = self.clean_review_text(context)
-                if cleaned_context:  # 정리된 텍스트가 유효한 경우만 추가
-                    # 길이 제한 확인
-                    if total_length + len(cleaned_context) <= max_context_length:
-                        contexts.append(cleaned_context)
-                        total_length += len(cleaned_context)
-                    else:
-                        # 남은 공간에 맞게 잘라서 추가
-                        remaining_space = max_context_length - total_length
-                        if remaining_space > 50:  # 최소 50자 이상은 남겨야 의미있음
-                            contexts.append(cleaned_context[:remaining_space] + "...")
-                        break
-            
-            safe_print(f"[*] '{persona_name}' 컨텍스트 로드: {len(contexts)}개 문서, 총 {total_length}자")
-            return contexts
+            return self.retrieval_cache.cached_results(
+                persona_name, query, k,
+                lambda: self._retrieve(persona_name, query, k)
+            )
             
         except Exception as e:
             safe_print(f"[!] Search failed for {persona_name}: {e}")
             return []
     
-    def get_persona_stats(self, persona_name: str) -> Dict:
-        """페르소나별 통계 정보"""
-        if persona_name not in self.retrievers:
-            return {}
+    async def aget_context(self, persona_name: str, query: str, k: int = 1) -> List[str]:
+        """
+        get_context의 비동기 버전 (에이전트 on_messages용)
+        
+        질의 임베딩과 검색을 전용 스레드 풀에서 실행하므로 검색 중에도
+        같은 이벤트 루프의 다른 토론이 계속 진행된다.
+        """
+        return await self.retrieval_executor.run(self.get_context, persona_name, query, k)
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """질의 임베딩 (정규화된 질의 기준 LRU 캐시)"""
+        return self.retrieval_cache.cached_query_vector(
+            query, lambda: self.embeddings.embed_query(query)
+        )
+    
+    def _retrieve(self, persona_name: str, query: str, k: int, query_vector: Optional[List[float]] = None) -> List[str]:
+        """설정된 검색 방식으로 후보를 넉넉히 가져온 뒤 중복을 고려해 k개 선택"""
+        # 중복 제거는 2개 이상 고를 때만 의미가 있으므로 k=1이면 후보를 늘리지 않음
+        fetch_k = k * self.fetch_k_multiplier if self.diversify_contexts and k > 1 else k
+        
+        def get_query_vector():
+            return query_vector if query_vector is not None else self._embed_query(query)
+        
+        if self.retrieval_mode == "hybrid":
+            candidates, mode = self.index.hybrid_search(query, get_query_vector, k=fetch_k, persona=persona_name)
+        else:
+            candidates, mode = self.index.search(get_query_vector(), k=fetch_k, persona=persona_name), "dense"
+        with self._stats_lock:
+            self.retrieval_mode_counts[mode] += 1
+        
+        docs = self._select_contexts(persona_name, candidates, k)
+        return self._format_contexts(persona_name, docs)
+    
+    def _select_contexts(self, persona_name: str, candidates: List[Tuple[Document, float]], k: int) -> List[Document]:
+        """MMR + 근접 중복 제거로 프롬프트에 넣을 문서 선택 (절약한 토큰 수 보고)"""
+        if not self.diversify_contexts or k <= 1 or len(candidates) <= 1:
+            return [doc for doc, _ in candidates[:k]]
         
         try:
-            # 벡터 스토어에서 문서 수 확인
-            vector_store_path = str(self.vector_store_dir / persona_name)
-            if not (self.vector_store_dir / persona_name).exists():
-                return {}
+            vectors = self.index.get_vectors([doc.metadata['doc_id'] for doc, _ in candidates])
+        except KeyError:
+            # 검색 후 백그라운드 재색인/증분 동기화로 후보 청크가 삭제됨 → 중복 제거 없이 상위 k개 사용
+            return [doc for doc, _ in candidates[:k]]
+        docs, report = select_contexts(candidates, vectors, k)
+        
+        with self._stats_lock:
+            self.selection_stats['turns'] += 1
+            self.selection_stats['duplicates_removed'] += report['duplicates_removed']
+            self.selection_stats['tokens_saved'] += report['tokens_saved']
+        safe_print(f"[*] '{persona_name}' 컨텍스트 선택: 후보 {report['candidates']}개 → {report['selected']}개 "
+                   f"(중복 {report['duplicates_removed']}개 제거, {report['tokens_saved']} 토큰 절약)")
+        return docs
+    
+    def get_cache_stats(self) -> Dict:
+        """검색 캐시 적중률 / 절약 시간 통계 (+ 검색 방식별 실행 횟수, 중복 제거로 절약한 토큰, 비동기 검색 풀)"""
+        return dict(
+            self.retrieval_cache.stats(),
+            retrieval_modes=dict(self.retrieval_mode_counts),
+            context_selection=dict(self.selection_stats),
+            async_retrieval=self.retrieval_executor.stats()
+        )
+    
+    def get_context_many(self, queries_by_persona: Dict[str, str], k: int = 1) -> Dict[str, List[str]]:
+        """
+        여러 페르소나의 실제 리뷰 컨텍스트를 한 번에 검색
+        
+        고유한 질의들을 한 번의 배치 요청으로 임베딩한 뒤 각 페르소나 스토어를 벡터로 검색
+        
+        Args:
+            queries_by_persona: {페르소나 이름: 검색 질의}
+            k: 페르소나별 검색할 리뷰 수
+        
+        Returns:
+            {페르소나 이름: 컨텍스트 문자열 리스트}
+        """
+        results = {}
+        pending = {}
+        for persona_name, query in queries_by_persona.items():
+            if persona_name not in self.vector_stores:
+                safe_print(f"[!] Retriever not found for '{persona_name}'")
+                results[persona_name] = []
+                continue
             
-            vector_store = Chroma(
-                persist_directory=vector_store_path,
-                embedding_function=self.embeddings
+            hit, cached = self.retrieval_cache.lookup_results(persona_name, query, k)
+            if hit:
+                results[persona_name] = cached
+            else:
+                pending[persona_name] = query
+        
+        if not pending:
+            return results
+        
+        if self.retrieval_mode == "hybrid":
+            # 어휘 신호만으로 끝나는 질의가 있으므로 임베딩은 필요할 때 질의별로 (질의 캐시 공유)
+            for persona_name, query in pending.items():
+                try:
+                    started = time.perf_counter()
+                    contexts = self._retrieve(persona_name, query, k)
+                    self.retrieval_cache.store_results(persona_name, query, k, contexts, time.perf_counter() - started)
+                    results[persona_name] = contexts
+                except Exception as e:
+                    safe_print(f"[!] Search failed for {persona_name}: {e}")
+                    results[persona_name] = []
+            return results
+        
+        try:
+            query_vectors = self.retrieval_cache.cached_query_vectors(
+                list(pending.values()), self.embeddings.embed_queries
             )
-            
-            # 모든 문서 검색하여 통계 생성
-            all_docs = vector_store.similarity_search("", k=1000)  # 최대 1000개
-            
-            stats = {
-                'total_reviews': len(all_docs),
-                'persona_name': persona_name,
-                'conversion_directions': set(),
-                'languages': set(),
-                'sentiments': set()
-            }
-            
-            for doc in all_docs:
-                metadata = doc.metadata
-                stats['conversion_directions'].add(metadata.get('conversion_direction', ''))
-                stats['languages'].add(metadata.get('language', ''))
-                stats['sentiments'].add(metadata.get('sentiment', ''))
-            
-            # set을 list로 변환
-            stats['conversion_directions'] = list(stats['conversion_directions'])
-            stats['languages'] = list(stats['languages'])
-            stats['sentiments'] = list(stats['sentiments'])
-            
-            return stats
-            
         except Exception as e:
-            safe_print(f"[!] Failed to get stats for {persona_name}: {e}")
+            safe_print(f"[!] Batch query embedding failed: {e}")
+            results.update({persona_name: [] for persona_name in pending})
+            return results
+        
+        for persona_name, query in pending.items():
+            try:
+                started = time.perf_counter()
+                contexts = self._retrieve(persona_name, query, k, query_vector=query_vectors[query])
+                self.retrieval_cache.store_results(persona_name, query, k, contexts, time.perf_counter() - started)
+                results[persona_name] = contexts
+            except Exception as e:
+                safe_print(f"[!] Search failed for {persona_name}: {e}")
+                results[persona_name] = []
+        
+        return results
+    
+    def _compute_persona_stats(self, persona_name: str) -> Dict:
+        """색인 시점에 페르소나 리뷰 분포 집계 (컬럼 저장소 비트맵 마스크로 계산, 매니페스트에 저장되어 조회 시 재계산 없음)"""
+        store = self.get_review_store()
+        summary = store.describe(store.persona_mask(self.persona_mapping[persona_name]))
+        return dict(
+            {'persona_name': persona_name, 'total_reviews': summary.pop('total_reviews'),
+             'total_chunks': self.index.count(persona_name)},
+            **summary
+        )
+    
+    def get_persona_stats(self, persona_name: str) -> Dict:
+        """페르소나별 통계 정보 (색인 시 매니페스트에 저장된 집계값 조회)"""
+        entry = self.manifest.get(persona_name)
+        if persona_name not in self.retrievers or entry is None:
             return {}
+        return dict(entry.get('stats', {}))
+    
+    def get_compression_report(self, k: int = 10, sample_size: int = 200) -> Dict:
+        """
+        검색용 압축 벡터의 원본 대비 recall@k / 메모리 / 검색 시간 보고서
+        
+        압축 설정(float16/int8, PCA 차원)을 고를 때 정확도와 비용을 비교하기 위해 사용
+        """
+        report = self.index.compression_report(k=k, sample_size=sample_size)
+        if report:
+            safe_print(f"[*] 벡터 압축 {report['compression']} (PCA {report['pca_dim'] or '없음'}): "
+                       f"recall@{k} {report[f'recall@{k}']:.3f}, 메모리 1/{report['memory_ratio']}, "
+                       f"검색 {report['compact_ms_per_query']}ms (원본 {report['full_ms_per_query']}ms)")
+        return report
+    
+    def get_all_persona_stats(self) -> Dict[str, Dict]:
+        """로드된 모든 페르소나 통계 {페르소나 이름: 통계}"""
+        all_stats = {}
+        for persona_name in self.persona_mapping:
+            stats = self.get_persona_stats(persona_name)
+            if stats:
+                all_stats[persona_name] = stats
+        return all_stats
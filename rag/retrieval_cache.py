@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retrieval Cache - 검색 결과 메모이제이션 (LRU + TTL)
+토론 중 반복되는 진행자 프롬프트/최근 메시지 질의에 대해
+질의 임베딩과 벡터 검색을 다시 수행하지 않도록 캐시
+"""
+
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_RESULT_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 3600
+
+
+def resolve_cache_settings(max_result_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> Dict:
+    """
+    환경변수 RAG_CACHE_MAX_RESULTS / RAG_CACHE_TTL_SECONDS → 생성 인자 → 기본값 순으로 결과 캐시 설정 결정
+
+    TTL이 0 이하이면 만료 없음. RetrievalCache(**resolve_cache_settings(...))로 사용한다.
+    """
+    env_entries = os.getenv("RAG_CACHE_MAX_RESULTS")
+    env_ttl = os.getenv("RAG_CACHE_TTL_SECONDS")
+    max_result_entries = int(env_entries) if env_entries else (max_result_entries or DEFAULT_RESULT_ENTRIES)
+    ttl_seconds = float(env_ttl) if env_ttl else (DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds)
+    return {
+        'max_result_entries': max(1, max_result_entries),
+        'ttl_seconds': ttl_seconds if ttl_seconds > 0 else None
+    }
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질의 정규화 (유니코드 NFC + 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def query_hash(text: str) -> str:
+    """정규화된 질의의 해시"""
+    return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+
+class LRUTTLCache:
+    """크기 제한(LRU)과 만료 시간(TTL)을 가진 스레드 안전 캐시"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float]):
+        """
+        Args:
+            max_entries: 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+            ttl_seconds: 항목 유효 시간 (None이면 만료 없음)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def get(self, key) -> Tuple[bool, Any]:
+        """(적중 여부, 값) 반환 - 적중 시 원래 계산에 걸렸던 시간을 절약 시간으로 누적"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, cost, value = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += cost
+                    return True, value
+                del self._entries[key]
+
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, cost: float = 0.0):
+        """값 저장 (cost: 이 값을 계산하는 데 걸린 시간)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), cost, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate: Optional[Callable[[Any], bool]] = None) -> int:
+        """조건에 맞는 키 삭제 (predicate가 없으면 전체 삭제), 삭제된 수 반환"""
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict:
+        """적중률, 절약 시간 등 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'saved_seconds': round(self.saved_seconds, 3)
+            }
+
+
+class RetrievalCache:
+    """질의 임베딩 LRU + (페르소나, 질의 해시, k) 결과 캐시"""
+
+    def __init__(
+        self,
+        max_query_entries: int = 1024,
+        max_result_entries: int = DEFAULT_RESULT_ENTRIES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS
+    ):
+        """
+        검색 캐시 초기화
+
+        Args:
+            max_query_entries: 질의 임베딩 캐시 크기
+            max_result_entries: 검색 결과 캐시 크기
+            ttl_seconds: 항목 유효 시간 (초, None이면 만료 없음)
+        """
+        self.query_vectors = LRUTTLCache(max_query_entries, ttl_seconds)
+        self.results = LRUTTLCache(max_result_entries, ttl_seconds)
+
+    def cached_query_vector(self, query: str, compute: Callable[[], List[float]]) -> List[float]:
+        """정규화된 질의 기준 임베딩 캐시 조회, 없으면 계산 후 저장"""
+        key = normalize_query(query)
+        hit, vector = self.query_vectors.get(key)
+        if hit:
+            return vector
+
+        started = time.perf_counter()
+        vector = compute()
+        self.query_vectors.put(key, vector, time.perf_counter() - started)
+        return vector
+
+    def cached_query_vectors(
+        self,
+        queries: List[str],
+        compute_batch: Callable[[List[str]], List[List[float]]]
+    ) -> Dict[str, List[float]]:
+        """여러 질의의 임베딩 조회 - 캐시에 없는 질의만 한 번의 배치로 계산"""
+        vectors = {}
+        missing = []
+        for query in dict.fromkeys(queries):
+            hit, vector = self.query_vectors.get(normalize_query(query))
+            if hit:
+                vectors[query] = vector
+            else:
+                missing.append(query)
+
+        if missing:
+            started = time.perf_counter()
+            computed = compute_batch(missing)
+            cost = (time.perf_counter() - started) / len(missing)
+            for query, vector in zip(missing, computed):
+                self.query_vectors.put(normalize_query(query), vector, cost)
+                vectors[query] = vector
+
+        return vectors
+
+    def cached_results(self, persona: str, query: str, k: int, compute: Callable[[], List]) -> List:
+        """
+        (페르소나, 질의 해시, k) 기준 결과 캐시 조회, 없으면 계산 후 저장
+
+        compute가 예외를 던지면 저장하지 않고 그대로 전달 (일시적 실패가 빈 결과로 TTL 동안 남지 않도록)
+        """
+        hit, results = self.lookup_results(persona, query, k)
+        if hit:
+            return results
+
+        started = time.perf_counter()
+        results = compute()
+        self.store_results(persona, query, k, results, time.perf_counter() - started)
+        return list(results)
+
+    def lookup_results(self, persona: str, query: str, k: int) -> Tuple[bool, Optional[List]]:
+        """결과 캐시 조회만 수행 (호출자가 수정해도 캐시가 바뀌지 않도록 사본 반환)"""
+        hit, results = self.results.get((persona, query_hash(query), k))
+        return hit, list(results) if hit else None
+
+    def store_results(self, persona: str, query: str, k: int, results: List, cost: float = 0.0):
+        """검색 결과 저장"""
+        self.results.put((persona, query_hash(query), k), list(results), cost)
+
+    def invalidate(self, persona: Optional[str] = None) -> int:
+        """페르소나 스토어 재생성 시 해당 페르소나 결과 무효화 (None이면 전체)"""
+        if persona is None:
+            return self.results.invalidate()
+        return self.results.invalidate(lambda key: key[0] == persona)
+
+    def stats(self) -> Dict:
+        """캐시 크기 조정을 위한 통계"""
+        return {
+            'query_embeddings': self.query_vectors.stats(),
+            'results': self.results.stats()
+        }
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Review Cleaning - 리뷰 텍스트 정리 파이프라인 (정규식 1회 컴파일)
+색인 시점에 한 번만 실행하여 검색 경로에서는 정규식 작업을 하지 않는다.
+"""
+
+import re
+
+# 정리 규칙이 바뀌면 올려서 기존 인덱스를 다시 생성하도록 함
+CLEANING_VERSION = 1
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+_HTML_ENTITY = re.compile(r'&[^;]+;')
+
+_SPECIAL_CHARS = re.compile(r'[^\w\s가-힣.,!?()[\]{}"\'-]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def strip_html(text: str) -> str:
+    """HTML 태그/엔티티 제거"""
+    return _HTML_ENTITY.sub('', _HTML_TAG.sub('', text))
+
+
+def clean_review_text(text: str) -> str:
+    """
+    리뷰 텍스트 정리 - 이모지/특수문자 제거 후 의미있는 문장만 남김
+
+    검색 후에 적용하던 단어 단위 제거 규칙(1-2글자 단어, 짧은 한글 조합, 영문/숫자 제거)은
+    일반적인 한국어 문장을 거의 전부 지워 컨텍스트가 비는 원인이었으므로 사용하지 않는다.
+
+    Returns:
+        정리된 텍스트 (의미있는 내용이 남지 않으면 빈 문자열)
+    """
+    # 이모지/특수문자 제거 후 공백 정리
+    text = _SPECIAL_CHARS.sub('', text.strip())
+    text = _WHITESPACE.sub(' ', text)
+
+    # 의미없는 짧은 텍스트 제거 (20자 미만)
+    if len(text) < 20:
+        return ""
+
+    # 의미있는 문장만 남기기: 15자 이상, 최소 3개 단어
+    clean_sentences = []
+    for sentence in text.split('.'):
+        sentence = sentence.strip()
+        if len(sentence) >= 15 and len(sentence.split()) >= 3:
+            clean_sentences.append(sentence)
+
+    text = '. '.join(clean_sentences).strip()
+
+    # 최종 검증: 20자 이상이고 5단어 이상
+    if len(text) >= 20 and len(text.split()) >= 5:
+        return text
+    return ""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Review Ledger - 벡터 인덱스에 반영된 리뷰 기록
+리뷰 키별 내용 지문과 청크 수, 삭제된 리뷰의 tombstone을 저장하여
+새 구조화 리뷰 파일이 들어오면 추가/변경/삭제된 리뷰만 골라 인덱스에 반영(upsert)한다.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 지문에 포함하는 필드 (페르소나 분류 / 색인 문서 / 메타데이터에 쓰이는 값)
+FINGERPRINT_FIELDS = (
+    'review', 'conversion_direction', 'conversion_level', 'sentiment',
+    'language', 'author', 'engagement', 'video_title'
+)
+
+
+def review_fingerprint(review: Dict) -> str:
+    """리뷰 내용 지문 (필드 값이 하나라도 바뀌면 달라짐)"""
+    payload = json.dumps([review.get(field) for field in FINGERPRINT_FIELDS], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class ReviewLedger:
+    """벡터 인덱스 디렉토리 옆에 저장되는 JSON 리뷰 기록"""
+
+    def __init__(self, path: Path):
+        """
+        기록 로드
+
+        Args:
+            path: 기록 파일 경로 (없으면 빈 기록으로 시작)
+        """
+        self.path = Path(path)
+        # 리뷰 키 → {'fingerprint': 지문, 'chunks': 인덱스에 있는 청크 수}
+        self.reviews: Dict[str, Dict] = {}
+        # 리뷰 키 → 삭제 시각 (코퍼스에서 사라져 인덱스에서 제거된 리뷰)
+        self.tombstones: Dict[str, str] = {}
+        # 마지막으로 반영한 코퍼스 (structured_reviews 파일/디렉토리 이름)
+        self.source: Optional[str] = None
+        self._lock = threading.RLock()
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.reviews = data.get('reviews', {})
+                self.tombstones = data.get('tombstones', {})
+                self.source = data.get('source')
+            except (OSError, ValueError):
+                # 손상된 기록은 무시 (다음 동기화에서 전체 코퍼스를 신규로 보고 upsert)
+                self.reviews, self.tombstones, self.source = {}, {}, None
+
+    def chunk_ids(self, review_key: str) -> List[str]:
+        """리뷰의 인덱스 청크 ID ('<리뷰 키>:<순번>')"""
+        entry = self.reviews.get(review_key)
+        return [f"{review_key}:{i}" for i in range(entry['chunks'])] if entry else []
+
+    def diff(self, fingerprints: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        현재 코퍼스 {리뷰 키: 지문}과 기록 비교
+
+        Returns:
+            (추가된 키, 내용이 바뀐 키, 사라진 키)
+        """
+        with self._lock:
+            added = [key for key in fingerprints if key not in self.reviews]
+            changed = [
+                key for key, fingerprint in fingerprints.items()
+                if key in self.reviews and self.reviews[key]['fingerprint'] != fingerprint
+            ]
+            removed = [key for key in self.reviews if key not in fingerprints]
+            return added, changed, removed
+
+    def record(self, review_key: str, fingerprint: str, chunks: int):
+        """리뷰 반영 기록 (청크 수는 여러 페르소나가 색인해도 리뷰당 하나이므로 큰 값 유지)"""
+        with self._lock:
+            entry = self.reviews.get(review_key)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                chunks = max(chunks, entry['chunks'])
+            self.reviews[review_key] = {'fingerprint': fingerprint, 'chunks': chunks}
+            self.tombstones.pop(review_key, None)
+
+    def tombstone(self, review_keys: Iterable[str]):
+        """코퍼스에서 사라진 리뷰 기록을 tombstone으로 전환"""
+        removed_at = datetime.now().isoformat()
+        with self._lock:
+            for review_key in review_keys:
+                if self.reviews.pop(review_key, None) is not None:
+                    self.tombstones[review_key] = removed_at
+
+    def clear(self):
+        """인덱스 전체 재생성 시 기록 초기화"""
+        with self._lock:
+            self.reviews, self.tombstones, self.source = {}, {}, None
+
+    def save(self):
+        """원자적 저장 (임시 파일 → rename)"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'source': self.source, 'reviews': self.reviews, 'tombstones': self.tombstones},
+                    f, ensure_ascii=False
+                )
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Review Store - 구조화 리뷰 컬럼 저장소
+메타데이터 컬럼을 pandas 범주형(categorical)으로 인코딩하고 값마다 비트맵 인덱스(np.packbits)를 미리 만들어 두어
+페르소나 파티션 / 분포 통계 / 임의 조건 조회를 리뷰 dict 순회 대신 벡터 연산(비트 AND/OR)으로 처리한다.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 비트맵 인덱스를 만드는 메타데이터 컬럼과 값이 없을 때의 기본값 (리뷰 dict.get 기본값과 동일)
+INDEXED_COLUMNS = {
+    'conversion_direction': '',
+    'conversion_level': '',
+    'sentiment': 'neutral',
+    'language': 'ko',
+    'category': '',
+}
+
+
+class ReviewStore:
+    """리뷰 목록 위의 범주형 컬럼 + 값별 비트맵 인덱스 (행 순서 = 리뷰 목록 순서)"""
+
+    def __init__(self, reviews: Sequence[Dict]):
+        """
+        Args:
+            reviews: 구조화 리뷰 dict 목록 (조회 결과는 이 목록의 원본 dict를 그대로 반환)
+        """
+        self.reviews = list(reviews)
+        self.size = len(self.reviews)
+
+        # 코퍼스 1회 순회로 컬럼 추출 후 범주형 인코딩
+        self.frame = pd.DataFrame({
+            column: pd.Categorical([review.get(column, default) for review in self.reviews])
+            for column, default in INDEXED_COLUMNS.items()
+        })
+        self.engagement = np.array([review.get('engagement', 0) or 0 for review in self.reviews])
+        # 키워드 조건은 소문자 본문 부분 문자열 매칭 (본문 컬럼은 필요할 때 생성)
+        self._texts = None
+
+        # 컬럼 → {값: 패킹된 비트맵}
+        self._bitmaps: Dict[str, Dict] = {}
+        for column in INDEXED_COLUMNS:
+            values = self.frame[column].cat
+            codes = values.codes.to_numpy()
+            self._bitmaps[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(values.categories)
+            }
+        # 키워드 집합 → (검사한 행, 매칭된 행)
+        self._keyword_results: Dict[frozenset, tuple] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _empty_bits(self) -> np.ndarray:
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _full_bits(self) -> np.ndarray:
+        return np.full((self.size + 7) // 8, 0xFF, dtype=np.uint8)
+
+    def _column_bits(self, column: str, values: Iterable) -> np.ndarray:
+        """컬럼 값이 values 중 하나인 행 (값별 비트맵 OR)"""
+        bits = self._empty_bits()
+        bitmaps = self._bitmaps[column]
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(bits, bitmap, out=bits)
+        return bits
+
+    def _keyword_matches(self, keywords: Iterable[str], candidates: np.ndarray) -> np.ndarray:
+        """
+        후보 행 중 본문(소문자)에 키워드가 하나라도 포함된 행
+
+        메타데이터 비트맵으로 후보를 먼저 좁힌 뒤 남은 행의 본문만 검사하고,
+        키워드 집합별로 검사 결과를 기억해 같은 행을 다시 스캔하지 않는다.
+        """
+        key = frozenset(keyword.lower() for keyword in keywords)
+        if key not in self._keyword_results:
+            self._keyword_results[key] = (np.zeros(self.size, dtype=bool), np.zeros(self.size, dtype=bool))
+        checked, matched = self._keyword_results[key]
+
+        todo = candidates & ~checked
+        if todo.any():
+            if self._texts is None:
+                self._texts = pd.Series([review.get('review', '') or '' for review in self.reviews], dtype=object)
+            pattern = '|'.join(re.escape(keyword) for keyword in sorted(key, key=len, reverse=True))
+            matched[todo] = self._texts[todo].str.lower().str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+            checked |= todo
+        return candidates & matched
+
+    def _to_mask(self, bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def mask(self, keywords: Optional[Iterable[str]] = None, **conditions) -> np.ndarray:
+        """
+        조건을 모두 만족하는 행의 불리언 마스크
+
+        Args:
+            keywords: 본문에 하나라도 포함되어야 하는 키워드 (None이면 조건 없음)
+            **conditions: 컬럼=값 또는 값 목록 (값 목록은 OR, 컬럼끼리는 AND, None이면 조건 없음)
+        """
+        bits = self._full_bits()
+        for column, values in conditions.items():
+            if column not in self._bitmaps:
+                raise KeyError(f"인덱스가 없는 컬럼: {column}")
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            np.bitwise_and(bits, self._column_bits(column, values), out=bits)
+        mask = self._to_mask(bits)
+        if keywords is not None:
+            mask = self._keyword_matches(keywords, mask)
+        return mask
+
+    def persona_mask(self, config: Dict) -> np.ndarray:
+        """persona_mapping 조건(방향 & 단계 & 감정 & 키워드)의 마스크 - 빈 감정/키워드 목록은 조건 없음"""
+        return self.mask(
+            keywords=config['keywords'] or None,
+            conversion_direction=config['conversion_direction'],
+            conversion_level=config['conversion_level'],
+            sentiment=config['sentiment'] or None
+        )
+
+    def partition(self, persona_mapping: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+        """페르소나별 파티션 (원래 순서 유지, 한 리뷰가 여러 페르소나에 속할 수 있음)"""
+        return {
+            persona_name: self.select(self.persona_mask(config))
+            for persona_name, config in persona_mapping.items()
+        }
+
+    def select(self, mask: np.ndarray) -> List[Dict]:
+        """마스크에 해당하는 원본 리뷰 dict 목록"""
+        return [self.reviews[i] for i in np.flatnonzero(mask)]
+
+    def query(self, keywords: Optional[Iterable[str]] = None, **conditions) -> List[Dict]:
+        """임의 조건 조회 (예: store.query(sentiment='negative', language=['ko', 'en']))"""
+        return self.select(self.mask(keywords, **conditions))
+
+    def count(self, keywords: Optional[Iterable[str]] = None, **conditions) -> int:
+        return int(np.count_nonzero(self.mask(keywords, **conditions)))
+
+    def value_counts(self, column: str, mask: Optional[np.ndarray] = None) -> Dict:
+        """
+        컬럼 값별 개수 (Counter.most_common과 같은 순서: 개수 내림차순, 동률이면 먼저 등장한 값 우선)
+        """
+        values = self.frame[column].cat
+        codes = values.codes.to_numpy()
+        if mask is not None:
+            codes = codes[mask]
+        codes = codes[codes >= 0]
+        if not len(codes):
+            return {}
+
+        present, first_seen, counts = np.unique(codes, return_index=True, return_counts=True)
+        order = np.lexsort((first_seen, -counts))
+        return {values.categories[present[i]]: int(counts[i]) for i in order}
+
+    def describe(self, mask: Optional[np.ndarray] = None) -> Dict:
+        """방향/단계/감정/언어 분포와 참여도 요약 (페르소나 통계용)"""
+        sentiments = self.value_counts('sentiment', mask)
+        languages = self.value_counts('language', mask)
+        directions = self.value_counts('conversion_direction', mask)
+        levels = self.value_counts('conversion_level', mask)
+        engagements = np.sort(self.engagement if mask is None else self.engagement[mask])
+
+        return {
+            'total_reviews': len(engagements),
+            'conversion_directions': sorted(directions),
+            'languages': sorted(languages),
+            'sentiments': sorted(sentiments),
+            'sentiment_distribution': sentiments,
+            'language_distribution': languages,
+            'direction_distribution': directions,
+            'level_distribution': levels,
+            'engagement': {
+                'total': engagements.sum().item() if len(engagements) else 0,
+                'mean': round(float(engagements.mean()), 2) if len(engagements) else 0.0,
+                'median': engagements[len(engagements) // 2].item() if len(engagements) else 0,
+                'max': engagements[-1].item() if len(engagements) else 0
+            }
+        }
+
+    def stats(self) -> Dict:
+        """행 수 / 컬럼별 고유 값 수 / 비트맵 메모리"""
+        return {
+            'reviews': self.size,
+            'cardinality': {column: len(bitmaps) for column, bitmaps in self._bitmaps.items()},
+            'bitmap_bytes': sum(bitmap.nbytes for bitmaps in self._bitmaps.values() for bitmap in bitmaps.values())
+        }
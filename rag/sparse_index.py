@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Sparse Index - 여러 페르소나가 하나의 어휘를 공유하는 TF-IDF 인덱스
+모든 페르소나 문서를 L2 정규화된 CSR 행렬 하나에 담고 페르소나별 행 범위만 기록해
+질의 1개는 희소 행렬-벡터 곱 1회, 여러 (페르소나, 질의) 쌍은 희소 행렬곱 1회로 점수를 계산한다.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class SharedTfidfIndex:
+    """공유 어휘 TF-IDF 행렬 + 페르소나별 행 범위"""
+
+    def __init__(self, vectorizer: TfidfVectorizer, matrix, ranges: Dict[str, Tuple[int, int]]):
+        """
+        Args:
+            vectorizer: 전체 문서로 학습된 vectorizer (norm='l2')
+            matrix: (전체 문서 수 x 어휘 수) L2 정규화 CSR 행렬
+            ranges: {페르소나: (시작 행, 끝 행)} - 각 페르소나 문서 목록 순서와 같음
+        """
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.ranges = ranges
+        self._prepare()
+
+    def _prepare(self):
+        # 배치 검색용 전치 행렬 (문서가 열이 되어 점수 행렬 열 인덱스 = 전체 행 번호)
+        self._matrix_t = self.matrix.T.tocsr()
+        # 단건 검색용 페르소나별 행 블록 (원본 배열을 공유하는 뷰, 복사 없음)
+        self._persona_matrices = {}
+        for persona, (start, end) in self.ranges.items():
+            begin, finish = self.matrix.indptr[start], self.matrix.indptr[end]
+            self._persona_matrices[persona] = csr_matrix(
+                (self.matrix.data[begin:finish], self.matrix.indices[begin:finish],
+                 self.matrix.indptr[start:end + 1] - begin),
+                shape=(end - start, self.matrix.shape[1])
+            )
+
+    @classmethod
+    def build(
+        cls,
+        documents_by_persona: Dict[str, Sequence[Dict]],
+        max_features: int,
+        ngram_range: Tuple[int, int]
+    ) -> "SharedTfidfIndex":
+        """
+        페르소나별 문서 목록({'content', ...})으로 공유 인덱스 생성
+
+        행 순서는 documents_by_persona 순서대로 페르소나별 문서를 이어 붙인 순서
+        """
+        texts = []
+        ranges = {}
+        for persona, documents in documents_by_persona.items():
+            start = len(texts)
+            texts.extend(doc['content'] for doc in documents)
+            ranges[persona] = (start, len(texts))
+
+        vectorizer = TfidfVectorizer(
+            max_features=max_features,
+            stop_words=None,  # 한국어는 불용어 제거하지 않음
+            ngram_range=tuple(ngram_range),
+            dtype=np.float32
+        )
+        # TfidfVectorizer 기본 norm='l2'라 행이 이미 정규화됨 → 내적이 곧 코사인 유사도
+        matrix = vectorizer.fit_transform(texts).tocsr()
+        return cls(vectorizer, matrix, ranges)
+
+    def __getstate__(self):
+        # 전치 행렬과 뷰는 로드 시 다시 만들어 저장 용량을 절반으로
+        return {'vectorizer': self.vectorizer, 'matrix': self.matrix, 'ranges': self.ranges}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._prepare()
+
+    def __contains__(self, persona: str) -> bool:
+        return persona in self.ranges
+
+    def search(self, persona: str, query: str, k: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        페르소나 문서 중 질의와 유사한 상위 k개 (페르소나 행 블록과 희소 행렬-벡터 곱 1회)
+
+        Returns:
+            [(페르소나 내 문서 위치, 코사인 유사도)] 유사도 내림차순 (min_score 초과만)
+        """
+        if k <= 0:
+            return []
+        query_vector = self.vectorizer.transform([query])
+        scores = (self._persona_matrices[persona] @ query_vector.T).toarray().ravel()
+        positions = np.flatnonzero(scores > min_score)
+        return _top_k(positions, scores[positions], k)
+
+    def search_many(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        k: int,
+        min_score: float = 0.0
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        여러 (페르소나, 질의) 쌍을 희소 행렬곱 1회로 검색
+
+        질의 행렬(쌍 수 x 어휘)과 전치된 문서 행렬을 곱한 희소 점수 행렬에서
+        각 행의 0이 아닌 점수 중 해당 페르소나 행 범위에 속하는 것만 argpartition으로 상위 k개를 고른다.
+
+        Returns:
+            pairs 순서대로 [(페르소나 내 문서 위치, 코사인 유사도)] 목록
+        """
+        if not pairs:
+            return []
+        if k <= 0:
+            return [[] for _ in pairs]
+
+        queries = self.vectorizer.transform([query for _, query in pairs])
+        scores = (queries @ self._matrix_t).tocsr()
+
+        results = []
+        for row, (persona, _) in enumerate(pairs):
+            start, end = self.ranges[persona]
+            columns = scores.indices[scores.indptr[row]:scores.indptr[row + 1]]
+            values = scores.data[scores.indptr[row]:scores.indptr[row + 1]]
+
+            mask = (columns >= start) & (columns < end) & (values > min_score)
+            results.append(_top_k(columns[mask] - start, values[mask], k))
+        return results
+
+    def stats(self) -> Dict:
+        """문서 수 / 어휘 수 / 비영 원소 수"""
+        return {
+            'documents': int(self.matrix.shape[0]),
+            'vocabulary': int(self.matrix.shape[1]),
+            'nnz': int(self.matrix.nnz),
+            'personas': {persona: end - start for persona, (start, end) in self.ranges.items()}
+        }
+
+
+def _top_k(positions: np.ndarray, values: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """후보 중 상위 k개 (전체 정렬 대신 argpartition 후 k개만 정렬)"""
+    if len(values) > k:
+        top = np.argpartition(-values, k - 1)[:k]
+        positions = positions[top]
+        values = values[top]
+    order = np.argsort(-values, kind='stable')
+    return [(int(positions[i]), float(values[i])) for i in order]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Store Manifest - 페르소나 벡터 스토어 빌드 정보 기록
+원본 파일 해시, 분할 설정, 임베딩 모델, 청크 ID를 저장하여 변경된 페르소나만 재생성
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def file_sha256(path: Path) -> str:
+    """파일 내용 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(persona_name: str, texts: List[str]) -> List[str]:
+    """
+    청크 내용 기반의 안정적인 ID 생성
+
+    같은 내용의 청크는 파일이 수정되어도 같은 ID를 가지므로
+    변경된 청크만 추가/삭제할 수 있다. (동일 내용 중복 시 등장 순번으로 구분)
+    """
+    ids = []
+    seen = {}
+    for text in texts:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(f"{persona_name}:{digest}:{occurrence}")
+    return ids
+
+
+class StoreManifest:
+    """벡터 스토어 디렉토리 옆에 저장되는 JSON 매니페스트"""
+
+    def __init__(self, path: Path):
+        """
+        매니페스트 로드
+
+        Args:
+            path: 매니페스트 파일 경로 (없으면 빈 매니페스트로 시작)
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        # 백그라운드 로더가 여러 페르소나를 동시에 갱신할 수 있으므로 저장을 직렬화
+        self._lock = threading.RLock()
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('personas', {})
+            except (OSError, ValueError):
+                # 손상된 매니페스트는 무시하고 전체 재생성 유도
+                self.entries = {}
+
+    def get(self, persona_name: str) -> Optional[Dict]:
+        """페르소나 빌드 정보 조회"""
+        return self.entries.get(persona_name)
+
+    def update(self, persona_name: str, entry: Dict):
+        """페르소나 빌드 정보 갱신 후 저장"""
+        with self._lock:
+            self.entries[persona_name] = dict(entry, built_at=datetime.now().isoformat())
+            self.save()
+
+    def remove(self, persona_name: str):
+        """페르소나 빌드 정보 삭제 후 저장"""
+        with self._lock:
+            if self.entries.pop(persona_name, None) is not None:
+                self.save()
+
+    def save(self):
+        """원자적 저장 (임시 파일 → rename)"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'personas': self.entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming - 분석 파이프라인용 스트리밍 입출력
+대용량 JSON 배열을 항목 단위로 읽고, 결과를 JSONL 샤드로 나눠 쓰며,
+프로세스 풀 작업을 순서를 유지한 채 제한된 개수만 미리 제출해 메모리 사용량을 일정하게 유지한다.
+"""
+
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # ijson이 없으면 JSON 파일 전체를 읽은 뒤 항목 단위로 넘김
+    ijson = None
+
+# JSONL 샤드 1개당 레코드 수
+DEFAULT_SHARD_SIZE = 5000
+
+# 구조화 리뷰 플랫폼 (JSON 키 '<platform>_reviews' / 샤드 접두사)
+STRUCTURED_PLATFORMS = ('iphone', 'galaxy')
+
+# 샤드 디렉토리 완료 표시 파일 (없으면 작성 중인 디렉토리로 보고 로더가 무시)
+SHARD_METADATA_FILE = "metadata.json"
+
+
+def ijson_available() -> bool:
+    return ijson is not None
+
+
+def iter_json_items(path: Path, prefix: str = "") -> Iterator:
+    """
+    JSON 파일 안 배열의 항목을 하나씩 반환
+
+    Args:
+        path: JSON 파일 (.jsonl이면 줄 단위)
+        prefix: 배열 위치 (점 구분 키, 예: 'iphone.conversion_comments', 빈 문자열이면 최상위 배열)
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        yield from iter_jsonl(path)
+        return
+
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, f"{prefix}.item" if prefix else "item", use_float=True)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _select(json.load(f), prefix)
+
+
+def iter_json_arrays(path: Path, prefixes: Dict[str, str]) -> Iterator[Tuple[str, Iterator]]:
+    """
+    파일 안 여러 배열을 차례로 반환 → (이름, 항목 이터레이터)
+
+    ijson이 있으면 배열마다 파일을 스트리밍으로 다시 읽고, 없으면 JSON 파일을 한 번만 파싱해
+    모든 배열에 사용한다 (iter_json_items를 배열마다 부르면 파일 전체를 매번 다시 파싱).
+
+    Args:
+        path: JSON 파일 (.jsonl이면 iter_json_items와 같이 줄 단위)
+        prefixes: {이름: 배열 위치} (예: {'iphone': 'iphone.conversion_comments'})
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl" or ijson is not None:
+        for name, prefix in prefixes.items():
+            yield name, iter_json_items(path, prefix)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for name, prefix in prefixes.items():
+        yield name, iter(_select(data, prefix))
+
+
+def _select(data, prefix: str) -> List:
+    """점 구분 키 위치의 배열 (없으면 빈 목록)"""
+    for key in filter(None, prefix.split('.')):
+        data = data.get(key, []) if isinstance(data, dict) else []
+    return data
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    """JSONL 파일의 레코드를 한 줄씩 반환 (빈 줄 무시)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def shard_paths(directory: Path, prefix: str) -> List[Path]:
+    """디렉토리 안 '<prefix>-NNNNN.jsonl' 샤드 (번호 순)"""
+    return sorted(Path(directory).glob(f"{prefix}-[0-9]*.jsonl"))
+
+
+def iter_jsonl_shards(directory: Path, prefix: str) -> Iterator[Dict]:
+    """샤드 번호 순으로 모든 레코드 반환"""
+    for path in shard_paths(directory, prefix):
+        yield from iter_jsonl(path)
+
+
+class JsonlShardWriter:
+    """레코드를 '<prefix>-NNNNN.jsonl' 샤드로 나눠 쓰는 작성기 (샤드는 다 쓴 뒤 이름을 바꿔 공개)"""
+
+    def __init__(self, directory: Path, prefix: str, shard_size: int = DEFAULT_SHARD_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.shard_size = max(1, shard_size)
+
+        self.count = 0
+        self.shards: List[Path] = []
+        self._file = None
+        self._tmp_path: Optional[Path] = None
+        self._in_shard = 0
+
+    def _open_shard(self):
+        path = self.directory / f"{self.prefix}-{len(self.shards):05d}.jsonl"
+        self._tmp_path = path.with_suffix('.jsonl.tmp')
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self.shards.append(path)
+        self._in_shard = 0
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            os.replace(self._tmp_path, self.shards[-1])
+            self._file = None
+
+    def write(self, record: Dict):
+        if self._file is None:
+            self._open_shard()
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+        self._in_shard += 1
+        if self._in_shard >= self.shard_size:
+            self._close_shard()
+
+    def write_all(self, records: Iterable[Dict]) -> int:
+        """레코드를 모두 쓰고 이번에 쓴 개수 반환"""
+        before = self.count
+        for record in records:
+            self.write(record)
+        return self.count - before
+
+    def close(self):
+        self._close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_shard_metadata(directory: Path, metadata: Dict):
+    """샤드 디렉토리 완료 표시 (모든 샤드를 쓴 뒤 마지막에 호출)"""
+    path = Path(directory) / SHARD_METADATA_FILE
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(metadata, created_at=datetime.now().isoformat()), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_shard_directory(path: Path) -> bool:
+    """완료된 샤드 디렉토리인지 (metadata.json 존재)"""
+    path = Path(path)
+    return path.is_dir() and (path / SHARD_METADATA_FILE).exists()
+
+
+def find_structured_reviews(data_dir: Path) -> Optional[Path]:
+    """가장 최근의 구조화 리뷰 (structured_reviews_*.json 파일 또는 완료된 샤드 디렉토리)"""
+    candidates = [
+        path for path in Path(data_dir).glob("structured_reviews_*")
+        if (path.is_file() and path.suffix == ".json") or is_shard_directory(path)
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=_modified_at)
+
+
+def _modified_at(path: Path) -> float:
+    # 샤드 디렉토리는 완료 표시 시각 기준
+    return (path / SHARD_METADATA_FILE).stat().st_mtime if path.is_dir() else path.stat().st_mtime
+
+
+def iter_structured_reviews(source: Path, platform: str) -> Iterator[Dict]:
+    """구조화 리뷰 파일/샤드 디렉토리에서 플랫폼 리뷰를 하나씩 반환"""
+    source = Path(source)
+    if source.is_dir():
+        yield from iter_jsonl_shards(source, f"{platform}_reviews")
+    else:
+        yield from iter_json_items(source, f"{platform}_reviews")
+
+
+def load_structured_reviews(source: Path) -> Dict[str, List[Dict]]:
+    """
+    구조화 리뷰를 {'<platform>_reviews': [...]}로 로드
+
+    샤드 디렉토리나 ijson이 있으면 리뷰 단위로 읽고, 없으면 JSON 파일을 한 번만 파싱한다.
+    """
+    source = Path(source)
+    if source.is_dir() or ijson is not None:
+        return {
+            f'{platform}_reviews': list(iter_structured_reviews(source, platform))
+            for platform in STRUCTURED_PLATFORMS
+        }
+
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {f'{platform}_reviews': data.get(f'{platform}_reviews', []) for platform in STRUCTURED_PLATFORMS}
+
+
+def ordered_map(
+    make_executor: Callable[[], Executor],
+    fn: Callable,
+    items: Iterable,
+    max_in_flight: int,
+    fallback: Optional[Callable] = None
+) -> Iterator:
+    """
+    executor.map과 같은 순서로 결과를 반환하되 입력을 미리 다 읽지 않음
+
+    제출한 작업이 max_in_flight개가 되면 가장 오래된 결과를 내보낸 뒤 다음 입력을 읽으므로
+    입력이 끝나기 전에 다음 단계가 결과를 처리할 수 있고 대기 중인 데이터 양이 제한된다.
+
+    Args:
+        make_executor: 프로세스 풀 생성 함수 (with 문으로 종료)
+        fn: 항목 하나를 처리하는 함수 (프로세스 간 전달 가능해야 함)
+        items: 입력 이터러블 (제너레이터 가능, 한 번만 읽음)
+        max_in_flight: 동시에 제출해 둘 최대 작업 수
+        fallback: 풀을 만들 수 없거나 도중에 깨졌을 때 현재 프로세스에서 항목을 처리할 함수
+            - 결과를 받지 못한 항목부터 나머지 입력까지 이 함수로 이어서 처리하므로
+              입력을 다시 읽지 않아도 결과가 빠지거나 중복되지 않는다 (None이면 예외를 그대로 전파)
+    """
+    items = iter(items)
+    # 결과를 받지 못한 항목 (풀이 깨지면 이 항목들부터 fallback으로 처리)
+    unfinished = deque()
+    futures = deque()
+    try:
+        with make_executor() as executor:
+            for item in items:
+                unfinished.append(item)
+                futures.append(executor.submit(fn, item))
+                if len(futures) >= max_in_flight:
+                    result = futures.popleft().result()
+                    unfinished.popleft()
+                    yield result
+            while futures:
+                result = futures.popleft().result()
+                unfinished.popleft()
+                yield result
+    except (BrokenProcessPool, OSError, PermissionError) as e:
+        if fallback is None:
+            raise
+        print(f"Process pool unavailable ({e}), continuing sequentially")
+        for item in itertools.chain(unfinished, items):
+            yield fallback(item)
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """입력을 size개씩 묶어 반환 (마지막 묶음은 더 작을 수 있음)"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
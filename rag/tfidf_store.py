@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TF-IDF Index Store - simple_chat TF-IDF 인덱스 디스크 캐시
+카테고리별 문서와 공유 TF-IDF 인덱스를 원본 해시와 함께 저장해
+원본이 바뀌지 않았으면 다시 만들지 않고, 바뀐 카테고리 문서만 다시 만든다.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from rag.store_manifest import file_sha256
+
+# 저장 포맷이 바뀌면 올려서 기존 캐시를 무효화
+STORE_VERSION = 2
+
+# 공유 인덱스 항목 이름 (카테고리 이름과 겹치지 않도록 밑줄로 시작)
+SHARED_INDEX_NAME = "_shared"
+
+
+def source_hash(source_path: Path, settings: Dict) -> Optional[str]:
+    """원본 파일 내용 + 빌드 설정 해시 (원본이 없으면 None)"""
+    source_path = Path(source_path)
+    if not source_path.exists():
+        return None
+    payload = json.dumps(
+        {'version': STORE_VERSION, 'source': file_sha256(source_path), 'settings': settings},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def combined_hash(hashes: Dict[str, str], settings: Dict) -> str:
+    """카테고리별 원본 해시 전체 + 설정 해시 (하나라도 바뀌면 공유 인덱스 재학습)"""
+    payload = json.dumps(
+        {'version': STORE_VERSION, 'sources': hashes, 'settings': settings},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TfidfIndexStore:
+    """TF-IDF 인덱스 파일 저장소 (index_dir/<namespace>/<name>.pkl, 카테고리 문서 또는 공유 인덱스)"""
+
+    def __init__(self, index_dir: Path, namespace: str):
+        self.directory = Path(index_dir) / namespace
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.pkl"
+
+    def load(self, name: str, expected_hash: Optional[str]) -> Optional[Dict]:
+        """저장된 항목 (save에 넘긴 키워드 인자 dict, 없거나 원본 해시가 다르면 None)"""
+        path = self._path(name)
+        if expected_hash is None or not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            # 손상되었거나 다른 scikit-learn 버전에서 저장된 파일은 다시 생성
+            print(f"Ignoring unreadable index cache for {name}: {e}")
+            return None
+        if entry.get('source_hash') != expected_hash:
+            return None
+        return entry
+
+    def save(self, name: str, source_hash_value: str, **payload):
+        """원자적으로 저장 (임시 파일 → rename)"""
+        path = self._path(name)
+        tmp_path = path.with_suffix('.pkl.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(dict(payload, source_hash=source_hash_value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+def build_stale(
+    build_fn: Callable[..., Optional[Tuple]],
+    jobs: Dict[str, Tuple]
+) -> Dict[str, Optional[Tuple]]:
+    """
+    원본이 바뀐 카테고리 문서를 현재 프로세스에서 차례로 생성
+
+    문서 생성은 원본 파일을 읽어 나누는 정도라 프로세스 풀을 띄우고 결과 문서를 다시 pickle로
+    받아오는 비용이 더 크고, 비용이 큰 TF-IDF 학습은 어휘/IDF를 모든 카테고리가 공유해
+    전체 문서로 한 번에 해야 하므로 병렬화하지 않는다.
+
+    Args:
+        build_fn: build_fn(*args) → 결과 또는 None
+        jobs: {카테고리: build_fn 인자 튜플}
+
+    Returns:
+        {카테고리: 결과} (실패한 카테고리는 None)
+    """
+    results = {}
+    for category, args in jobs.items():
+        try:
+            results[category] = build_fn(*args)
+        except Exception as e:
+            print(f"Error building documents for {category}: {e}")
+            results[category] = None
+    return results
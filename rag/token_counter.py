@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token Counter - tiktoken 기반 토큰 수 계산
+tiktoken 인코딩 파일을 받을 수 없는 오프라인 환경에서는 문자 종류별 근사치를 사용한다.
+"""
+
+import threading
+from functools import lru_cache
+
+DEFAULT_MODEL = "gpt-4"
+
+_lock = threading.Lock()
+_encodings = {}
+
+
+def get_encoding(model: str = DEFAULT_MODEL):
+    """모델별 tiktoken 인코딩 (사용할 수 없으면 None)"""
+    with _lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                try:
+                    _encodings[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encodings[model] = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken 미설치 또는 인코딩 파일 다운로드 실패
+                _encodings[model] = None
+        return _encodings[model]
+
+
+def estimate_tokens(text: str) -> int:
+    """근사 토큰 수 (ASCII 약 4자당 1토큰, 한글 등 비ASCII 문자는 1자당 1토큰)"""
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """텍스트 토큰 수"""
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
+    """토큰 경계에서 텍스트 자르기 (결과의 토큰 수는 max_tokens 이하)"""
+    if max_tokens <= 0 or not text:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is None:
+        # 근사치 기준: ASCII 1자 = 1/4토큰, 비ASCII 1자 = 1토큰 (4배 정수 단위로 누적)
+        limit = max_tokens * 4
+        used = 0
+        for position, char in enumerate(text):
+            used += 1 if ord(char) < 128 else 4
+            if used > limit:
+                return text[:position]
+        return text
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # 한글처럼 여러 토큰에 걸친 문자가 잘리면 깨진 문자(U+FFFD)가 남으므로 제거
+    return encoding.decode(tokens[:max_tokens]).rstrip("�")
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persona Vector Index - 모든 페르소나 문서를 하나의 행렬에 담는 통합 벡터 인덱스
+페르소나별 Chroma 디렉토리 대신 연속된 float32 행렬 + FAISS(Inner Product) 인덱스를 사용하고,
+페르소나/메타데이터 필터로 검색 범위를 좁힌다. 여러 페르소나에 속하는 문서는 한 번만 저장.
+디스크 인덱스는 numpy.memmap으로 열어 복사 없이 바로 검색하고, 수정할 때만 메모리로 옮긴다.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from rag.lexical_index import LexicalIndex
+from rag.mmap_store import ColumnarMetadata, MappedStore, current_store, write_store
+from rag.quantization import QuantizedMatrix, recall_report
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu가 없으면 NumPy 행렬곱으로 검색
+    faiss = None
+
+
+RETRIEVAL_MODES = ("dense", "hybrid")
+
+
+def resolve_retrieval_mode(retrieval_mode: Optional[str] = None) -> str:
+    """환경변수 RAG_RETRIEVAL_MODE → 생성 인자 → 'dense' 순으로 검색 방식 결정"""
+    mode = (os.getenv("RAG_RETRIEVAL_MODE") or retrieval_mode or "dense").strip().lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"지원하지 않는 검색 방식: {mode} (가능: {', '.join(RETRIEVAL_MODES)})")
+    return mode
+
+
+def faiss_available() -> bool:
+    """FAISS 사용 가능 여부 (없으면 NumPy 검색으로 대체)"""
+    return faiss is not None
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """코사인 유사도를 내적으로 계산할 수 있도록 행 단위 L2 정규화"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class PersonaVectorIndex:
+    """페르소나 필터를 지원하는 통합 벡터 인덱스 (디스크 영속)"""
+
+    def __init__(
+        self,
+        index_dir: Path,
+        embedding_model: str,
+        compression: str = "float32",
+        pca_dim: Optional[int] = None
+    ):
+        """
+        Args:
+            index_dir: 인덱스 파일 저장 디렉토리
+            embedding_model: 벡터를 만든 임베딩 모델 식별자 (다른 모델의 인덱스는 로드하지 않음)
+            compression: 검색용 벡터 저장 방식 ('float32' | 'float16' | 'int8')
+            pca_dim: 검색용 벡터 PCA 축소 차원 (None이면 축소 안 함)
+        """
+        self.index_dir = Path(index_dir)
+        self.embedding_model = embedding_model
+        self.compression = compression
+        self.pca_dim = pca_dim
+
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._personas: List[List[str]] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._row_of: Dict[str, int] = {}
+        # 메모리 맵으로 연 디스크 인덱스 (수정 전까지 읽기 전용으로 공유, 수정 시 None)
+        self._store: Optional[MappedStore] = None
+
+        # 파생 구조 (변경 시 무효화)
+        self._persona_rows: Optional[Dict[str, np.ndarray]] = None
+        self._faiss_index = None
+        self._lexical_index: Optional[LexicalIndex] = None
+        # 변경 횟수 (잠금 밖에서 임베딩하는 동안 행 번호가 바뀌었는지 확인용)
+        self._generation = 0
+        # 일괄 색인 중에는 save()를 모아 end_batch()에서 한 번만 저장 (저장마다 전체 스토어를 새로 씀)
+        self._batch_depth = 0
+        self._pending_save = False
+
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 영속화
+    # ------------------------------------------------------------------
+    @property
+    def _records_path(self) -> Path:
+        # 이전 포맷 (JSON 레코드 + .npy 행렬), 로드 시 새 포맷으로 변환
+        return self.index_dir / "records.json"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.index_dir / "vectors.npy"
+
+    def exists(self) -> bool:
+        """디스크에 저장된 인덱스가 있는지 확인"""
+        return current_store(self.index_dir) is not None or (
+            self._records_path.exists() and self._vectors_path.exists()
+        )
+
+    def load(self) -> bool:
+        """
+        디스크에서 인덱스 로드 (없거나 다른 임베딩 모델로 만들어졌으면 False)
+
+        행렬/본문/메타데이터는 메모리 맵으로 열기만 하므로 인덱스 크기와 무관하게 즉시 반환되고,
+        같은 인덱스를 여는 프로세스들은 OS 페이지 캐시를 공유한다.
+        """
+        directory = current_store(self.index_dir)
+        if directory is None:
+            return self._load_legacy()
+
+        store = MappedStore(directory)
+        if store.embedding_model != self.embedding_model:
+            return False
+        if self._compact_changed(store):
+            # 압축 설정이 바뀌었으면 원본 행렬에서 검색용 벡터를 다시 만들어 저장
+            with self._lock:
+                self._store = store
+                self._ids = store.ids
+                self._materialize()
+                self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+                self._invalidate()
+                self.save()
+            return self.load()
+
+        with self._lock:
+            self._attach(store)
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._invalidate()
+        return True
+
+    def _attach(self, store: MappedStore):
+        """메모리 맵 스토어를 현재 데이터로 사용 (압축 벡터가 있으면 검색도 압축 벡터로)"""
+        self._store = store
+        self._ids = store.ids
+        self._texts = store.texts
+        self._metadatas = store.metadatas
+        self._personas = []  # 행별 소속은 수정 시에만 필요 (_materialize)
+        self._vectors = store.vectors
+
+    def _load_legacy(self) -> bool:
+        """이전 포맷 인덱스를 읽어 새 포맷으로 다시 저장"""
+        if not (self._records_path.exists() and self._vectors_path.exists()):
+            return False
+
+        with open(self._records_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if records.get('embedding_model') != self.embedding_model:
+            return False
+        vectors = np.load(self._vectors_path)
+
+        with self._lock:
+            self._store = None
+            self._ids = records['ids']
+            self._texts = records['texts']
+            self._metadatas = records['metadatas']
+            self._personas = records['personas']
+            self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._invalidate()
+            self.save()
+            self._records_path.unlink()
+            self._vectors_path.unlink()
+        return True
+
+    def save(self, force: bool = False):
+        """
+        새 버전 디렉토리에 저장 후 원자적으로 교체 (메모리 맵 상태 그대로면 디스크와 같으므로 생략)
+
+        저장한 버전을 바로 메모리 맵으로 다시 열어, 재시작하지 않아도 load()한 인덱스와 같이
+        압축 벡터로 검색하고 프로세스 전용 float32 복사본은 해제한다.
+
+        Args:
+            force: 일괄 색인 중이어도 즉시 저장 (기본은 end_batch()까지 미룸)
+        """
+        with self._lock:
+            if self._store is not None:
+                return
+            if self._batch_depth and not force:
+                self._pending_save = True
+                return
+            self._pending_save = False
+            directory = write_store(
+                self.index_dir,
+                self.embedding_model,
+                self._ids,
+                self._texts,
+                self._metadatas,
+                self._personas,
+                self._vectors,
+                compact=self._build_compact() if self._uses_compact() else None
+            )
+            # 행 순서/내용은 그대로이므로 행 번호와 어휘 인덱스는 유지 (세대 번호도 그대로)
+            self._attach(MappedStore(directory))
+            self._persona_rows = None
+            self._faiss_index = None
+
+    @property
+    def batching(self) -> bool:
+        """일괄 색인 중인지 (save()가 end_batch()까지 미뤄짐)"""
+        return self._batch_depth > 0
+
+    def begin_batch(self):
+        """일괄 색인 시작 - 여러 페르소나를 색인하는 동안 save()를 모음 (중첩 가능)"""
+        with self._lock:
+            self._batch_depth += 1
+
+    def end_batch(self) -> bool:
+        """일괄 색인 종료 - 가장 바깥 배치가 끝날 때 미뤄진 저장을 한 번 수행, 저장했으면 True"""
+        with self._lock:
+            self._batch_depth = max(0, self._batch_depth - 1)
+            if self._batch_depth or not self._pending_save:
+                return False
+            self.save()
+            return True
+
+    def _uses_compact(self) -> bool:
+        return self.compression != "float32" or bool(self.pca_dim)
+
+    def _build_compact(self, vectors: Optional[np.ndarray] = None) -> QuantizedMatrix:
+        vectors = self._vectors if vectors is None else vectors
+        if len(vectors) == 0:
+            vectors = np.zeros((0, self._vectors.shape[1] if self._vectors.ndim == 2 else 0), dtype=np.float32)
+        return QuantizedMatrix.build(vectors, self.compression, self.pca_dim)
+
+    def _compact_changed(self, store: MappedStore) -> bool:
+        """저장된 압축 설정이 현재 설정과 다른지"""
+        if not self._uses_compact():
+            return store.compact_settings is not None
+        settings = store.compact_settings
+        if settings is None or settings['compression'] != self.compression:
+            return True
+        # 저장 당시 차원보다 큰 축소 차원을 요청하면 축소하지 않으므로 원본 차원 기준으로 비교
+        requested = self.pca_dim if self.pca_dim and self.pca_dim < store.dim else None
+        return settings['pca_dim'] != requested
+
+    def _materialize(self):
+        """수정 전에 메모리 맵 데이터를 프로세스 전용 메모리로 복사"""
+        store = self._store
+        if store is None:
+            return
+        self._ids = list(store.ids)
+        self._texts = list(store.texts)
+        self._metadatas = list(store.metadatas)
+        self._personas = store.row_personas()
+        self._vectors = np.array(store.vectors, dtype=np.float32)
+        self._store = None
+
+    # ------------------------------------------------------------------
+    # 변경
+    # ------------------------------------------------------------------
+    def _invalidate(self):
+        self._persona_rows = None
+        self._faiss_index = None
+        self._lexical_index = None
+        self._generation += 1
+
+    def clear(self):
+        """모든 문서 삭제 (디스크 파일은 save() 시 덮어씀)"""
+        with self._lock:
+            self._store = None
+            self._ids, self._texts, self._metadatas, self._personas = [], [], [], []
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._row_of = {}
+            self._invalidate()
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict],
+        vectors: Sequence[Sequence[float]],
+        personas: Sequence[Iterable[str]]
+    ):
+        """
+        문서 추가 또는 갱신 (같은 ID가 있으면 내용/벡터/소속 페르소나를 교체)
+
+        Args:
+            ids: 안정적인 문서 ID
+            texts: 문서 본문
+            metadatas: 문서 메타데이터
+            vectors: 임베딩 벡터
+            personas: 문서가 속한 페르소나 목록 (문서당 하나 이상)
+        """
+        if not ids:
+            return
+
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            self._materialize()
+            if self._vectors.size == 0:
+                self._vectors = np.zeros((0, matrix.shape[1]), dtype=np.float32)
+            elif matrix.shape[1] != self._vectors.shape[1]:
+                raise ValueError(
+                    f"벡터 차원 불일치: 인덱스 {self._vectors.shape[1]}, 입력 {matrix.shape[1]}"
+                )
+
+            new_rows = []
+            for position, doc_id in enumerate(ids):
+                row = self._row_of.get(doc_id)
+                persona_list = sorted(set(personas[position]))
+                if row is None:
+                    self._row_of[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._texts.append(texts[position])
+                    self._metadatas.append(dict(metadatas[position]))
+                    self._personas.append(persona_list)
+                    new_rows.append(position)
+                else:
+                    self._texts[row] = texts[position]
+                    self._metadatas[row] = dict(metadatas[position])
+                    self._personas[row] = persona_list
+                    self._vectors[row] = matrix[position]
+
+            if new_rows:
+                self._vectors = np.ascontiguousarray(np.vstack([self._vectors, matrix[new_rows]]))
+
+            self._invalidate()
+
+    def add_persona(self, ids: Iterable[str], persona: str) -> int:
+        """이미 인덱스에 있는 문서를 페르소나에 추가 (재임베딩 없음), 추가된 수 반환"""
+        with self._lock:
+            # 이미 소속된 문서뿐이면 메모리 맵을 복사하지 않음 (행 번호 → 소속 여부만 확인)
+            members = set(np.asarray(self._get_persona_rows().get(persona, ()), dtype=np.int64).tolist())
+            rows = sorted({
+                row for row in (self._row_of.get(doc_id) for doc_id in ids)
+                if row is not None and row not in members
+            })
+            if not rows:
+                return 0
+            self._materialize()
+            for row in rows:
+                self._personas[row] = sorted(self._personas[row] + [persona])
+            self._invalidate()
+            return len(rows)
+
+    def contains(self, doc_id: str) -> bool:
+        """문서 ID 존재 여부"""
+        return doc_id in self._row_of
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """문서 삭제 후 행렬 압축, 삭제된 수 반환"""
+        with self._lock:
+            drop = {self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of}
+            if not drop:
+                return 0
+            self._materialize()
+
+            keep = [row for row in range(len(self._ids)) if row not in drop]
+            self._ids = [self._ids[row] for row in keep]
+            self._texts = [self._texts[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._personas = [self._personas[row] for row in keep]
+            self._vectors = np.ascontiguousarray(self._vectors[keep])
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._invalidate()
+            return len(drop)
+
+    def remove_persona(self, persona: str) -> int:
+        """페르소나 소속 해제 - 더 이상 어느 페르소나에도 속하지 않는 문서는 삭제"""
+        with self._lock:
+            if persona not in self._get_persona_rows():
+                return 0
+            self._materialize()
+            orphaned = []
+            for row, persona_list in enumerate(self._personas):
+                if persona in persona_list:
+                    persona_list.remove(persona)
+                    if not persona_list:
+                        orphaned.append(self._ids[row])
+            self._invalidate()
+            return self.delete(orphaned)
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def _get_persona_rows(self) -> Dict[str, np.ndarray]:
+        if self._persona_rows is None and self._store is not None:
+            self._persona_rows = self._store.persona_rows
+        elif self._persona_rows is None:
+            rows = {}
+            for row, persona_list in enumerate(self._personas):
+                for persona in persona_list:
+                    rows.setdefault(persona, []).append(row)
+            self._persona_rows = {
+                persona: np.asarray(row_list, dtype=np.int64) for persona, row_list in rows.items()
+            }
+        return self._persona_rows
+
+    def _get_faiss_index(self):
+        # FAISS 인덱스는 벡터를 복사하므로 메모리 맵 상태에서는 NumPy로 직접 검색 (페이지 공유 유지)
+        if self._faiss_index is None and faiss is not None and len(self._ids) and self._store is None:
+            index = faiss.IndexFlatIP(self._vectors.shape[1])
+            index.add(self._vectors)
+            self._faiss_index = index
+        return self._faiss_index
+
+    def _get_lexical_index(self) -> LexicalIndex:
+        if self._lexical_index is None:
+            self._lexical_index = LexicalIndex(self._texts)
+        return self._lexical_index
+
+    def personas(self) -> List[str]:
+        """인덱스에 문서가 있는 페르소나 목록"""
+        with self._lock:
+            return sorted(self._get_persona_rows().keys())
+
+    def count(self, persona: Optional[str] = None) -> int:
+        """문서 수 (persona 지정 시 해당 페르소나 문서 수)"""
+        with self._lock:
+            if persona is None:
+                return len(self._ids)
+            return len(self._get_persona_rows().get(persona, ()))
+
+    def persona_ids(self, persona: str) -> List[str]:
+        """페르소나에 속한 문서 ID 목록"""
+        with self._lock:
+            return [self._ids[row] for row in self._get_persona_rows().get(persona, ())]
+
+    def get_documents(self, persona: Optional[str] = None) -> List[Document]:
+        """페르소나(또는 전체) 문서 목록"""
+        with self._lock:
+            rows = range(len(self._ids)) if persona is None else self._get_persona_rows().get(persona, ())
+            return [self._document(row) for row in rows]
+
+    def get_vectors(self, ids: Sequence[str]) -> np.ndarray:
+        """문서 ID 순서대로의 L2 정규화 임베딩 행렬 (삭제되어 없는 ID가 있으면 KeyError)"""
+        with self._lock:
+            return self._vectors[[self._row_of[doc_id] for doc_id in ids]]
+
+    def _document(self, row: int) -> Document:
+        return Document(
+            page_content=self._texts[row],
+            metadata=dict(self._metadatas[row], doc_id=self._ids[row])
+        )
+
+    def _candidate_rows(self, persona: Optional[str], where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """필터에 맞는 행 번호 (필터가 없으면 None = 전체)"""
+        rows = None
+        if persona is not None:
+            rows = self._get_persona_rows().get(persona, np.zeros(0, dtype=np.int64))
+
+        if where and isinstance(self._metadatas, ColumnarMetadata):
+            rows = self._metadatas.match(where, rows)
+        elif where:
+            candidates = range(len(self._ids)) if rows is None else rows
+            matched = []
+            for row in candidates:
+                metadata = self._metadatas[row]
+                if all(
+                    metadata.get(field) in value if isinstance(value, (list, tuple, set)) else metadata.get(field) == value
+                    for field, value in where.items()
+                ):
+                    matched.append(row)
+            rows = np.asarray(matched, dtype=np.int64)
+
+        return rows
+
+    def _score_rows(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """정규화된 질의와 행들의 유사도 (메모리 맵 + 압축 벡터가 있으면 압축 벡터로 계산)"""
+        compact = self._store.compact if self._store is not None else None
+        if compact is not None:
+            return compact.score(query, rows)
+        # 전체 검색은 행렬을 복사하지 않고 그대로 곱함
+        return (self._vectors if rows is None else self._vectors[rows]) @ query
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 4,
+        persona: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        코사인 유사도 상위 k개 문서 검색
+
+        Args:
+            query_vector: 질의 임베딩
+            k: 반환할 문서 수
+            persona: 해당 페르소나 문서로 검색 범위 제한
+            where: 메타데이터 필터 {필드: 값 또는 값 목록}
+
+        Returns:
+            [(문서, 유사도)] (유사도 내림차순)
+        """
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        query = _normalize_rows(query)
+
+        with self._lock:
+            if not self._ids:
+                return []
+
+            rows = self._candidate_rows(persona, where)
+            total = len(self._ids) if rows is None else len(rows)
+            k = min(k, total)
+            if k <= 0:
+                return []
+
+            faiss_index = self._get_faiss_index()
+            if faiss_index is not None:
+                params = None
+                if rows is not None:
+                    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(rows))
+                scores, indices = faiss_index.search(query, k, params=params)
+                hits = [(int(row), float(score)) for score, row in zip(scores[0], indices[0]) if row >= 0]
+            else:
+                candidates = np.arange(len(self._ids)) if rows is None else rows
+                scores = self._score_rows(query[0], rows)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                hits = [(int(candidates[i]), float(scores[i])) for i in top]
+
+            return [(self._document(row), score) for row, score in hits]
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        get_query_vector: Callable[[], Sequence[float]],
+        k: int = 4,
+        persona: Optional[str] = None,
+        shortlist_size: int = 50,
+        lexical_only_coverage: float = 0.8,
+        rrf_k: int = 60
+    ) -> Tuple[List[Tuple[Document, float]], str]:
+        """
+        BM25 후보 축소 + 후보만 dense 재정렬 + RRF 결합 검색
+
+        1위 문서가 질의 토큰을 lexical_only_coverage 이상 포함하면 임베딩 없이 BM25 결과를 반환하고,
+        어휘가 겹치는 문서가 없으면 전체 dense 검색으로 대체한다.
+
+        Args:
+            query_text: 검색 질의
+            get_query_vector: 질의 임베딩 함수 (필요할 때만 호출)
+            k: 반환할 문서 수
+            persona: 해당 페르소나 문서로 검색 범위 제한
+            shortlist_size: BM25로 남길 후보 수
+            lexical_only_coverage: dense 검색을 생략할 질의 토큰 포함 비율
+            rrf_k: Reciprocal Rank Fusion 상수
+
+        Returns:
+            ([(문서, 점수)], 사용된 방식 'lexical' | 'hybrid' | 'dense')
+        """
+        with self._lock:
+            rows = self._candidate_rows(persona, None)
+            shortlist, coverage = self._get_lexical_index().search(
+                query_text, max(shortlist_size, k), rows=rows
+            )
+            generation = self._generation
+
+            if shortlist and coverage >= lexical_only_coverage:
+                return [(self._document(row), score) for row, score in shortlist[:k]], 'lexical'
+
+        if not shortlist:
+            return self.search(get_query_vector(), k=k, persona=persona), 'dense'
+
+        query_vector = get_query_vector()
+        query = _normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+        with self._lock:
+            if generation != self._generation:
+                # 임베딩하는 동안 인덱스가 바뀌었으면 후보 행 번호를 신뢰할 수 없음
+                return self.search(query_vector, k=k, persona=persona), 'dense'
+
+            shortlist_rows = np.asarray([row for row, _ in shortlist], dtype=np.int64)
+            dense_order = np.argsort(-self._score_rows(query, shortlist_rows))
+
+            fused = {}
+            for rank, (row, _) in enumerate(shortlist):
+                fused[row] = 1.0 / (rrf_k + rank + 1)
+            for rank, position in enumerate(dense_order):
+                row = int(shortlist_rows[position])
+                fused[row] += 1.0 / (rrf_k + rank + 1)
+
+            ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self._document(row), score) for row, score in ranked], 'hybrid'
+
+    def compression_report(self, k: int = 10, sample_size: int = 200, queries: Optional[np.ndarray] = None) -> Dict:
+        """
+        현재 압축 설정의 원본(float32) 대비 recall@k / 메모리 / 검색 시간 보고서
+
+        저장된 압축 벡터가 있으면 그것을, 없으면 현재 설정으로 새로 만들어 비교한다.
+        queries를 주지 않으면 저장된 문서 벡터 중 sample_size개를 질의로 사용한다.
+        """
+        with self._lock:
+            if not len(self._ids):
+                return {}
+            compact = self._store.compact if self._store is not None else None
+            if compact is None:
+                compact = self._build_compact()
+            vectors = self._vectors
+        report = recall_report(vectors, compact, queries=queries, k=k, sample_size=sample_size)
+        report['pca_dim'] = int(compact.components.shape[1]) if compact.components is not None else None
+        return report
+
+    def persona_store(self, persona: str, embeddings) -> "PersonaStoreView":
+        """페르소나 하나로 범위가 제한된 벡터 스토어 뷰"""
+        return PersonaStoreView(self, persona, embeddings)
+
+
+class PersonaStoreView:
+    """통합 인덱스를 페르소나 단위 벡터 스토어처럼 사용하기 위한 뷰 (Chroma 호환 일부 API)"""
+
+    def __init__(self, index: PersonaVectorIndex, persona: str, embeddings):
+        self.index = index
+        self.persona = persona
+        self.embeddings = embeddings
+
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.index.search(embedding, k=k, persona=self.persona, where=kwargs.get('filter'))]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        return self.index.search(
+            self.embeddings.embed_query(query), k=k, persona=self.persona, where=kwargs.get('filter')
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def hybrid_search(
+        self, query: str, k: int = 4, get_query_vector: Optional[Callable[[], Sequence[float]]] = None, **kwargs
+    ) -> Tuple[List[Document], str]:
+        results, mode = self.index.hybrid_search(
+            query,
+            get_query_vector or (lambda: self.embeddings.embed_query(query)),
+            k=k,
+            persona=self.persona,
+            **kwargs
+        )
+        return [doc for doc, _ in results], mode
+
+    def count(self) -> int:
+        return self.index.count(self.persona)
+
+    def as_retriever(self, search_type: str = "similarity", search_kwargs: Optional[Dict] = None) -> "PersonaIndexRetriever":
+        return PersonaIndexRetriever(store=self, k=(search_kwargs or {}).get("k", 4))
+
+
+class PersonaIndexRetriever(BaseRetriever):
+    """PersonaStoreView 기반 LangChain Retriever"""
+
+    store: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.store.similarity_search(query, k=self.k)
@@ -11,26 +11,16 @@ if sys.platform == 'win32':
 from dotenv import load_dotenv
 load_dotenv()
 
-# Temporarily modify RAG Manager to force recreate
-import rag.rag_manager as rag_module
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader
+from rag.rag_manager import RAGManager
 
 class ForceRefreshRAG:
     """Force refresh RAG with new data"""
     
     def __init__(self):
-        self.data_dir = Path("rag/data")
-        self.vector_store_dir = Path("rag/vector_stores_new")  # New directory
-        self.vector_store_dir.mkdir(exist_ok=True)
-        
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-        )
+        # RAGManager 경유로 재생성해야 매니페스트(원본 해시/청크 ID)가 함께 갱신됨
+        self.rag = RAGManager()
+        self.data_dir = self.rag.data_dir
+        self.embeddings = self.rag.embeddings
         
         self.personas = {
             'customer_iphone_to_galaxy': '아이폰→갤럭시 전환자',
@@ -61,25 +51,7 @@ class ForceRefreshRAG:
             print(f"\n   Refreshing: {persona_name}")
             
             try:
-                # Load document
-                loader = TextLoader(str(file_path), encoding='utf-8')
-                docs = loader.load()
-                
-                # Split
-                chunks = self.text_splitter.split_documents(docs)
-                print(f"      Chunks: {len(chunks)}")
-                
-                # Create NEW vector store (force recreate)
-                vector_path = str(self.vector_store_dir / persona_name)
-                
-                vector_store = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=self.embeddings,
-                    persist_directory=vector_path
-                )
-                
-                print(f"      OK: {vector_path}")
-            
+                self.rag.load_persona_knowledge(persona_name, force_rebuild=True)
             except Exception as e:
                 print(f"      FAIL: {e}")
 
@@ -90,9 +62,12 @@ print("="*80)
 refresher = ForceRefreshRAG()
 refresher.refresh_all()
 
+cache_stats = refresher.embeddings.stats()
+print(f"\nEmbedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+      f"({cache_stats['hit_rate']:.0%} reused)")
+
 print("\n" + "="*80)
 print("Complete!")
 print("="*80)
-print("\nNow move rag/vector_stores_new to rag/vector_stores")
-print("(Close all Python processes first)")
-
+print("\nNote: RAGManager now rebuilds only stale personas automatically;")
+print("use this script only when a full rebuild is really needed.")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""최신 구조화 리뷰(data/structured_reviews_*)를 색인된 실제 리뷰 페르소나 인덱스에 증분 반영"""
+import sys
+import argparse
+from pathlib import Path
+
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from rag.real_review_rag_manager import RealReviewRAGManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--local-embeddings", action="store_true", help="OpenAI 대신 로컬 sentence-transformers 임베딩 사용")
+    args = parser.parse_args()
+
+    rag = RealReviewRAGManager(use_openai_embeddings=not args.local_embeddings)
+    summary = rag.sync_review_data()
+    if not summary:
+        print("반영할 구조화 리뷰가 없습니다.")
+        return
+
+    print(f"코퍼스: {summary['source']}")
+    print(f"추가 {summary['added']}개 / 변경 {summary['updated']}개 / 삭제 {summary['removed']}개")
+    print(f"청크 upsert {summary['chunks_upserted']}개 / 삭제 {summary['chunks_deleted']}개")
+    for persona_name, count in sorted(summary['personas'].items()):
+        print(f"   {persona_name}: +{count}개 리뷰")
+
+
+if __name__ == "__main__":
+    main()
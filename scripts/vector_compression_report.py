@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""실제 리뷰 인덱스 벡터 압축 설정별 recall@k / 메모리 / 검색 시간 비교"""
+import sys
+import argparse
+from pathlib import Path
+
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.mmap_store import MappedStore, current_store
+from rag.quantization import QuantizedMatrix, recall_report
+
+CANDIDATES = [
+    ("float16", None),
+    ("int8", None),
+    ("int8", 512),
+    ("int8", 256),
+    ("int8", 128),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index-dir", default=str(Path(__file__).resolve().parent.parent / "rag" / "vector_index" / "real_reviews"))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="질의로 사용할 문서 벡터 수")
+    args = parser.parse_args()
+
+    directory = current_store(Path(args.index_dir))
+    if directory is None:
+        print(f"인덱스가 없습니다: {args.index_dir}")
+        return
+
+    store = MappedStore(directory)
+    print(f"인덱스: {directory} ({store.count:,}개 x {store.dim}차원, {store.embedding_model})")
+    print(f"{'압축':<8} {'PCA':>5} {'recall@' + str(args.k):>10} {'메모리':>8} {'원본 ms':>9} {'압축 ms':>9}")
+    for compression, pca_dim in CANDIDATES:
+        if pca_dim and pca_dim >= store.dim:
+            continue
+        compact = QuantizedMatrix.build(store.vectors, compression, pca_dim)
+        report = recall_report(store.vectors, compact, k=args.k, sample_size=args.queries)
+        print(f"{compression:<8} {pca_dim or '-':>5} {report[f'recall@{args.k}']:>10.3f} "
+              f"{'1/' + str(report['memory_ratio']):>8} {report['full_ms_per_query']:>9} {report['compact_ms_per_query']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,37 +4,48 @@
 데이터 구조 확인 스크립트
 """
 
-import json
-import os
+import sys
+from pathlib import Path
+
+# 저장소 루트의 공용 리뷰 로더/컬럼 저장소 사용 (simple_chat 디렉토리에서 직접 실행되는 경우 대비)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from rag.review_store import INDEXED_COLUMNS, ReviewStore
+from rag.streaming import load_structured_reviews
 
 def check_data_structure():
     """데이터 구조 확인"""
-    file_path = "data/structured_reviews_20251021_004950.json"
-    
+    # 인자로 structured_reviews JSON 파일 또는 JSONL 샤드 디렉토리 지정 가능
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "data/structured_reviews_20251021_004950.json"
+
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+        data = load_structured_reviews(Path(file_path))
+
         print("Data keys:", list(data.keys()))
         print("iPhone reviews count:", len(data.get('iphone_reviews', [])))
         print("Galaxy reviews count:", len(data.get('galaxy_reviews', [])))
-        
+
         # 샘플 리뷰 확인
         if data.get('iphone_reviews'):
             sample = data['iphone_reviews'][0]
             print("\nSample iPhone review:")
             print("Keys:", list(sample.keys()))
             print("Content preview:", sample.get('content', '')[:100] + "...")
-        
+
         if data.get('galaxy_reviews'):
             sample = data['galaxy_reviews'][0]
             print("\nSample Galaxy review:")
             print("Keys:", list(sample.keys()))
             print("Content preview:", sample.get('content', '')[:100] + "...")
-            
+
+        # 메타데이터 분포 (컬럼 저장소 비트맵 인덱스로 집계)
+        store = ReviewStore(data.get('iphone_reviews', []) + data.get('galaxy_reviews', []))
+        for column in INDEXED_COLUMNS:
+            print(f"\n{column} distribution:", store.value_counts(column))
+
     except Exception as e:
         print(f"Error: {e}")
 
 if __name__ == "__main__":
     check_data_structure()
-
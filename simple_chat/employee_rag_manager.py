@@ -6,16 +6,75 @@
 """
 
 import os
+import sys
 import json
+import time
 import openai
+from pathlib import Path
 from typing import List, Dict, Optional
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+
+# 저장소 루트의 공용 검색 캐시 사용 (simple_chat 디렉토리에서 직접 실행되는 경우 대비)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from rag.retrieval_cache import RetrievalCache, resolve_cache_settings
+from rag.prompt_budget import PromptBudget
+from rag.sparse_index import SharedTfidfIndex
+from rag.tfidf_store import SHARED_INDEX_NAME, TfidfIndexStore, build_stale, combined_hash, source_hash
+
+# TF-IDF 설정 (바뀌면 저장된 인덱스의 원본 해시가 달라져 다시 학습)
+TFIDF_SETTINGS = {
+    'max_features': 1000,  # 페르소나당 어휘 수 (공유 어휘는 페르소나 수만큼 늘림)
+    'ngram_range': [1, 2],
+    'min_paragraph_chars': 50
+}
+
+# 최소 유사도 임계값 (이하인 문서는 컨텍스트에서 제외)
+MIN_SIMILARITY = 0.1
+
+
+def build_documents(persona_type: str, file_path: str, persona_name: str, persona_role: str) -> Optional[List[Dict]]:
+    """
+    임직원 텍스트 파일로 문단 문서 목록 생성
+    
+    Returns:
+        [{'content', 'metadata'}] 또는 유효한 문서가 없으면 None
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        print(f"Loaded employee data for {persona_type}: {len(content)} characters")
+    except Exception as e:
+        print(f"Error loading data for {persona_type}: {e}")
+        return None
+    
+    # 텍스트를 문단 단위로 분할
+    paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+    
+    # 문서 생성
+    documents = []
+    for i, paragraph in enumerate(paragraphs):
+        if len(paragraph) > TFIDF_SETTINGS['min_paragraph_chars']:  # 의미있는 텍스트만 포함
+            doc = {
+                'content': paragraph,
+                'metadata': {
+                    'persona_type': persona_type,
+                    'persona_name': persona_name,
+                    'persona_role': persona_role,
+                    'paragraph_id': i
+                }
+            }
+            documents.append(doc)
+    
+    if not documents:
+        print(f"No valid documents found for {persona_type}")
+        return None
+    
+    return documents
 
 class EmployeePersonaRAGManager:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, cache_size: Optional[int] = None, cache_ttl: Optional[float] = None):
         """임직원 페르소나 RAG 매니저 초기화"""
         self.openai_api_key = openai_api_key
         openai.api_key = openai_api_key
@@ -48,11 +107,23 @@ class EmployeePersonaRAGManager:
         # 데이터 저장 경로
         self.data_path = "simple_chat/employee_data"
         os.makedirs(self.data_path, exist_ok=True)
+        self.index_path = "simple_chat/indexes"
         
-        # 인덱스 저장
-        self.text_indexes = {}
-        self.vectorizers = {}
+        # 페르소나 문서 / 학습된 TF-IDF 인덱스 디스크 캐시 (원본 해시가 같으면 재학습 생략)
+        self.index_store = TfidfIndexStore(self.index_path, "employees")
+        
+        # 공유 어휘 인덱스 (모든 페르소나 문단을 CSR 행렬 하나에, 페르소나별 행 범위)
+        self.text_index: Optional[SharedTfidfIndex] = None
         self.documents = {}
+        self.source_hashes = {}
+        
+        # 검색 결과 메모이제이션 (공유 인덱스 재학습 시 전체 무효화)
+        # 크기/TTL: RAG_CACHE_MAX_RESULTS / RAG_CACHE_TTL_SECONDS 환경변수 > cache_size / cache_ttl 인자 > 기본값
+        self.retrieval_cache = RetrievalCache(**resolve_cache_settings(cache_size, cache_ttl))
+        
+        # 문서당 컨텍스트 길이 제한 (토큰 경계에서 자름)
+        self.prompt_budget = PromptBudget(model="gpt-4o-mini")
+        self.max_context_tokens = 200
     
     def load_employee_data(self, persona_type: str) -> str:
         """특정 임직원 페르소나의 데이터 로드"""
@@ -76,106 +147,198 @@ class EmployeePersonaRAGManager:
             print(f"Error loading data for {persona_type}: {e}")
             return ""
     
+    def _build_args(self, persona_type: str):
+        persona_info = self.employee_personas[persona_type]
+        return (persona_type, persona_info["file"], persona_info['name'], persona_info['role'])
+    
+    def _source_hash(self, persona_type: str) -> Optional[str]:
+        # 이름/역할은 문서 메타데이터에 들어가므로 설정과 함께 해시
+        persona_info = self.employee_personas[persona_type]
+        settings = dict(TFIDF_SETTINGS, persona_name=persona_info['name'], persona_role=persona_info['role'])
+        return source_hash(Path(persona_info["file"]), settings)
+    
+    def _set_documents(self, persona_type: str, documents: Optional[List[Dict]], hash_value: Optional[str]):
+        if documents:
+            self.documents[persona_type] = documents
+            self.source_hashes[persona_type] = hash_value
+        else:
+            self.documents.pop(persona_type, None)
+            self.source_hashes.pop(persona_type, None)
+    
+    def _refresh_index(self) -> bool:
+        """
+        현재 페르소나 문서로 공유 인덱스 로드 또는 재학습
+        
+        어휘와 IDF를 모든 페르소나가 공유하므로 한 페르소나만 바뀌어도 전체를 다시 학습한다.
+        
+        Returns:
+            저장된 인덱스를 그대로 사용했으면 True
+        """
+        self.retrieval_cache.invalidate()
+        if not self.documents:
+            self.text_index = None
+            return False
+        
+        shared_hash = combined_hash(self.source_hashes, TFIDF_SETTINGS)
+        entry = self.index_store.load(SHARED_INDEX_NAME, shared_hash)
+        if entry is not None:
+            self.text_index = entry['index']
+            return True
+        
+        self.text_index = SharedTfidfIndex.build(
+            self.documents,
+            max_features=TFIDF_SETTINGS['max_features'] * len(self.documents),
+            ngram_range=TFIDF_SETTINGS['ngram_range']
+        )
+        self.index_store.save(SHARED_INDEX_NAME, shared_hash, index=self.text_index)
+        return False
+    
     def create_text_index(self, persona_type: str) -> bool:
-        """특정 임직원 페르소나에 대한 텍스트 인덱스 생성"""
+        """특정 임직원 페르소나 문서를 다시 만들고 공유 텍스트 인덱스 재학습 (저장된 인덱스 무시)"""
         print(f"Creating text index for {persona_type}...")
         
-        # 데이터 로드
-        content = self.load_employee_data(persona_type)
-        if not content:
+        if persona_type not in self.employee_personas:
+            print(f"Unknown persona type: {persona_type}")
             return False
         
-        # 텍스트를 문단 단위로 분할
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-        
-        # 문서 생성
-        documents = []
-        for i, paragraph in enumerate(paragraphs):
-            if len(paragraph) > 50:  # 의미있는 텍스트만 포함
-                doc = {
-                    'content': paragraph,
-                    'metadata': {
-                        'persona_type': persona_type,
-                        'persona_name': self.employee_personas[persona_type]['name'],
-                        'persona_role': self.employee_personas[persona_type]['role'],
-                        'paragraph_id': i
-                    }
-                }
-                documents.append(doc)
-        
-        if not documents:
-            print(f"No valid documents found for {persona_type}")
+        file_path = self.employee_personas[persona_type]["file"]
+        if not os.path.exists(file_path):
+            print(f"Data file not found: {file_path}")
             return False
         
-        # TF-IDF 벡터화
-        texts = [doc['content'] for doc in documents]
-        vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words=None,  # 한국어는 불용어 제거하지 않음
-            ngram_range=(1, 2)
-        )
+        documents = build_documents(*self._build_args(persona_type))
+        hash_value = self._source_hash(persona_type)
+        if documents is not None:
+            self.index_store.save(persona_type, hash_value, documents=documents)
+        self._set_documents(persona_type, documents, hash_value)
+        self._refresh_index()
         
-        try:
-            tfidf_matrix = vectorizer.fit_transform(texts)
-            
-            # 저장
-            self.documents[persona_type] = documents
-            self.vectorizers[persona_type] = vectorizer
-            self.text_indexes[persona_type] = tfidf_matrix
-            
-            print(f"Text index created for {persona_type}: {len(documents)} documents")
-            return True
-            
-        except Exception as e:
-            print(f"Error creating text index for {persona_type}: {e}")
+        if documents is None:
             return False
+        print(f"Text index created for {persona_type}: {len(documents)} documents")
+        return True
     
     def load_all_personas(self) -> bool:
-        """모든 임직원 페르소나에 대한 텍스트 인덱스 생성"""
+        """
+        모든 임직원 페르소나 문서와 공유 텍스트 인덱스 로드
+        
+        원본 해시가 같은 페르소나는 저장된 문서를 그대로 읽고, 없거나 원본이 바뀐 페르소나만
+        다시 만든다. 공유 인덱스는 모든 원본 해시가 같을 때만 저장본을 쓴다.
+        """
         print("Loading all employee persona text indexes...")
         
-        success_count = 0
+        cached_count = 0
+        stale = {}
+        hashes = {}
         for persona_type in self.employee_personas.keys():
-            if self.create_text_index(persona_type):
-                success_count += 1
+            hashes[persona_type] = self._source_hash(persona_type)
+            if hashes[persona_type] is None:
+                print(f"Data file not found: {self.employee_personas[persona_type]['file']}")
+                self._set_documents(persona_type, None, None)
+                continue
+            
+            entry = self.index_store.load(persona_type, hashes[persona_type])
+            if entry is None:
+                stale[persona_type] = self._build_args(persona_type)
+                continue
+            
+            self._set_documents(persona_type, entry['documents'], hashes[persona_type])
+            cached_count += 1
+        
+        if stale:
+            print(f"Rebuilding persona documents: {', '.join(stale)}")
+        for persona_type, documents in build_stale(build_documents, stale).items():
+            if documents is not None:
+                self.index_store.save(persona_type, hashes[persona_type], documents=documents)
+            self._set_documents(persona_type, documents, hashes[persona_type])
         
-        print(f"Successfully loaded {success_count}/{len(self.employee_personas)} employee persona text indexes")
+        # 페르소나 순서를 정의 순서로 유지 (공유 행렬 행 범위 순서)
+        self.documents = {p: self.documents[p] for p in self.employee_personas if p in self.documents}
+        index_cached = self._refresh_index()
+        
+        success_count = len(self.documents)
+        print(f"Successfully loaded {success_count}/{len(self.employee_personas)} employee persona text indexes "
+              f"({cached_count} from disk, shared index {'from disk' if index_cached else 'rebuilt'})")
         return success_count > 0
     
     def get_context(self, persona_type: str, query: str, k: int = 2) -> List[str]:
         """특정 임직원 페르소나에서 관련 컨텍스트 검색"""
-        if persona_type not in self.text_indexes:
+        if self.text_index is None or persona_type not in self.text_index:
             print(f"Text index not found for {persona_type}")
             return []
         
         try:
-            # 쿼리 벡터화
-            query_vector = self.vectorizers[persona_type].transform([query])
-            
-            # 코사인 유사도 계산
-            similarity_scores = cosine_similarity(
-                query_vector, 
-                self.text_indexes[persona_type]
-            ).flatten()
-            
-            # 상위 k개 문서 선택
-            top_indices = similarity_scores.argsort()[-k:][::-1]
-            
-            # 컨텍스트 생성
-            contexts = []
-            for idx in top_indices:
-                if similarity_scores[idx] > 0.1:  # 최소 유사도 임계값
-                    doc = self.documents[persona_type][idx]
-                    persona_info = self.employee_personas[persona_type]
-                    context = f"[{persona_info['name']} - {persona_info['role']}] {doc['content'][:300]}..."
-                    contexts.append(context)
-            
-            return contexts
-            
+            return self.retrieval_cache.cached_results(
+                persona_type, query, k, lambda: self._search(persona_type, query, k)
+            )
         except Exception as e:
+            # 실패 결과는 캐시하지 않음 (다음 호출에서 다시 검색)
             print(f"Error retrieving context for {persona_type}: {e}")
             return []
     
+    def get_context_many(self, queries_by_persona: Dict[str, str], k: int = 2) -> Dict[str, List[str]]:
+        """
+        여러 임직원 페르소나의 컨텍스트를 한 번에 검색
+        
+        캐시에 없는 (페르소나, 질의) 쌍을 모아 공유 인덱스에서 희소 행렬곱 1회로 점수를 계산한다.
+        
+        Args:
+            queries_by_persona: {임직원 페르소나 타입: 검색 질의}
+            k: 페르소나별 반환할 문서 수
+        
+        Returns:
+            {임직원 페르소나 타입: 관련 컨텍스트 문자열 리스트}
+        """
+        results = {}
+        pending = {}
+        for persona_type, query in queries_by_persona.items():
+            if self.text_index is None or persona_type not in self.text_index:
+                print(f"Text index not found for {persona_type}")
+                results[persona_type] = []
+                continue
+            
+            hit, cached = self.retrieval_cache.lookup_results(persona_type, query, k)
+            if hit:
+                results[persona_type] = cached
+            else:
+                pending[persona_type] = query
+        
+        if not pending:
+            return results
+        
+        started = time.perf_counter()
+        try:
+            matches = self.text_index.search_many(list(pending.items()), k, min_score=MIN_SIMILARITY)
+        except Exception as e:
+            print(f"Error retrieving contexts for {', '.join(pending)}: {e}")
+            results.update({persona_type: [] for persona_type in pending})
+            return results
+        
+        cost = (time.perf_counter() - started) / len(pending)
+        for (persona_type, query), persona_matches in zip(pending.items(), matches):
+            contexts = [self._format_context(persona_type, position) for position, _ in persona_matches]
+            self.retrieval_cache.store_results(persona_type, query, k, contexts, cost)
+            results[persona_type] = contexts
+        
+        return results
+    
+    def _search(self, persona_type: str, query: str, k: int) -> List[str]:
+        """TF-IDF 유사도 검색 (캐시 미스 시 실행, 예외는 호출자가 처리)"""
+        matches = self.text_index.search(persona_type, query, k, min_score=MIN_SIMILARITY)
+        return [self._format_context(persona_type, position) for position, _ in matches]
+    
+    def _format_context(self, persona_type: str, position: int) -> str:
+        doc = self.documents[persona_type][position]
+        persona_info = self.employee_personas[persona_type]
+        return f"[{persona_info['name']} - {persona_info['role']}] {self.prompt_budget.truncate(doc['content'], self.max_context_tokens)}"
+    
+    def get_cache_stats(self) -> Dict:
+        """검색 캐시 적중률 / 절약 시간 통계"""
+        stats = self.retrieval_cache.stats()
+        if self.text_index is not None:
+            stats['text_index'] = self.text_index.stats()
+        return stats
+    
     def get_persona_info(self, persona_type: str) -> Dict:
         """임직원 페르소나 정보 반환"""
         return self.employee_personas.get(persona_type, {})
@@ -5,11 +5,126 @@
 I->G, G->I, I고수, G고수 4개 카테고리로 분류
 """
 
+import functools
+import itertools
 import json
 import os
-from typing import Dict, List, Tuple
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import re
 
+# 저장소 루트의 공용 스트리밍 유틸 사용 (simple_chat 디렉토리에서 직접 실행되는 경우 대비)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from rag.streaming import (
+    STRUCTURED_PLATFORMS, batched, ijson_available, iter_json_items, iter_structured_reviews,
+    load_structured_reviews, ordered_map
+)
+
+# 최소 신뢰도 임계값 (0.05)
+MIN_CONFIDENCE = 0.05
+
+# 프로세스 풀 작업 단위 (리뷰 수) / 이보다 적으면 풀 없이 현재 프로세스에서 처리
+CHUNK_SIZE = 2000
+
+# 토큰별 매칭 키워드 메모 최대 크기 (넘으면 비움)
+MAX_TOKEN_CACHE = 200000
+
+
+class PersonaKeywordIndex:
+    """
+    전체 카테고리 키워드를 한 번에 매칭하는 역색인
+    
+    리뷰를 한 번만 토큰화하고 토큰별로 포함된 키워드를 메모해, 키워드마다 리뷰 전체를
+    다시 검사하지 않는다. 공백이 없는 키워드는 리뷰에 포함될 때 반드시 한 토큰 안에
+    있으므로 "토큰 안에 키워드가 있는가"가 "리뷰에 키워드가 있는가"와 같다.
+    """
+    
+    def __init__(self, persona_categories: Dict[str, Dict]):
+        self.categories = list(persona_categories.keys())
+        self.keyword_counts = [len(config["keywords"]) for config in persona_categories.values()]
+        
+        # 키워드 → 해당 키워드를 가진 카테고리 번호 (카테고리 안 중복 키워드는 중복 가산)
+        self.keywords: List[str] = []
+        self.keyword_categories: List[List[int]] = []
+        positions = {}
+        for category_index, config in enumerate(persona_categories.values()):
+            for keyword in config["keywords"]:
+                if keyword not in positions:
+                    positions[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                    self.keyword_categories.append([])
+                self.keyword_categories[positions[keyword]].append(category_index)
+        
+        # 공백이 있거나 빈 키워드는 토큰 안에 있을 수 없으므로 리뷰 전체에서 검사
+        self.token_keywords = [i for i, keyword in enumerate(self.keywords) if keyword and not _has_space(keyword)]
+        self.text_keywords = [i for i, keyword in enumerate(self.keywords) if not keyword or _has_space(keyword)]
+        self._token_cache: Dict[str, Tuple[int, ...]] = {}
+    
+    def _keywords_in_token(self, token: str) -> Tuple[int, ...]:
+        matched = self._token_cache.get(token)
+        if matched is None:
+            if len(self._token_cache) >= MAX_TOKEN_CACHE:
+                self._token_cache.clear()
+            matched = tuple(i for i in self.token_keywords if self.keywords[i] in token)
+            self._token_cache[token] = matched
+        return matched
+    
+    def classify(self, review_text: str) -> Tuple[str, float]:
+        """classify_review와 같은 결과 (category, confidence_score)"""
+        review_lower = review_text.lower()
+        
+        matched = set()
+        for token in set(review_lower.split()):
+            matched.update(self._keywords_in_token(token))
+        matched.update(i for i in self.text_keywords if self.keywords[i] in review_lower)
+        
+        # 리뷰에 포함된 키워드마다 2점
+        scores = [0] * len(self.categories)
+        for keyword_index in matched:
+            for category_index in self.keyword_categories[keyword_index]:
+                scores[category_index] += 2
+        
+        # 키워드 밀도 (동점이면 먼저 정의된 카테고리)
+        best_index = 0
+        best_density = None
+        for category_index, (score, count) in enumerate(zip(scores, self.keyword_counts)):
+            density = score / count if count else 0
+            if best_density is None or density > best_density:
+                best_index, best_density = category_index, density
+        
+        if best_density < MIN_CONFIDENCE:
+            return "unknown", best_density
+        
+        return self.categories[best_index], best_density
+    
+    def classify_many(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """여러 리뷰 분류 (토큰 메모 공유)"""
+        return [self.classify(text) for text in texts]
+
+
+def _has_space(keyword: str) -> bool:
+    return any(char.isspace() for char in keyword)
+
+
+# 워커 프로세스별 키워드 색인 (청크마다 다시 만들지 않도록)
+_worker_index: Optional[PersonaKeywordIndex] = None
+
+
+def _init_worker(persona_categories: Dict[str, Dict]):
+    global _worker_index
+    _worker_index = PersonaKeywordIndex(persona_categories)
+
+
+def _classify_chunk(texts: List[str]) -> List[Tuple[str, float]]:
+    return _worker_index.classify_many(texts)
+
+
 class SimplePersonaClassifier:
     def __init__(self):
         self.persona_categories = {
@@ -38,65 +153,99 @@ class SimplePersonaClassifier:
                 "description": "Loyal Galaxy ecosystem users"
             }
         }
+        
+        # 전체 키워드 역색인 (리뷰당 토큰화 1회)
+        self.keyword_index = PersonaKeywordIndex(self.persona_categories)
     
     def classify_review(self, review_text: str) -> Tuple[str, float]:
         """
         리뷰 텍스트를 분석하여 페르소나 카테고리 분류
         Returns: (category, confidence_score)
         """
-        review_lower = review_text.lower()
+        return self.keyword_index.classify(review_text)
+    
+    def iter_classifications(self, texts: Iterable[str], max_workers: Optional[int] = None,
+                             chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, float]]:
+        """
+        리뷰 텍스트를 청크 단위로 프로세스 풀에서 분류해 입력 순서대로 하나씩 반환
         
-        # 각 카테고리별 점수 계산
-        scores = {}
-        for category, config in self.persona_categories.items():
-            score = 0
-            keywords = config["keywords"]
-            
-            # 키워드 매칭 점수 (더 관대한 매칭)
-            for keyword in keywords:
-                if keyword in review_lower:
-                    score += 2  # 가중치 증가
-                # 부분 매칭도 고려
-                elif any(keyword in word for word in review_lower.split()):
-                    score += 1
-            
-            # 키워드 밀도 계산 (더 낮은 임계값)
-            keyword_density = score / len(keywords) if keywords else 0
-            scores[category] = keyword_density
+        입력을 미리 다 읽지 않고 최대 (프로세스 수 x 2)개 청크만 제출하므로 입력이 제너레이터여도
+        메모리 사용량이 일정하고, 첫 청크 결과부터 바로 다음 단계로 넘어간다.
+        프로세스 풀을 만들 수 없거나 도중에 깨지면 아직 결과를 받지 못한 청크부터 현재 프로세스에서
+        이어서 분류한다 (입력 스트림을 다시 읽지 않으므로 결과가 빠지거나 중복되지 않음).
         
-        # 가장 높은 점수의 카테고리 선택
-        best_category = max(scores, key=scores.get)
-        confidence = scores[best_category]
+        Args:
+            texts: 리뷰 텍스트 이터러블
+            max_workers: 최대 프로세스 수 (None이면 CPU 수)
+            chunk_size: 프로세스에 넘기는 리뷰 수
+        """
+        workers = max_workers or os.cpu_count() or 1
+        chunks = batched(texts, chunk_size)
+        # 청크가 하나뿐이면 프로세스 생성 비용이 더 크므로 현재 프로세스에서 처리
+        head = list(itertools.islice(chunks, 2))
+        chunks = itertools.chain(head, chunks)
+        if workers <= 1 or len(head) < 2:
+            for chunk in chunks:
+                yield from self.keyword_index.classify_many(chunk)
+            return
         
-        # 최소 신뢰도 임계값을 더 낮게 설정 (0.05)
-        if confidence < 0.05:
-            return "unknown", confidence
+        make_executor = functools.partial(
+            ProcessPoolExecutor, max_workers=workers, initializer=_init_worker, initargs=(self.persona_categories,)
+        )
+        # 풀을 쓸 수 없게 되면 결과를 받지 못한 청크부터 현재 프로세스에서 분류
+        for chunk_results in ordered_map(make_executor, _classify_chunk, chunks, workers * 2,
+                                         fallback=self.keyword_index.classify_many):
+            yield from chunk_results
+    
+    def classify_reviews(self, texts: List[str], max_workers: Optional[int] = None,
+                         chunk_size: int = CHUNK_SIZE) -> List[Tuple[str, float]]:
+        """
+        여러 리뷰 텍스트를 청크 단위로 프로세스 풀에서 분류 (입력 순서 유지)
         
-        return best_category, confidence
+        Returns:
+            texts 순서대로 (category, confidence_score)
+        """
+        return list(self.iter_classifications(texts, max_workers, chunk_size))
+    
+    def classify_stream(self, reviews: Iterable[Dict], max_workers: Optional[int] = None,
+                        chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+        """
+        리뷰 스트림을 분류해 카테고리가 정해진 리뷰 사본을 입력 순서대로 반환
+        ('persona_category', 'confidence' 추가, 분류되지 않은 리뷰는 제외)
+        """
+        # 분류 결과를 기다리는 리뷰 (제출된 청크만큼만 쌓임)
+        pending = deque()
+        
+        def texts():
+            for review in reviews:
+                content = review.get('review', '') or review.get('content', '')
+                if not content:
+                    continue
+                pending.append(review)
+                yield content
+        
+        for category, confidence in self.iter_classifications(texts(), max_workers, chunk_size):
+            review = pending.popleft()
+            if category != "unknown" and confidence > MIN_CONFIDENCE:
+                review_with_category = review.copy()
+                review_with_category['persona_category'] = category
+                review_with_category['confidence'] = confidence
+                yield review_with_category
     
-    def process_reviews(self, reviews_data: List[Dict]) -> Dict[str, List[Dict]]:
+    def process_reviews(self, reviews_data: List[Dict], max_workers: Optional[int] = None) -> Dict[str, List[Dict]]:
         """
-        리뷰 데이터를 4개 카테고리로 분류
+        리뷰 데이터를 4개 카테고리로 분류 (청크 단위 프로세스 풀)
         """
+        classified = self.classify_stream(reviews_data, max_workers)
+        
         classified_reviews = {
             "I_to_G": [],
             "G_to_I": [], 
             "I_loyal": [],
             "G_loyal": []
         }
-        
-        for review in reviews_data:
-            content = review.get('review', '') or review.get('content', '')
-            if not content:
-                continue
-                
-            category, confidence = self.classify_review(content)
-            
-            if category != "unknown" and confidence > 0.05:
-                review_with_category = review.copy()
-                review_with_category['persona_category'] = category
-                review_with_category['confidence'] = confidence
-                classified_reviews[category].append(review_with_category)
+        for review in classified:
+            classified_reviews[review['persona_category']].append(review)
         
         return classified_reviews
     
@@ -119,15 +268,61 @@ class SimplePersonaClassifier:
             
             print(f"Saved {category}: {len(reviews)} reviews -> {filepath}")
         
+        return self._save_stats(
+            {category: len(reviews) for category, reviews in classified_reviews.items()}, output_dir
+        )
+    
+    def stream_classified_data(self, classified_reviews: Iterable[Dict], output_dir: str):
+        """
+        classify_stream 결과를 카테고리별 JSON 배열 파일에 받는 대로 이어 쓰기
+        (save_classified_data와 같은 파일 형식, 전체 결과를 메모리에 모으지 않음)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        counts = {category: 0 for category in self.persona_categories}
+        files = {}
+        try:
+            for review in classified_reviews:
+                category = review['persona_category']
+                f = files.get(category)
+                if f is None:
+                    f = files[category] = open(
+                        os.path.join(output_dir, f"{category}_reviews.json.tmp"), 'w', encoding='utf-8'
+                    )
+                    f.write('[\n')
+                else:
+                    f.write(',\n')
+                f.write(json.dumps(review, ensure_ascii=False, indent=2))
+                counts[category] += 1
+        except BaseException:
+            # 중간에 실패하면 임시 파일을 지우고 기존 파일 유지
+            for category, f in files.items():
+                f.close()
+                os.remove(f.name)
+            raise
+        
+        for f in files.values():
+            f.write('\n]')
+            f.close()
+        
+        # 모두 쓴 뒤 파일 교체
+        for category in files:
+            filepath = os.path.join(output_dir, f"{category}_reviews.json")
+            os.replace(filepath + '.tmp', filepath)
+            print(f"Saved {category}: {counts[category]} reviews -> {filepath}")
+        
+        return self._save_stats(counts, output_dir)
+    
+    def _save_stats(self, counts: Dict[str, int], output_dir: str) -> Dict:
         # 전체 통계 저장
         stats = {
-            "total_reviews": sum(len(reviews) for reviews in classified_reviews.values()),
+            "total_reviews": sum(counts.values()),
             "categories": {
                 category: {
-                    "count": len(reviews),
+                    "count": count,
                     "description": self.persona_categories[category]["description"]
                 }
-                for category, reviews in classified_reviews.items()
+                for category, count in counts.items()
             }
         }
         
@@ -138,44 +333,67 @@ class SimplePersonaClassifier:
         print(f"Classification stats saved -> {stats_file}")
         return stats
 
+
+def iter_review_source(path: str) -> Iterator[Dict]:
+    """
+    리뷰 파일/샤드 디렉토리에서 리뷰를 하나씩 반환
+    
+    - JSON 배열 파일: 항목 그대로
+    - structured_reviews JSON 파일 / JSONL 샤드 디렉토리: iPhone → Galaxy 리뷰 순
+    """
+    if os.path.isdir(path) or _first_char(path) == '{':
+        if os.path.isdir(path) or ijson_available():
+            for platform in STRUCTURED_PLATFORMS:
+                yield from iter_structured_reviews(Path(path), platform)
+        else:
+            # ijson이 없으면 플랫폼마다 다시 파싱하지 않도록 한 번에 로드
+            for reviews in load_structured_reviews(Path(path)).values():
+                yield from reviews
+    else:
+        yield from iter_json_items(Path(path))
+
+
+def _first_char(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                return char
+
+
 def main():
     """메인 실행 함수"""
     print("Simple Persona Classifier Starting...")
     
-    # 기존 리뷰 데이터 로드
-    review_files = [
+    # 기존 리뷰 데이터 로드 (인자로 파일 또는 JSONL 샤드 디렉토리 지정 가능)
+    review_files = sys.argv[1:] or [
         "data/structured_reviews_20251021_004950.json",
         "data/structured_reviews_20251021_005002.json", 
         "data/structured_reviews_20251021_005316.json"
     ]
     
-    all_reviews = []
-    for file_path in review_files:
-        if os.path.exists(file_path):
+    loaded = {'total': 0}
+    
+    def all_reviews():
+        for file_path in review_files:
+            if not os.path.exists(file_path):
+                continue
+            count = 0
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        all_reviews.extend(data)
-                    elif isinstance(data, dict):
-                        # structured_reviews 형식인 경우
-                        iphone_reviews = data.get('iphone_reviews', [])
-                        galaxy_reviews = data.get('galaxy_reviews', [])
-                        all_reviews.extend(iphone_reviews)
-                        all_reviews.extend(galaxy_reviews)
-                print(f"Loaded {file_path}: {len(data) if isinstance(data, list) else 'structured'} reviews")
+                for review in iter_review_source(file_path):
+                    count += 1
+                    yield review
             except Exception as e:
                 print(f"Failed to load {file_path}: {e}")
+            print(f"Loaded {file_path}: {count} reviews")
+            loaded['total'] += count
     
-    print(f"Total {len(all_reviews)} reviews loaded")
-    
-    # 분류기 초기화 및 실행
+    # 분류기 초기화 및 실행 (읽기 → 분류 → 저장을 스트림으로 연결)
     classifier = SimplePersonaClassifier()
-    classified_reviews = classifier.process_reviews(all_reviews)
-    
-    # 결과 저장
+    started = time.perf_counter()
     output_dir = "simple_chat/data"
-    stats = classifier.save_classified_data(classified_reviews, output_dir)
+    stats = classifier.stream_classified_data(classifier.classify_stream(all_reviews()), output_dir)
+    print(f"Classified {loaded['total']} reviews in {time.perf_counter() - started:.2f}s")
     
     print("\nClassification Results:")
     for category, info in stats["categories"].items():
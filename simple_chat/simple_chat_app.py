@@ -12,6 +12,7 @@ from typing import List, Dict, Optional
 from datetime import datetime
 import json
 from simple_rag_manager import SimplePersonaRAGManager
+from rag.prompt_budget import PromptBudget
 
 class SimplePersonaChatSystem:
     def __init__(self, openai_api_key: str):
@@ -22,6 +23,9 @@ class SimplePersonaChatSystem:
         # RAG 매니저 초기화
         self.rag_manager = SimplePersonaRAGManager(openai_api_key)
         
+        # 턴 토큰 예산 (시스템 프롬프트 / 최근 이력 / RAG 근거 배분)
+        self.prompt_budget = PromptBudget(model="gpt-4o-mini", reply_tokens=300)
+        
         # 페르소나 설정
         self.personas = {
             "I_to_G": {
@@ -76,13 +80,9 @@ class SimplePersonaChatSystem:
         # RAG 컨텍스트 검색
         contexts = self.rag_manager.get_context(persona_category, user_message, k=2)
         
-        # 컨텍스트를 프롬프트에 포함
-        context_text = ""
-        if contexts:
-            context_text = "\n".join(contexts)
-        
-        # 페르소나 프롬프트 생성
-        system_prompt = f"""당신은 {persona_info['name']} ({persona_info['emoji']})입니다.
+        # 페르소나 프롬프트 생성 (근거는 토큰 예산에 맞춘 뒤 삽입)
+        def build_system_prompt(context_text: str) -> str:
+            return f"""당신은 {persona_info['name']} ({persona_info['emoji']})입니다.
 
 페르소나 특성:
 - {persona_info['description']}
@@ -97,12 +97,16 @@ class SimplePersonaChatSystem:
 3. 구체적인 경험과 감정을 포함하여 답변하세요
 4. 한국어로 답변하세요
 5. 3-5문장 정도로 간결하게 답변하세요"""
+        
+        turn = self.prompt_budget.start_turn(build_system_prompt(""), user_message)
+        evidence = self.prompt_budget.fit_evidence(turn, contexts, separator="\n") if contexts else []
+        system_prompt = build_system_prompt("\n".join(evidence))
 
         # 채팅 히스토리 구성
         messages = [{"role": "system", "content": system_prompt}]
         
-        # 최근 채팅 히스토리 추가 (최대 6개)
-        for msg in chat_history[-6:]:
+        # 최근 채팅 히스토리 추가 (최대 6개, 이력 예산을 넘는 오래된 메시지는 제외)
+        for msg in self.prompt_budget.fit_history(turn, chat_history[-6:]):
             if msg["role"] == "user":
                 messages.append({"role": "user", "content": msg["content"]})
             elif msg["role"] == "assistant":
@@ -110,6 +114,7 @@ class SimplePersonaChatSystem:
         
         # 현재 사용자 메시지 추가
         messages.append({"role": "user", "content": user_message})
+        print(self.prompt_budget.describe(turn, persona_info['name']))
         
         try:
             # OpenAI API 호출
@@ -6,16 +6,79 @@
 """
 
 import os
+import sys
 import json
+import time
 import openai
+from pathlib import Path
 from typing import List, Dict, Optional
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+
+# 저장소 루트의 공용 검색 캐시 사용 (simple_chat 디렉토리에서 직접 실행되는 경우 대비)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from rag.retrieval_cache import RetrievalCache, resolve_cache_settings
+from rag.prompt_budget import PromptBudget
+from rag.sparse_index import SharedTfidfIndex
+from rag.tfidf_store import SHARED_INDEX_NAME, TfidfIndexStore, build_stale, combined_hash, source_hash
+
+# TF-IDF 설정 (바뀌면 저장된 인덱스의 원본 해시가 달라져 다시 학습)
+TFIDF_SETTINGS = {
+    'max_features': 1000,  # 카테고리당 어휘 수 (공유 어휘는 카테고리 수만큼 늘림)
+    'ngram_range': [1, 2],
+    'min_content_chars': 20
+}
+
+# 최소 유사도 임계값 (이하인 문서는 컨텍스트에서 제외)
+MIN_SIMILARITY = 0.1
+
+
+def build_documents(persona_category: str, data_file: str) -> Optional[List[Dict]]:
+    """
+    리뷰 JSON 파일로 검색 문서 목록 생성
+    
+    Returns:
+        [{'content', 'metadata'}] 또는 유효한 문서가 없으면 None
+    """
+    try:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            reviews = json.load(f)
+        print(f"Loaded {len(reviews)} reviews for {persona_category}")
+    except Exception as e:
+        print(f"Error loading data for {persona_category}: {e}")
+        return None
+    
+    # 문서 생성
+    documents = []
+    for review in reviews:
+        content = review.get('review', '') or review.get('content', '')
+        if not content or len(content.strip()) < TFIDF_SETTINGS['min_content_chars']:
+            continue
+        
+        # 메타데이터 추가
+        metadata = {
+            'persona_category': persona_category,
+            'review_id': review.get('id', ''),
+            'rating': review.get('rating', ''),
+            'author': review.get('author', ''),
+            'date': review.get('date', ''),
+            'sentiment': review.get('sentiment', '')
+        }
+        
+        documents.append({
+            'content': content,
+            'metadata': metadata
+        })
+    
+    if not documents:
+        print(f"No valid documents found for {persona_category}")
+        return None
+    
+    return documents
 
 class SimplePersonaRAGManager:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, cache_size: Optional[int] = None, cache_ttl: Optional[float] = None):
         """단순화된 페르소나 RAG 매니저 초기화"""
         self.openai_api_key = openai_api_key
         openai.api_key = openai_api_key
@@ -49,10 +112,21 @@ class SimplePersonaRAGManager:
         self.index_path = "simple_chat/indexes"
         os.makedirs(self.index_path, exist_ok=True)
         
-        # 인덱스 저장
-        self.text_indexes = {}
-        self.vectorizers = {}
+        # 카테고리 문서 / 학습된 TF-IDF 인덱스 디스크 캐시 (원본 해시가 같으면 재학습 생략)
+        self.index_store = TfidfIndexStore(self.index_path, "reviews")
+        
+        # 공유 어휘 인덱스 (모든 카테고리 문서를 CSR 행렬 하나에, 카테고리별 행 범위)
+        self.text_index: Optional[SharedTfidfIndex] = None
         self.documents = {}
+        self.source_hashes = {}
+        
+        # 검색 결과 메모이제이션 (공유 인덱스 재학습 시 전체 무효화)
+        # 크기/TTL: RAG_CACHE_MAX_RESULTS / RAG_CACHE_TTL_SECONDS 환경변수 > cache_size / cache_ttl 인자 > 기본값
+        self.retrieval_cache = RetrievalCache(**resolve_cache_settings(cache_size, cache_ttl))
+        
+        # 문서당 컨텍스트 길이 제한 (토큰 경계에서 자름)
+        self.prompt_budget = PromptBudget(model="gpt-4o-mini")
+        self.max_context_tokens = 150
     
     def load_persona_data(self, persona_category: str) -> List[Dict]:
         """특정 페르소나 카테고리의 데이터 로드"""
@@ -71,111 +145,190 @@ class SimplePersonaRAGManager:
             print(f"Error loading data for {persona_category}: {e}")
             return []
     
-    def create_text_index(self, persona_category: str) -> bool:
-        """특정 페르소나 카테고리에 대한 텍스트 인덱스 생성"""
-        print(f"Creating text index for {persona_category}...")
+    def _source_file(self, persona_category: str) -> Path:
+        return Path(f"{self.data_path}/{persona_category}_reviews.json")
+    
+    def _set_documents(self, persona_category: str, documents: Optional[List[Dict]], hash_value: Optional[str]):
+        if documents:
+            self.documents[persona_category] = documents
+            self.source_hashes[persona_category] = hash_value
+        else:
+            self.documents.pop(persona_category, None)
+            self.source_hashes.pop(persona_category, None)
+    
+    def _refresh_index(self) -> bool:
+        """
+        현재 카테고리 문서로 공유 인덱스 로드 또는 재학습
+        
+        어휘와 IDF를 모든 카테고리가 공유하므로 한 카테고리만 바뀌어도 전체를 다시 학습한다.
         
-        # 데이터 로드
-        reviews = self.load_persona_data(persona_category)
-        if not reviews:
+        Returns:
+            저장된 인덱스를 그대로 사용했으면 True
+        """
+        self.retrieval_cache.invalidate()
+        if not self.documents:
+            self.text_index = None
             return False
         
-        # 문서 생성
-        documents = []
-        for review in reviews:
-            content = review.get('review', '') or review.get('content', '')
-            if not content or len(content.strip()) < 20:
-                continue
-            
-            # 메타데이터 추가
-            metadata = {
-                'persona_category': persona_category,
-                'review_id': review.get('id', ''),
-                'rating': review.get('rating', ''),
-                'author': review.get('author', ''),
-                'date': review.get('date', ''),
-                'sentiment': review.get('sentiment', '')
-            }
-            
-            documents.append({
-                'content': content,
-                'metadata': metadata
-            })
+        shared_hash = combined_hash(self.source_hashes, TFIDF_SETTINGS)
+        entry = self.index_store.load(SHARED_INDEX_NAME, shared_hash)
+        if entry is not None:
+            self.text_index = entry['index']
+            return True
+        
+        self.text_index = SharedTfidfIndex.build(
+            self.documents,
+            max_features=TFIDF_SETTINGS['max_features'] * len(self.documents),
+            ngram_range=TFIDF_SETTINGS['ngram_range']
+        )
+        self.index_store.save(SHARED_INDEX_NAME, shared_hash, index=self.text_index)
+        return False
+    
+    def create_text_index(self, persona_category: str) -> bool:
+        """특정 페르소나 카테고리 문서를 다시 만들고 공유 텍스트 인덱스 재학습 (저장된 인덱스 무시)"""
+        print(f"Creating text index for {persona_category}...")
         
-        if not documents:
-            print(f"No valid documents found for {persona_category}")
+        source_file = self._source_file(persona_category)
+        if not source_file.exists():
+            print(f"Data file not found: {source_file}")
             return False
         
-        # TF-IDF 벡터화
-        texts = [doc['content'] for doc in documents]
-        vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words=None,  # 한국어는 불용어 제거하지 않음
-            ngram_range=(1, 2)
-        )
+        documents = build_documents(persona_category, str(source_file))
+        hash_value = source_hash(source_file, TFIDF_SETTINGS)
+        if documents is not None:
+            self.index_store.save(persona_category, hash_value, documents=documents)
+        self._set_documents(persona_category, documents, hash_value)
+        self._refresh_index()
         
-        try:
-            tfidf_matrix = vectorizer.fit_transform(texts)
-            
-            # 저장
-            self.documents[persona_category] = documents
-            self.vectorizers[persona_category] = vectorizer
-            self.text_indexes[persona_category] = tfidf_matrix
-            
-            print(f"Text index created for {persona_category}: {len(documents)} documents")
-            return True
-            
-        except Exception as e:
-            print(f"Error creating text index for {persona_category}: {e}")
+        if documents is None:
             return False
+        print(f"Text index created for {persona_category}: {len(documents)} documents")
+        return True
     
     def load_all_personas(self) -> bool:
-        """모든 페르소나 카테고리에 대한 텍스트 인덱스 생성"""
+        """
+        모든 페르소나 카테고리 문서와 공유 텍스트 인덱스 로드
+        
+        원본 해시가 같은 카테고리는 저장된 문서를 그대로 읽고, 없거나 원본이 바뀐 카테고리만
+        다시 만든다. 공유 인덱스는 모든 원본 해시가 같을 때만 저장본을 쓴다.
+        """
         print("Loading all persona text indexes...")
         
-        success_count = 0
+        cached_count = 0
+        stale = {}
+        hashes = {}
         for category in self.persona_categories.keys():
-            if self.create_text_index(category):
-                success_count += 1
+            source_file = self._source_file(category)
+            hashes[category] = source_hash(source_file, TFIDF_SETTINGS)
+            if hashes[category] is None:
+                print(f"Data file not found: {source_file}")
+                self._set_documents(category, None, None)
+                continue
+            
+            entry = self.index_store.load(category, hashes[category])
+            if entry is None:
+                stale[category] = (category, str(source_file))
+                continue
+            
+            self._set_documents(category, entry['documents'], hashes[category])
+            cached_count += 1
+        
+        if stale:
+            print(f"Rebuilding persona documents: {', '.join(stale)}")
+        for category, documents in build_stale(build_documents, stale).items():
+            if documents is not None:
+                self.index_store.save(category, hashes[category], documents=documents)
+            self._set_documents(category, documents, hashes[category])
+        
+        # 카테고리 순서를 정의 순서로 유지 (공유 행렬 행 범위 순서)
+        self.documents = {c: self.documents[c] for c in self.persona_categories if c in self.documents}
+        index_cached = self._refresh_index()
         
-        print(f"Successfully loaded {success_count}/{len(self.persona_categories)} persona text indexes")
+        success_count = len(self.documents)
+        print(f"Successfully loaded {success_count}/{len(self.persona_categories)} persona text indexes "
+              f"({cached_count} from disk, shared index {'from disk' if index_cached else 'rebuilt'})")
         return success_count > 0
     
     def get_context(self, persona_category: str, query: str, k: int = 2) -> List[str]:
         """특정 페르소나 카테고리에서 관련 컨텍스트 검색"""
-        if persona_category not in self.text_indexes:
+        if self.text_index is None or persona_category not in self.text_index:
             print(f"Text index not found for {persona_category}")
             return []
         
         try:
-            # 쿼리 벡터화
-            query_vector = self.vectorizers[persona_category].transform([query])
-            
-            # 코사인 유사도 계산
-            similarity_scores = cosine_similarity(
-                query_vector, 
-                self.text_indexes[persona_category]
-            ).flatten()
-            
-            # 상위 k개 문서 선택
-            top_indices = similarity_scores.argsort()[-k:][::-1]
-            
-            # 컨텍스트 생성
-            contexts = []
-            for idx in top_indices:
-                if similarity_scores[idx] > 0.1:  # 최소 유사도 임계값
-                    doc = self.documents[persona_category][idx]
-                    context = f"[{self.persona_categories[persona_category]['name']}] {doc['content'][:200]}..."
-                    if doc['metadata'].get('author'):
-                        context += f" - {doc['metadata']['author']}"
-                    contexts.append(context)
-            
-            return contexts
-            
+            return self.retrieval_cache.cached_results(
+                persona_category, query, k, lambda: self._search(persona_category, query, k)
+            )
         except Exception as e:
+            # 실패 결과는 캐시하지 않음 (다음 호출에서 다시 검색)
             print(f"Error retrieving context for {persona_category}: {e}")
             return []
     
+    def get_context_many(self, queries_by_persona: Dict[str, str], k: int = 2) -> Dict[str, List[str]]:
+        """
+        여러 페르소나 카테고리의 컨텍스트를 한 번에 검색
+        
+        캐시에 없는 (카테고리, 질의) 쌍을 모아 공유 인덱스에서 희소 행렬곱 1회로 점수를 계산한다.
+        
+        Args:
+            queries_by_persona: {페르소나 카테고리: 검색 질의}
+            k: 카테고리별 반환할 문서 수
+        
+        Returns:
+            {페르소나 카테고리: 관련 컨텍스트 문자열 리스트}
+        """
+        results = {}
+        pending = {}
+        for persona_category, query in queries_by_persona.items():
+            if self.text_index is None or persona_category not in self.text_index:
+                print(f"Text index not found for {persona_category}")
+                results[persona_category] = []
+                continue
+            
+            hit, cached = self.retrieval_cache.lookup_results(persona_category, query, k)
+            if hit:
+                results[persona_category] = cached
+            else:
+                pending[persona_category] = query
+        
+        if not pending:
+            return results
+        
+        started = time.perf_counter()
+        try:
+            matches = self.text_index.search_many(list(pending.items()), k, min_score=MIN_SIMILARITY)
+        except Exception as e:
+            print(f"Error retrieving contexts for {', '.join(pending)}: {e}")
+            results.update({persona_category: [] for persona_category in pending})
+            return results
+        
+        cost = (time.perf_counter() - started) / len(pending)
+        for (persona_category, query), persona_matches in zip(pending.items(), matches):
+            contexts = [self._format_context(persona_category, position) for position, _ in persona_matches]
+            self.retrieval_cache.store_results(persona_category, query, k, contexts, cost)
+            results[persona_category] = contexts
+        
+        return results
+    
+    def _search(self, persona_category: str, query: str, k: int) -> List[str]:
+        """TF-IDF 유사도 검색 (캐시 미스 시 실행, 예외는 호출자가 처리)"""
+        matches = self.text_index.search(persona_category, query, k, min_score=MIN_SIMILARITY)
+        return [self._format_context(persona_category, position) for position, _ in matches]
+    
+    def _format_context(self, persona_category: str, position: int) -> str:
+        doc = self.documents[persona_category][position]
+        context = f"[{self.persona_categories[persona_category]['name']}] {self.prompt_budget.truncate(doc['content'], self.max_context_tokens)}"
+        if doc['metadata'].get('author'):
+            context += f" - {doc['metadata']['author']}"
+        return context
+    
+    def get_cache_stats(self) -> Dict:
+        """검색 캐시 적중률 / 절약 시간 통계"""
+        stats = self.retrieval_cache.stats()
+        if self.text_index is not None:
+            stats['text_index'] = self.text_index.stats()
+        return stats
+    
     def get_persona_info(self, persona_category: str) -> Dict:
         """페르소나 카테고리 정보 반환"""
         return self.persona_categories.get(persona_category, {})